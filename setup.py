@@ -16,6 +16,10 @@ setup(
   install_requires = [
     'ansicolors',
   ],
+  extras_require = {
+    'arrow': ['pyarrow'],
+    'numpy': ['numpy'],
+  },
   entry_points = {
     'console_scripts': [
       'skypie = skypie.bin.skypie:main',
@@ -1,3 +1,5 @@
+from array import array
+
 from .common import Acquisition, Meterable
 
 
@@ -13,6 +15,24 @@ class AllCashMeterable(Meterable):
     while True:
       yield (0, 0)
 
+  def cumulative(self, start, stop):
+    return (self.price if start <= 0 < stop else 0), 0
+
+  def end(self):
+    return 1
+
+  def payment(self, month):
+    return (self.price if month == 0 else 0), 0
+
+  def remaining(self, month):
+    return self.price if month <= 0 else 0
+
+  def schedule(self, months):
+    principal = array('d', [0]) * months
+    if months:
+      principal[0] = self.price
+    return principal, array('d', [0]) * months
+
 
 class AllCash(Acquisition):
   def get(self, price):
@@ -39,6 +59,8 @@ class MortgageMeterable(Meterable):
 
   def __init__(self, price, down_payment, term, rate):
     self.price, self.down_payment, self.rate, self.term = price, down_payment, rate, term
+    self.loan = self.price - self.down_payment * self.price
+    self.payment_amount = self.monthly_payment(rate, term, self.loan)
 
   def iterate_values(self):
     down_payment = self.down_payment * self.price
@@ -50,6 +72,56 @@ class MortgageMeterable(Meterable):
     while True:
       yield (0, 0)
 
+  def end(self):
+    return self.term + 1
+
+  # Month 0 is the down payment and months 1..term the loan payments.  The
+  # accessors below are closed forms of the iterate_values stream.
+
+  def balance_after(self, payments):
+    """The loan balance after ``payments`` monthly payments."""
+    if payments >= self.term:
+      return 0
+    r = self.rate / 12.
+    growth = (1 + r) ** max(payments, 0)
+    return self.loan * growth - self.payment_amount * (growth - 1) / r
+
+  def payment(self, month):
+    if month == 0:
+      return self.price - self.loan, 0
+    if not 0 < month <= self.term:
+      return 0, 0
+    interest = self.rate / 12. * self.balance_after(month - 1)
+    return self.payment_amount - interest, interest
+
+  def cumulative(self, start, stop):
+    principal = interest = 0
+    if start <= 0 < stop:
+      principal += self.price - self.loan
+    first, last = max(start, 1), min(stop, self.term + 1)
+    if first < last:
+      paid = self.balance_after(first - 1) - self.balance_after(last - 1)
+      principal += paid
+      interest += self.payment_amount * (last - first) - paid
+    return principal, interest
+
+  def remaining(self, month):
+    if month <= 0:
+      return self.price
+    return self.balance_after(month - 1)
+
+  def schedule(self, months):
+    principal, interest = array('d', [0]) * months, array('d', [0]) * months
+    if months:
+      principal[0] = self.price - self.loan
+    r = self.rate / 12.
+    balance = self.loan
+    for month in range(1, min(months, self.term + 1)):
+      interest[month] = r * balance
+      principal[month] = self.payment_amount - interest[month]
+      balance -= principal[month]
+    return principal, interest
+
 
 class Mortgage(Acquisition):
   def __init__(self, down_payment, term, rate):
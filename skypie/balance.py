@@ -1,3 +1,4 @@
+from array import array
 from collections import defaultdict
 
 
@@ -38,59 +39,262 @@ class Depreciation(BalanceSheetItem):
   pass
 
 
+CATEGORIES = (CapEx, OpEx, Income, Hobby, Depreciation)
+
+
+class Rollups(object):
+  """Running totals of balance sheet items, indexed by month, year and item class.
+
+  Totals are kept incrementally as items are added, so selecting by month, year
+  and/or a set of classes costs O(classes) rather than a scan of the ledger.
+  Each month and year maps to a list of totals, one per entry of CATEGORIES.
+  """
+
+  def __init__(self):
+    self.by_month = {}
+    self.by_year = {}
+    self.totals = [0] * len(CATEGORIES)
+    self.assets = []
+    self.assets_by_month = defaultdict(list)
+    self.assets_by_year = defaultdict(list)
+
+  @classmethod
+  def category(cls, item):
+    for category, item_klazz in enumerate(CATEGORIES):
+      if isinstance(item, item_klazz):
+        return category
+
+  def add(self, month, item):
+    if isinstance(item, Asset):
+      self.assets.append(item)
+      self.assets_by_month[month].append(item)
+      self.assets_by_year[month // 12].append(item)
+    else:
+      self.add_value(month, self.category(item), item.value)
+
+  def add_value(self, month, category, value):
+    month_totals = self.by_month.get(month)
+    if month_totals is None:
+      month_totals = self.by_month[month] = [0] * len(CATEGORIES)
+    year_totals = self.by_year.get(month // 12)
+    if year_totals is None:
+      year_totals = self.by_year[month // 12] = [0] * len(CATEGORIES)
+    month_totals[category] += value
+    year_totals[category] += value
+    self.totals[category] += value
+
+  def copy(self):
+    rollups = self.__class__()
+    rollups.by_month = dict((month, list(totals)) for month, totals in self.by_month.items())
+    rollups.by_year = dict((year, list(totals)) for year, totals in self.by_year.items())
+    self.copy_into(rollups)
+    return rollups
+
+  def copy_into(self, rollups):
+    """Copy the totals and assets, but not the month and year totals, into ``rollups``."""
+    rollups.totals = list(self.totals)
+    rollups.assets.extend(self.assets)
+    for month, assets in self.assets_by_month.items():
+      rollups.assets_by_month[month].extend(assets)
+    for year, assets in self.assets_by_year.items():
+      rollups.assets_by_year[year].extend(assets)
+
+  def select(self, month=None, year=None, item_klazz=None):
+    if item_klazz is None:
+      item_klazz = (Asset,) + CATEGORIES
+    elif isinstance(item_klazz, list):
+      item_klazz = tuple(item_klazz)
+
+    if month is not None and year is not None and month // 12 != year:
+      return []
+
+    if month is not None:
+      assets, totals = self.assets_by_month.get(month, []), self.by_month.get(month)
+    elif year is not None:
+      assets, totals = self.assets_by_year.get(year, []), self.by_year.get(year)
+    else:
+      assets, totals = self.assets, self.totals
+
+    items = list(assets) if issubclass(Asset, item_klazz) else []
+    for klazz, total in zip(CATEGORIES, totals or [0] * len(CATEGORIES)):
+      if issubclass(klazz, item_klazz):
+        aggregated = klazz(value=total)
+        if aggregated.value > 0:
+          items.append(aggregated)
+    return items
+
+
+class TotalsColumn(object):
+  """Totals per category of each month or year, kept in a single flat array('d').
+
+  Behaves as the dict of lists of Rollups for ``get``: the totals of a period
+  are a slice of the array, one per entry of CATEGORIES.
+  """
+
+  WIDTH = len(CATEGORIES)
+
+  def __init__(self, values=None):
+    self.values = array('d') if values is None else values
+
+  def add(self, period, category, value):
+    offset = period * self.WIDTH
+    if offset >= len(self.values):
+      self.values.extend(array('d', [0]) * (offset + self.WIDTH - len(self.values)))
+    self.values[offset + category] += value
+
+  def get(self, period, default=None):
+    offset = period * self.WIDTH
+    if period < 0 or offset >= len(self.values):
+      return default
+    return self.values[offset:offset + self.WIDTH]
+
+  def copy(self):
+    return self.__class__(self.values[:])
+
+
+class ColumnarRollups(Rollups):
+  """Rollups whose month and year totals are TotalsColumns rather than lists of floats."""
+
+  def __init__(self):
+    super(ColumnarRollups, self).__init__()
+    self.by_month = TotalsColumn()
+    self.by_year = TotalsColumn()
+
+  def add_value(self, month, category, value):
+    self.by_month.add(month, category, value)
+    self.by_year.add(month // 12, category, value)
+    self.totals[category] += value
+
+  def copy(self):
+    rollups = self.__class__()
+    rollups.by_month = self.by_month.copy()
+    rollups.by_year = self.by_year.copy()
+    self.copy_into(rollups)
+    return rollups
+
+
 class Balance(object):
   def __init__(self):
     self.month = 0
+    self.entries = 0
     self.items = defaultdict(list)
+    self.rollups = Rollups()
 
   def tick(self):
     self.month += 1
 
-  def __iadd__(self, val):
+  def add(self, val, month=None):
+    """Book ``val`` at ``month``, defaulting to the current month."""
+    month = self.month if month is None else month
     if isinstance(val, (Asset, CapEx, OpEx, Income, Hobby, Depreciation)):
-      self.items[self.month].append(val)
+      self.items[month].append(val)
+      self.rollups.add(month, val)
+      self.entries += 1
     else:
       raise TypeError('Unknown balance shset item %s' % type(val))
+
+  def __iadd__(self, val):
+    self.add(val)
     return self
 
+  def fork(self):
+    """Return a copy of this balance sheet that may be extended independently."""
+    balance = self.__class__()
+    balance.month = self.month
+    balance.entries = self.entries
+    for month, items in self.items.items():
+      balance.items[month] = list(items)
+    balance.rollups = self.rollups.copy()
+    return balance
+
+  def assets(self):
+    """Yield (month, asset) for every asset on the balance sheet."""
+    for month, items in self.items.items():
+      for item in items:
+        if isinstance(item, Asset):
+          yield month, item
+
   @classmethod
   def aggregate(cls, elements):
     items = [item for item in elements if isinstance(item, Asset)]
-    for item_klazz in CapEx, OpEx, Income, Hobby, Depreciation:
+    for item_klazz in CATEGORIES:
       aggregated = item_klazz(value=sum(item.value for item in elements if isinstance(item, item_klazz)))
       if aggregated.value > 0:
         items.append(aggregated)
     return items
 
   def select(self, month=None, year=None, item_klazz=None):
-    selected_items = []
-
-    def keep(month, item, select_month=None, select_year=None, select_item_klazz=None):
-      keep_item = True
-      if select_month is not None and month != select_month:
-        keep_item = False
-      if select_year is not None and month / 12 != select_year:
-        keep_item = False
-      if select_item_klazz is not None:
-        if isinstance(select_item_klazz, (list, tuple)):
-          if not any(isinstance(item, item_klazz) for item_klazz in select_item_klazz):
-            keep_item = False
-        else:
-          if not isinstance(item, select_item_klazz):
-            keep_item = False
-      return keep_item
-
-    for mo, items in self.items.items():
-      for item in items:
-        if keep(mo, item, select_month=month, select_year=year, select_item_klazz=item_klazz):
-          selected_items.append(item)
+    """Aggregate the items matching ``month``, ``year`` and ``item_klazz``.
 
-    return self.aggregate(selected_items)
+    Answered from the running rollups rather than a scan of every item.
+    """
+    return self.rollups.select(month=month, year=year, item_klazz=item_klazz)
 
   def sum(self, **kw):
     return sum(item.value for item in self.select(**kw))
 
 
+class ColumnarBalance(Balance):
+  """A balance sheet stored as parallel month, category and amount columns.
+
+  Balance keeps one object per entry; this keeps three machine-typed arrays and
+  only materializes objects for the aggregates returned by select.  Assets carry
+  a depreciation model and are rare, so they are still kept as objects.  The
+  rollups that answer select are ColumnarRollups, also held in arrays.
+  """
+
+  CATEGORIES = CATEGORIES
+
+  def __init__(self):
+    self.month = 0
+    self.entries = 0
+    self.months = array('i')
+    self.categories = array('b')
+    self.amounts = array('d')
+    self.asset_items = []
+    self.rollups = ColumnarRollups()
+
+  def add(self, val, month=None):
+    month = self.month if month is None else month
+    if isinstance(val, Asset):
+      self.asset_items.append((month, val))
+      self.rollups.add(month, val)
+      self.entries += 1
+      return
+    for category, item_klazz in enumerate(self.CATEGORIES):
+      if isinstance(val, item_klazz):
+        self.months.append(month)
+        self.categories.append(category)
+        self.amounts.append(val.value)
+        self.rollups.add_value(month, category, val.value)
+        self.entries += 1
+        return
+    raise TypeError('Unknown balance shset item %s' % type(val))
+
+  def fork(self):
+    balance = self.__class__()
+    balance.month = self.month
+    balance.entries = self.entries
+    balance.months = self.months[:]
+    balance.categories = self.categories[:]
+    balance.amounts = self.amounts[:]
+    balance.asset_items = list(self.asset_items)
+    balance.rollups = self.rollups.copy()
+    return balance
+
+  def assets(self):
+    return iter(self.asset_items)
+
+  @property
+  def items(self):
+    items = defaultdict(list)
+    for month, asset in self.asset_items:
+      items[month].append(asset)
+    for month, category, amount in zip(self.months, self.categories, self.amounts):
+      items[month].append(self.CATEGORIES[category](amount))
+    return items
+
+
 def tax_adjusted_profit(balance_sheet, part91_percentage=1.0, tax_rate=0.25, **kw):
   expenses = balance_sheet.sum(item_klazz=(CapEx, OpEx), **kw)
   revenue = balance_sheet.sum(item_klazz=Income, **kw)
@@ -106,5 +310,9 @@ def tax_adjusted_profit(balance_sheet, part91_percentage=1.0, tax_rate=0.25, **k
   #
   # After-tax profits:
   #   - profit - max(profit - deductions, 0) * tax_rate
+  return after_tax(revenue, expenses, deductions, tax_rate=tax_rate)
+
+
+def after_tax(revenue, expenses, deductions, tax_rate=0.25):
   profit = revenue - expenses
   return profit - max(profit - deductions, 0) * tax_rate
@@ -0,0 +1,329 @@
+"""Evaluate many scenarios, one JSON object per line, in a single process.
+
+A scenario names a plane from PLANES, optionally with overridden fields, or
+describes one inline, along with its acquisition, usage model, constant
+overrides and hours and years ranges, e.g.::
+
+  {"id": "da40-cash", "plane": "DA40", "acquisition": "cash",
+   "part91_hours": 10, "hours": "10,100,10", "years": [1, 5, 10]}
+
+  {"plane": {"base": "T210", "price": 95000, "engine": {"overhaul": 35000, "tbo": 1400}},
+   "acquisition": {"type": "finance", "term": 180, "rate": 7, "down": 20},
+   "usage": {"revenue": 150}, "constants": {"gas_100ll": 6.0}, "sell": true,
+   "part91_hours": 5, "hours": 20, "years": "1,20,1", "output": "outlay"}
+
+Defaults and units are those of the command line, e.g. rate 7 is 7%.
+
+Scenarios are read and evaluated a chunk at a time, so results stream while
+the input is still being read.  Within a chunk they are split or packed into
+hours batches and spread across a worker pool.  Planes and depreciation models are shared between scenarios that name
+the same ones, and each worker builds the amortization schedule of an
+(acquisition, price) pair once, out to the longest horizon any scenario asks of
+it.  A scenario that fails to parse or to evaluate yields an error record,
+and the other scenarios are unaffected.
+"""
+
+from collections import OrderedDict, namedtuple
+import itertools
+import json
+
+from .acquisition import AllCash, Mortgage
+from .cache import fingerprint
+from .common import Airplane, Engine, Performance, Prop, Upgrade
+from .constants import CONSTANTS
+from .depreciation import (
+    DepreciationCombinator,
+    ExponentialDepreciation,
+    FixedDepreciation,
+    LinearDepreciation,
+)
+from .grid import AcquisitionSchedule, DEFAULT_BATCH_SIZE, evaluate_batch, OUTPUTS, rate
+from .model import UsageModel
+from .parallel import imap
+from .planes import PLANES
+
+
+Scenario = namedtuple('Scenario', (
+    'id',
+    'plane',
+    'acquisition',
+    'part91_hours',
+    'h_range',
+    'y_range',
+    'usage',
+    'constants',
+    'sell',
+    'output',
+))
+
+
+# The command line defaults, which differ from UsageModel's.
+DEFAULT_USAGE = dict(hobbs_ratio=1.2)
+
+# Scenarios read and evaluated at a time by run.
+DEFAULT_CHUNK_SIZE = 1024
+
+
+class ScenarioError(ValueError):
+  pass
+
+
+DEPRECIATIONS = {
+  'fixed': (FixedDepreciation, (float,)),
+  'exponential': (ExponentialDepreciation, (float, int)),
+  'linear': (LinearDepreciation, (int,)),
+}
+
+
+class Parser(object):
+  """Parses scenario records, sharing planes and depreciation models between them."""
+
+  def __init__(self, planes=PLANES):
+    self.planes = planes
+    self.depreciations = {}
+
+  def depreciation(self, spec):
+    """Parse fixed:percent, exponential:amount:months or linear:months; a list combines them."""
+    if isinstance(spec, list):
+      return DepreciationCombinator([self.depreciation(each) for each in spec])
+    if spec not in self.depreciations:
+      kind, _, args = str(spec).partition(':')
+      if kind not in DEPRECIATIONS:
+        raise ScenarioError('Unknown depreciation %r' % spec)
+      klazz, types = DEPRECIATIONS[kind]
+      args = args.split(':') if args else []
+      if len(args) != len(types):
+        raise ScenarioError('Depreciation %r takes %d arguments' % (kind, len(types)))
+      self.depreciations[spec] = klazz(*[convert(arg) for convert, arg in zip(types, args)])
+    return self.depreciations[spec]
+
+  def plane(self, spec):
+    if isinstance(spec, dict):
+      fields = dict(spec)
+      base = fields.pop('base', None)
+      if base is not None:
+        plane = self.plane(base)
+        fields = self.airplane_fields(fields, plane)
+        if 'price' in fields and 'value' not in fields:
+          fields['value'] = fields['price']
+        return plane(**fields)
+      try:
+        return Airplane(**self.airplane_fields(fields))
+      except TypeError as e:
+        raise ScenarioError(str(e))
+    if spec not in self.planes:
+      raise ScenarioError('Unknown plane %r' % spec)
+    return self.planes[spec]
+
+  def airplane_fields(self, fields, base=None):
+    fields = dict(fields)
+    if 'performance' in fields:
+      fields['performance'] = Performance(**fields['performance'])
+    if 'engine' in fields:
+      engine = dict(vars(base.engine)) if base else {}
+      engine.update(fields['engine'])
+      fields['engine'] = Engine(**engine)
+    if 'prop' in fields:
+      prop = dict(vars(base.prop)) if base else {}
+      prop.update(fields['prop'])
+      fields['prop'] = Prop(**prop)
+    if 'depreciation' in fields:
+      fields['depreciation'] = self.depreciation(fields['depreciation'])
+    if 'upgrades' in fields:
+      fields['upgrades'] = [
+          Upgrade(upgrade['name'], upgrade['price'], self.depreciation(upgrade['depreciation']))
+          for upgrade in fields['upgrades']]
+    return fields
+
+  @classmethod
+  def acquisition(cls, spec):
+    if not isinstance(spec, dict):
+      spec = dict(type=spec)
+    kind = spec.get('type', 'finance')
+    if kind == 'cash':
+      return AllCash()
+    elif kind == 'finance':
+      return Mortgage(
+          spec.get('down', 15) / 100.0,
+          spec.get('term', 120),
+          spec.get('rate', 6.25) / 100.0)
+    raise ScenarioError('Unknown acquisition type %r' % kind)
+
+  @classmethod
+  def values(cls, spec):
+    """A number, a list of numbers or a start,stop,step range inclusive of stop."""
+    if isinstance(spec, list):
+      return spec
+    if isinstance(spec, (int, float)):
+      return [spec]
+    try:
+      start, stop, step = [int(value) for value in spec.split(',')]
+    except (AttributeError, ValueError):
+      raise ScenarioError('Invalid number or range %r' % (spec,))
+    return list(range(start, stop + step, step))
+
+  def parse(self, record, default_id=None):
+    if not isinstance(record, dict):
+      raise ScenarioError('A scenario must be a JSON object')
+    try:
+      constants = dict(CONSTANTS)
+      constants.update(record.get('constants', {}))
+      usage = dict(DEFAULT_USAGE)
+      usage.update(record.get('usage', {}))
+      output = record.get('output', 'hourly')
+      if output not in OUTPUTS:
+        raise ScenarioError('Unknown output %r' % output)
+      y_range = self.values(record['years'])
+      if not y_range or min(y_range) <= 0:
+        raise ScenarioError('Years must be positive')
+      part91_hours = record.get('part91_hours', 0)
+      h_range = self.values(record['hours'])
+      if part91_hours < 0 or (h_range and min(h_range) < 0):
+        raise ScenarioError('Hours must not be negative')
+      if part91_hours == 0 and 0 in h_range:
+        raise ScenarioError('Hours must be positive when part91_hours is 0')
+      return Scenario(
+          id=record.get('id', default_id),
+          plane=self.plane(record['plane']),
+          acquisition=self.acquisition(record.get('acquisition', 'finance')),
+          part91_hours=part91_hours,
+          h_range=h_range,
+          y_range=sorted(y_range),
+          usage=UsageModel(**usage),
+          constants=constants,
+          sell=bool(record.get('sell', False)),
+          output=output)
+    except KeyError as e:
+      raise ScenarioError('Missing %s' % e)
+    except (TypeError, ValueError) as e:
+      raise ScenarioError(str(e))
+
+
+def read_scenarios(lines, parser=None):
+  """Yield (line number, Scenario or ScenarioError) for each non-blank line."""
+  parser = parser or Parser()
+  for number, line in enumerate(lines, 1):
+    if not line.strip():
+      continue
+    try:
+      yield number, parser.parse(json.loads(line), default_id=number)
+    except ValueError as e:
+      yield number, e if isinstance(e, ScenarioError) else ScenarioError(str(e))
+
+
+def schedule_key(scenario):
+  return fingerprint(scenario.acquisition), scenario.plane.price
+
+
+def _scenario_rows(state, task):
+  """The rows of each piece of ``task``, or the ScenarioError evaluating it raised."""
+  results = []
+  for index, h_batch in task:
+    scenario = state['scenarios'][index]
+    key = schedule_key(scenario)
+    schedules = state.setdefault('schedules', {})
+    try:
+      if key not in schedules:
+        schedules[key] = AcquisitionSchedule(
+            scenario.acquisition, scenario.plane.price, state['horizons'][key] * 12)
+      results.append(evaluate_batch(
+          scenario.plane,
+          scenario.acquisition,
+          scenario.part91_hours,
+          h_batch,
+          scenario.y_range,
+          usage=scenario.usage,
+          constants=scenario.constants,
+          sell=scenario.sell,
+          schedule=schedules[key]))
+    except Exception as e:
+      # One bad scenario must not take down the others packed into its task.
+      results.append(ScenarioError('%s: %s' % (e.__class__.__name__, e)))
+  return results
+
+
+def pack(scenarios, batch_size):
+  """Split scenarios into tasks of (scenario index, hours batch) pieces.
+
+  Large scenarios are split into batches of ``batch_size`` hours, and small
+  ones are packed together, so that each task is worth sending to a worker.
+  """
+  task, size = [], 0
+  for index, scenario in enumerate(scenarios):
+    for offset in range(0, len(scenario.h_range), batch_size):
+      h_batch = scenario.h_range[offset:offset + batch_size]
+      task.append((index, h_batch))
+      size += len(h_batch)
+      if size >= batch_size:
+        yield task
+        task, size = [], 0
+  if task:
+    yield task
+
+
+def evaluate(scenarios, jobs=1, batch_size=DEFAULT_BATCH_SIZE, raise_errors=True):
+  """Yield (scenario, rows) for each of ``scenarios``, in order.
+
+  ``rows`` holds a row of tax adjusted profits per hours value of the scenario,
+  one per years value.  If a scenario fails to evaluate its ScenarioError is
+  raised, or yielded in place of its rows unless ``raise_errors``.
+  """
+  scenarios = list(scenarios)
+  horizons = {}
+  for scenario in scenarios:
+    key = schedule_key(scenario)
+    horizons[key] = max(horizons.get(key, 0), max(scenario.y_range))
+
+  results = itertools.chain.from_iterable(imap(
+      _scenario_rows,
+      pack(scenarios, batch_size),
+      state=dict(scenarios=scenarios, horizons=horizons),
+      jobs=jobs))
+
+  for scenario in scenarios:
+    rows, error = [], None
+    for _ in range(0, len(scenario.h_range), batch_size):
+      piece = next(results)
+      if isinstance(piece, ScenarioError):
+        error = error or piece
+      else:
+        rows.extend(piece)
+    if error is not None and raise_errors:
+      raise error
+    yield scenario, rows if error is None else error
+
+
+def run(lines, jobs=1, batch_size=DEFAULT_BATCH_SIZE, parser=None, chunk_size=DEFAULT_CHUNK_SIZE):
+  """Yield a result record per cell of every scenario in ``lines``, in order.
+
+  ``lines`` are read ``chunk_size`` scenarios at a time.  A scenario that fails
+  to parse or to evaluate yields a single record with an error instead.
+  """
+  entries = read_scenarios(lines, parser=parser)
+  while True:
+    chunk = list(itertools.islice(entries, chunk_size))
+    if not chunk:
+      return
+    results = evaluate(
+        [scenario for _, scenario in chunk if isinstance(scenario, Scenario)],
+        jobs=jobs,
+        batch_size=batch_size,
+        raise_errors=False)
+
+    for number, scenario in chunk:
+      if isinstance(scenario, Scenario):
+        _, rows = next(results)
+        if isinstance(rows, ScenarioError):
+          scenario = rows
+      if not isinstance(scenario, Scenario):
+        yield OrderedDict([('scenario', number), ('error', str(scenario))])
+        continue
+      for hours, row in zip(scenario.h_range, rows):
+        for years, value in zip(scenario.y_range, row):
+          yield OrderedDict([
+              ('scenario', scenario.id),
+              ('part135_hours', hours),
+              ('years', years),
+              ('output', scenario.output),
+              ('value', rate(value, scenario.output, scenario.part91_hours, years)),
+          ])
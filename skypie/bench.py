@@ -0,0 +1,135 @@
+"""Reproducible performance workloads.
+
+Each workload is a named zero-argument callable.  A run reports operations per
+second and peak traced memory for each workload, can be saved as a JSON
+baseline, and compared against a saved baseline to flag regressions.
+"""
+
+from __future__ import print_function
+
+import json
+import timeit
+
+from .acquisition import Mortgage
+from .balance import Balance, CapEx, ColumnarBalance, Income, OpEx, tax_adjusted_profit
+from .grid import grid
+from .model import simple
+from .planes import PLANES
+from .tabulator import DEFAULT_H_RANGE, DEFAULT_Y_RANGE
+
+
+BASELINE_VERSION = 1
+DEFAULT_MIN_TIME = 0.5
+DEFAULT_TOLERANCE = 0.2
+
+ACQUISITION = Mortgage(0.15, 120, 0.0625)
+PART91_HOURS = 10
+PART135_HOURS = 20
+
+
+def ledger(klazz, months=12 * 50, items_per_month=8):
+  balance = klazz()
+  for month in range(months):
+    for item in range(items_per_month):
+      balance += (CapEx, OpEx, Income)[item % 3](month + item)
+    balance.tick()
+  return balance
+
+
+def workloads():
+  """Yield (name, function) for every benchmark workload."""
+  plane = PLANES['DA40']
+
+  for years in (10, 30, 50):
+    for sell in (False, True):
+      yield 'simple[%dy,%s]' % (years, 'sell' if sell else 'keep'), (
+          lambda years=years, sell=sell: simple(
+              plane, ACQUISITION, PART91_HOURS, PART135_HOURS, years, sell=sell))
+
+  for name, each_plane in sorted(PLANES.items()):
+    yield 'depreciation.at[%s,6000mo]' % name, (
+        lambda each_plane=each_plane: each_plane.depreciation.at(6000))
+    yield 'depreciation.curve[%s,600mo]' % name, (
+        lambda each_plane=each_plane: each_plane.depreciation.curve(range(1, 601)))
+
+  for klazz in (Balance, ColumnarBalance):
+    balance = ledger(klazz)
+    yield '%s.sum[50y]' % klazz.__name__, (
+        lambda balance=balance: balance.sum(item_klazz=(CapEx, OpEx)))
+    yield '%s.sum[50y,year]' % klazz.__name__, (
+        lambda balance=balance: [balance.sum(year=year, item_klazz=Income) for year in range(50)])
+    yield '%s.tax_adjusted_profit[50y]' % klazz.__name__, (
+        lambda balance=balance: tax_adjusted_profit(balance, part91_percentage=0.5))
+
+  for name, each_plane in sorted(PLANES.items()):
+    for sell in (False, True):
+      yield 'table[%s,%s]' % (name, 'sell' if sell else 'keep'), (
+          lambda each_plane=each_plane, sell=sell: grid(
+              each_plane, ACQUISITION, PART91_HOURS, DEFAULT_H_RANGE, DEFAULT_Y_RANGE, sell=sell))
+
+
+def measure(function, min_time=DEFAULT_MIN_TIME):
+  """Return (ops per second, peak traced bytes or None) of calling ``function``."""
+  try:
+    import tracemalloc
+  except ImportError:  # python 2
+    tracemalloc = None
+
+  peak = None
+  if tracemalloc is not None:
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+  count, start = 0, timeit.default_timer()
+  while True:
+    function()
+    count += 1
+    elapsed = timeit.default_timer() - start
+    if elapsed >= min_time:
+      return count / elapsed, peak
+
+
+def run(pattern=None, min_time=DEFAULT_MIN_TIME, report=None):
+  """Measure every workload whose name contains ``pattern``.
+
+  Returns a baseline document; ``report`` is called with (name, result) as each
+  workload completes.
+  """
+  import platform
+  results = {}
+  for name, function in workloads():
+    if pattern and pattern not in name:
+      continue
+    ops_per_sec, peak = measure(function, min_time=min_time)
+    results[name] = dict(ops_per_sec=ops_per_sec, peak_bytes=peak)
+    if report:
+      report(name, results[name])
+  return dict(
+      version=BASELINE_VERSION,
+      python=platform.python_version(),
+      results=results)
+
+
+def save(document, filename):
+  with open(filename, 'w') as fp:
+    json.dump(document, fp, indent=2, sort_keys=True)
+
+
+def load(filename):
+  with open(filename) as fp:
+    document = json.load(fp)
+  if document.get('version') != BASELINE_VERSION:
+    raise ValueError('Unsupported baseline version in %s' % filename)
+  return document
+
+
+def regressions(document, baseline, tolerance=DEFAULT_TOLERANCE):
+  """Yield (name, baseline ops/sec, current ops/sec) for workloads slower than baseline by more than ``tolerance``."""
+  for name, result in sorted(document['results'].items()):
+    previous = baseline['results'].get(name)
+    if previous is None:
+      continue
+    if result['ops_per_sec'] < previous['ops_per_sec'] * (1 - tolerance):
+      yield name, previous['ops_per_sec'], result['ops_per_sec']
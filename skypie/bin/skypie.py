@@ -1,37 +1,79 @@
 from __future__ import absolute_import, print_function
 
+import timeit
+
+# When the import of the command line began, for --timing.
+STARTED = timeit.default_timer()
+
 from collections import defaultdict
 import argparse
+import errno
+import json
+import os
 import sys
+import time
 
+from skypie import stats, tabulator, writers
 from skypie.acquisition import AllCash, Mortgage
-from skypie.balance import tax_adjusted_profit, Income
+from skypie.balance import tax_adjusted_profit, CATEGORIES, Income
 from skypie.colorant import breakeven
-from skypie.constants import CONSTANTS
+from skypie.constants import CONSTANTS, DEFAULT_DELTA
 from skypie.common import Engine, Prop
 from skypie.model import simple, UsageModel
 from skypie.planes import PLANES
-from skypie.tabulator import table
 
 
-def setup_argparser():
+def setup_argparser(argv=None):
+  """Return the argument parser.
+
+  If ``argv`` is given and names a subcommand, only the parser of that
+  subcommand is set up rather than every one of them.
+  """
   parser = argparse.ArgumentParser()
   setup_argparser_usagemodel(parser)
   setup_argparser_acquisition(parser)
   setup_argparser_depreciation(parser)
   setup_argparser_plane_option_overrides(parser)
   setup_argparser_constants_option(parser)
+  setup_argparser_cache_option(parser)
+  setup_argparser_profile_option(parser)
+
+  subcommand = None
+  if argv is not None and not set(argv) & set(['-h', '--help']):
+    # The first argument left over by the global options is the subcommand.
+    _, rest = parser.parse_known_args(argv)
+    subcommand = rest[0] if rest else None
 
   subcommand_parser = parser.add_subparsers(help='subcommand help')
 
-  setup_argparser_table_command(subcommand_parser)
-  setup_argparser_sample_command(subcommand_parser)
-  setup_argparser_constants_command(subcommand_parser)
+  subcommands = [
+    ('table', setup_argparser_table_command),
+    ('sample', setup_argparser_sample_command),
+    ('breakeven', setup_argparser_breakeven_command),
+    ('montecarlo', setup_argparser_montecarlo_command),
+    ('constants', setup_argparser_constants_command),
+    ('cache', setup_argparser_cache_command),
+    ('bench', setup_argparser_bench_command),
+    ('batch', setup_argparser_batch_command),
+    ('compare', setup_argparser_compare_command),
+    ('optimal-exit', setup_argparser_optimal_exit_command),
+    ('sensitivity', setup_argparser_sensitivity_command),
+    ('timeseries', setup_argparser_timeseries_command),
+    ('fleet', setup_argparser_fleet_command),
+    ('optimize-financing', setup_argparser_optimize_financing_command),
+    ('serve', setup_argparser_serve_command),
+    ('repl', setup_argparser_repl_command),
+  ]
+  if subcommand in dict(subcommands):
+    subcommands = [(subcommand, dict(subcommands)[subcommand])]
+  for _, setup in subcommands:
+    setup(subcommand_parser)
 
   return parser
 
 
 def table_command(args):
+  from skypie.grid import iterate_grid, rate
   plane = PLANES[args.plane]
   part91_hours = args.part91_hours
   h_range = parse_range(args.h_range)
@@ -41,29 +83,51 @@ def table_command(args):
   constants = parse_constants(args)
   plane = update_plane(plane, args)
 
-  def model(plane, acquisition, hours, years):
-    balance_sheet = simple(
-        plane,
-        acquisition,
-        part91_hours,
-        hours,
-        years,
-        usage=usage_model,
-        constants=constants,
-        sell=args.sell)
+  # An in-process cache would only cost fingerprinting in a process that exits after
+  # one table, so cells are cached only on disk.
+  cache = parse_cache(args)
 
-    part91_percentage = 1. * part91_hours / (part91_hours + hours)
-    value = tax_adjusted_profit(balance_sheet, part91_percentage=part91_percentage)
+  rows = iterate_grid(
+      plane,
+      acquisition,
+      part91_hours,
+      h_range,
+      y_range,
+      usage=usage_model,
+      constants=constants,
+      sell=args.sell,
+      engine=args.engine,
+      jobs=args.jobs,
+      cache=cache)
 
-    if args.output == 'outlay':
-      return value
-    elif args.output == 'hourly':
-      return value / (part91_hours * 12 * years) if (part91_hours * years) > 0 else 0
-    elif args.output == 'yearly':
-      return value / years if years > 0 else 0
+  try:
+    if args.format == 'text':
+      render_table(args, plane, acquisition, part91_hours, y_range, rows)
     else:
-      raise ValueError('Unknown outlay type %s' % args.output)
-
+      columns = ('part135_hours', 'years', args.output)
+      with open_writer(args, columns) as writer:
+        for hours, row in timed_rows(rows):
+          with stats.phase('render'):
+            for years, value in zip(y_range, row):
+              writer.write((hours, years, rate(value, args.output, part91_hours, years)))
+  finally:
+    if cache is not None:
+      cache.close()
+
+
+def timed_rows(rows):
+  """Yield from ``rows``, accumulating the time spent computing them under 'simulate'."""
+  rows = iter(rows)
+  while True:
+    with stats.phase('simulate'):
+      row = next(rows, None)
+    if row is None:
+      return
+    yield row
+
+
+def render_table(args, plane, acquisition, part91_hours, y_range, rows):
+  from skypie.grid import rate
   colorant = None
   if args.breakeven is not None:
     watermarks = args.breakeven.split(',')
@@ -72,17 +136,21 @@ def table_command(args):
 
   print('Liquidation model: %s' % 'sell' if args.sell else 'keep')
 
-  table(
-      plane,
-      acquisition,
-      model,
-      h_range=h_range,
-      y_range=y_range,
-      colorant=colorant,
-  )
+  tabulator.header(plane, acquisition, y_range)
+  for hours, row in timed_rows(rows):
+    with stats.phase('render'):
+      rates = [rate(value, args.output, part91_hours, years) for years, value in zip(y_range, row)]
+      sys.stdout.write(tabulator.format_row(hours, rates, colorant=colorant))
   print('\n')
 
 
+def open_writer(args, columns):
+  try:
+    return writers.writer(args.format, sys.stdout, columns)
+  except ImportError as e:
+    die(str(e))
+
+
 def setup_argparser_sample_command(parser):
   # args:
   #    plane [h_value or h_range] [y_value or y_range]
@@ -93,6 +161,13 @@ def setup_argparser_sample_command(parser):
   table_parser.add_argument('part91_hours', type=float, help='Number of part 91 hours per month (personal use.)')
   table_parser.add_argument('part135_hours', type=float, help='Number of part 135 hours per month (commercial use.)')
   table_parser.add_argument('years', type=int, help='Years of ownership.')
+  setup_argparser_format_option(table_parser)
+
+
+def setup_argparser_format_option(parser):
+  parser.add_argument('--format', choices=writers.FORMATS, default='text',
+    help='If --format=text, print a human readable report.  Otherwise stream one '
+         'record per row as csv, JSON lines or an Arrow IPC stream.')
 
 
 def sample_command(args):
@@ -117,6 +192,18 @@ def sample_command(args):
 
   part91_percentage = 1. * part91_hours / (part91_hours + part135_hours)
 
+  if args.format != 'text':
+    columns = ('year',) + tuple(klazz.__name__.lower() for klazz in CATEGORIES) + ('profit',)
+    with open_writer(args, columns) as writer:
+      # the final record, with a null year, is the aggregate over all years
+      for year in list(range(years + 1)) + [None]:
+        kw = {} if year is None else dict(year=year)
+        writer.write(
+            (year,) +
+            tuple(balance.sum(item_klazz=klazz, **kw) for klazz in CATEGORIES) +
+            (tax_adjusted_profit(balance, part91_percentage=part91_percentage, **kw),))
+    return
+
   for year in range(years + 1):
     print('year %d: %s' % (year, ' '.join(map(str, balance.select(year=year)))))
     income = balance.sum(year=year, item_klazz=Income)
@@ -131,6 +218,8 @@ def sample_command(args):
 
 
 def setup_argparser_table_command(parser):
+  from skypie.grid import ENGINES, OUTPUTS
+  from skypie.parallel import cpu_count
   # args:
   #    plane [part 91 hours] [h_value or h_range] [y_value or y_range]
   #    da40 20 0,40,5 10
@@ -141,12 +230,162 @@ def setup_argparser_table_command(parser):
   table_parser.add_argument('h_range', help='Range of part 135 hours per month.')
   table_parser.add_argument('y_range', help='Years of ownership, or range.')
   table_parser.add_argument('--debug', action='store_true')
-  table_parser.add_argument('--output', choices=['hourly', 'yearly', 'outlay'], default='hourly')
+  table_parser.add_argument('--output', choices=OUTPUTS, default='hourly')
+  table_parser.add_argument('--engine', choices=sorted(ENGINES), default='grid',
+    help='If --engine=grid, evaluate the whole table in a single batched pass.  If '
+         '--engine=simple, simulate full balance sheets, one pass per hours value.  If '
+         '--engine=events, jump between cash flow events, one simulation per cell.')
+  table_parser.add_argument('--jobs', type=int, default=cpu_count(),
+    help='Number of processes to spread the table across; defaults to the number of cpus.')
   table_parser.add_argument('--range-type', choices=['yearly', 'total'], default='yearly',
     help='If --range-type=yearly, interpret the hour value as hours per year. If '
          '--range-type=total, interpret the hour value as total hours.')
   table_parser.add_argument('--breakeven', type=str, default=None,
     help='The cost breakeven point.  Colorizes the table based on this value if specified.')
+  setup_argparser_format_option(table_parser)
+
+
+def setup_argparser_breakeven_command(parser):
+  from skypie.grid import OUTPUTS
+  # args:
+  #    plane [part 91 hours] [target] [y_value or y_range]
+  #    da40 10 -285 1,10,1
+  breakeven_parser = parser.add_parser('breakeven',
+      help='Solve for the hours or ownership horizon at which a model crosses a target value.')
+  breakeven_parser.set_defaults(func=breakeven_command)
+  breakeven_parser.add_argument('plane', choices=PLANES)
+  breakeven_parser.add_argument('part91_hours', type=float, help='Number of part 91 hours per month (personal use.)')
+  breakeven_parser.add_argument('target', type=float,
+      help='The breakeven value, in the units of --output, e.g. the negated wet rate of renting.')
+  breakeven_parser.add_argument('range',
+      help='With --solve-for=hours, the years of ownership, or range.  With --solve-for=years, '
+           'the part 135 hours per month, or range.')
+  breakeven_parser.add_argument('--solve-for', choices=['hours', 'years'], default='hours',
+      help='If --solve-for=hours, find the part 135 hours per month at which each ownership '
+           'horizon breaks even.  If --solve-for=years, find the first ownership horizon at '
+           'which each hours value breaks even.')
+  breakeven_parser.add_argument('--output', choices=OUTPUTS, default='hourly')
+  breakeven_parser.add_argument('--max-years', type=int, default=30,
+      help='The longest ownership horizon considered by --solve-for=years.')
+  breakeven_parser.add_argument('--jobs', type=int, default=1,
+      help='Number of processes used by --solve-for=years.')
+
+
+def breakeven_command(args):
+  from skypie.solver import breakeven_hours, breakeven_years, NoBreakeven
+  plane = update_plane(PLANES[args.plane], args)
+  acquisition = parse_acquisition(args)
+  usage_model = parse_usage_model(args)
+  constants = parse_constants(args)
+
+  print('Plane:        %s' % plane)
+  print('Acquisition:  %s' % acquisition)
+  print('Breakeven:    %s %s' % (args.target, args.output))
+
+  if args.solve_for == 'hours':
+    for years in parse_range(args.range):
+      try:
+        hours, evaluations = breakeven_hours(
+            plane,
+            acquisition,
+            args.part91_hours,
+            years,
+            args.target,
+            output=args.output,
+            usage=usage_model,
+            constants=constants,
+            sell=args.sell)
+      except NoBreakeven:
+        print('%5d years: no breakeven' % years)
+        continue
+      print('%5d years: %10.2f part 135 hours/month (%d evaluations)' % (years, hours, evaluations))
+  else:
+    for hours, years in breakeven_years(
+        plane,
+        acquisition,
+        args.part91_hours,
+        parse_range(args.range),
+        args.target,
+        args.max_years,
+        output=args.output,
+        usage=usage_model,
+        constants=constants,
+        sell=args.sell,
+        jobs=args.jobs):
+      if years is None:
+        print('%5d hours/month: no breakeven within %d years' % (hours, args.max_years))
+      else:
+        print('%5d hours/month: %d years' % (hours, years))
+
+
+def setup_argparser_montecarlo_command(parser):
+  from skypie.grid import OUTPUTS
+  from skypie.parallel import cpu_count
+  # args:
+  #    plane [part 91 hours] [part 135 hours] [years]
+  #    da40 10 20 10
+  montecarlo_parser = parser.add_parser('montecarlo',
+      help='Simulate the distribution of outcomes under stochastic usage and costs.')
+  montecarlo_parser.set_defaults(func=montecarlo_command)
+  montecarlo_parser.add_argument('plane', choices=PLANES)
+  montecarlo_parser.add_argument('part91_hours', type=float, help='Number of part 91 hours per month (personal use.)')
+  montecarlo_parser.add_argument('part135_hours', type=float, help='Mean number of part 135 hours per month (commercial use.)')
+  montecarlo_parser.add_argument('years', type=int, help='Years of ownership.')
+  montecarlo_parser.add_argument('--paths', type=positive_int, default=10000,
+      help='Number of paths to simulate.')
+  montecarlo_parser.add_argument('--seed', type=int, default=0, help='Seed of the per-path random streams.')
+  montecarlo_parser.add_argument('--quantiles', default='5,50,95',
+      help='Comma separated percentiles to report.')
+  montecarlo_parser.add_argument('--output', choices=OUTPUTS, default='outlay')
+  montecarlo_parser.add_argument('--jobs', type=int, default=cpu_count(),
+      help='Number of processes to spread the paths across; defaults to the number of cpus.')
+  montecarlo_parser.add_argument('--hours-sd', type=float, default=0.2,
+      help='Standard deviation of the part 135 hours of each month, relative to the mean.')
+  montecarlo_parser.add_argument('--fuel-sigma', type=float, default=0.15,
+      help='Lognormal sigma of the fuel price.')
+  montecarlo_parser.add_argument('--insurance-sd', type=float, default=0.1,
+      help='Standard deviation of insurance, relative to the plane insurance.')
+  montecarlo_parser.add_argument('--overhaul-sigma', type=float, default=0.2,
+      help='Lognormal sigma of engine and prop overhaul costs.')
+
+
+def montecarlo_command(args):
+  from skypie.montecarlo import Distributions, montecarlo
+  plane = update_plane(PLANES[args.plane], args)
+  acquisition = parse_acquisition(args)
+
+  try:
+    quantiles = [float(percentile) / 100 for percentile in args.quantiles.split(',')]
+  except ValueError:
+    die('Invalid value for --quantiles: %s' % args.quantiles)
+
+  summary = montecarlo(
+      plane,
+      acquisition,
+      args.part91_hours,
+      args.part135_hours,
+      args.years,
+      paths=args.paths,
+      seed=args.seed,
+      distributions=Distributions(
+          hours_sd=args.hours_sd,
+          fuel_sigma=args.fuel_sigma,
+          insurance_sd=args.insurance_sd,
+          overhaul_sigma=args.overhaul_sigma),
+      quantiles=quantiles,
+      output=args.output,
+      usage=parse_usage_model(args),
+      constants=parse_constants(args),
+      sell=args.sell,
+      jobs=args.jobs)
+
+  print('Plane:        %s' % plane)
+  print('Acquisition:  %s' % acquisition)
+  print('Paths:        %d (seed %d)' % (summary.count, args.seed))
+  print('Mean:         %.2f' % summary.mean)
+  for quantile in summary.quantiles:
+    print('P%-11g %.2f' % (quantile.p * 100, quantile.value()))
+  print('Range:        %.2f .. %.2f' % (summary.minimum, summary.maximum))
 
 
 def setup_argparser_usagemodel(parser):
@@ -207,6 +446,13 @@ def setup_argparser_depreciation(parser):
   pass
 
 
+def positive_int(value):
+  number = int(value)
+  if number < 1:
+    raise argparse.ArgumentTypeError('must be at least 1: %s' % value)
+  return number
+
+
 class SaleAction(argparse.Action):
   def __init__(self, option_strings, dest, nargs=None, **kwargs):
     if nargs is not None:
@@ -308,6 +554,605 @@ def setup_argparser_constants_option(parser):
       help='Override a constant by setting key=value')
 
 
+def setup_argparser_cache_option(parser):
+  group = parser.add_argument_group('cache options')
+  group.add_argument('--cache-dir', default=None,
+      help='Persist table results in this directory and reuse them across invocations.')
+  group.add_argument('--cache-max-entries', type=int, default=None,
+      help='Maximum number of results kept in the --cache-dir cache; defaults to a million.')
+
+
+def parse_cache(args):
+  if args.cache_dir is None:
+    return None
+  from skypie.cache import DiskCache, DEFAULT_DISK_CACHE_ENTRIES
+  max_entries = args.cache_max_entries
+  if max_entries is None:
+    max_entries = DEFAULT_DISK_CACHE_ENTRIES
+  return DiskCache(args.cache_dir, max_entries=max_entries)
+
+
+def setup_argparser_cache_command(parser):
+  cache_parser = parser.add_parser('cache', help='Inspect or clear the --cache-dir cache.')
+  cache_parser.set_defaults(func=cache_command)
+  cache_parser.add_argument('action', choices=['stats', 'clear'])
+
+
+def cache_command(args):
+  cache = parse_cache(args)
+  if cache is None:
+    die('The cache command requires --cache-dir.')
+
+  with cache:
+    if args.action == 'clear':
+      cache.clear()
+    for key, value in sorted(cache.stats().items()):
+      print('%s = %s' % (key, value))
+
+
+def setup_argparser_bench_command(parser):
+  from skypie import bench
+  bench_parser = parser.add_parser('bench', help='Run the performance benchmark workloads.')
+  bench_parser.set_defaults(func=bench_command)
+  bench_parser.add_argument('pattern', nargs='?', default=None,
+      help='Only run workloads whose name contains this string.')
+  bench_parser.add_argument('--min-time', type=float, default=bench.DEFAULT_MIN_TIME,
+      help='Minimum number of seconds to spend measuring each workload.')
+  bench_parser.add_argument('--save', metavar='FILE', default=None,
+      help='Save the results as a JSON baseline.')
+  bench_parser.add_argument('--baseline', metavar='FILE', default=None,
+      help='Compare the results against a saved JSON baseline.')
+  bench_parser.add_argument('--tolerance', type=float, default=bench.DEFAULT_TOLERANCE,
+      help='Fraction of the baseline ops/sec a workload may lose before it is a regression.')
+
+
+def bench_command(args):
+  from skypie import bench
+  baseline = None
+  if args.baseline:
+    try:
+      baseline = bench.load(args.baseline)
+    except (IOError, ValueError) as e:
+      die('Could not load baseline: %s' % e)
+
+  def report(name, result):
+    peak = result['peak_bytes']
+    print('%-45s %12.1f ops/sec %12s peak bytes' % (name, result['ops_per_sec'], '-' if peak is None else peak))
+
+  document = bench.run(pattern=args.pattern, min_time=args.min_time, report=report)
+
+  if args.save:
+    bench.save(document, args.save)
+
+  if baseline is not None:
+    regressions = list(bench.regressions(document, baseline, tolerance=args.tolerance))
+    for name, previous, current in regressions:
+      print('REGRESSION %s: %.1f -> %.1f ops/sec' % (name, previous, current))
+    if regressions:
+      return 1
+
+
+def setup_argparser_compare_command(parser):
+  from skypie.grid import ENGINES, OUTPUTS
+  from skypie.parallel import cpu_count
+  compare_parser = parser.add_parser('compare',
+      help='Rank planes by cost over the same hours x years grid.')
+  compare_parser.set_defaults(func=compare_command)
+  compare_parser.add_argument('part91_hours', type=float, help='Number of part 91 hours per month (personal use.)')
+  compare_parser.add_argument('h_range', help='Range of part 135 hours per month.')
+  compare_parser.add_argument('y_range', help='Years of ownership, or range.')
+  compare_parser.add_argument('--planes', default=None,
+      help='Comma separated planes to compare; defaults to every plane.  Plane option '
+           'overrides do not apply, since they are specific to a plane.')
+  compare_parser.add_argument('--output', choices=OUTPUTS, default='hourly')
+  compare_parser.add_argument('--engine', choices=sorted(ENGINES), default='grid')
+  compare_parser.add_argument('--jobs', type=int, default=cpu_count(),
+      help='Number of processes to spread the planes across; defaults to the number of cpus.')
+  setup_argparser_format_option(compare_parser)
+
+
+def compare_command(args):
+  from skypie.compare import iterate_compare
+  names = sorted(PLANES) if args.planes is None else args.planes.split(',')
+  for name in names:
+    if name not in PLANES:
+      die('Unknown plane: %s' % name)
+  y_range = parse_range(args.y_range)
+  acquisition = parse_acquisition(args)
+
+  rows = iterate_compare(
+      [PLANES[name] for name in names],
+      acquisition,
+      args.part91_hours,
+      parse_range(args.h_range),
+      y_range,
+      output=args.output,
+      usage=parse_usage_model(args),
+      constants=parse_constants(args),
+      sell=args.sell,
+      engine=args.engine,
+      jobs=args.jobs)
+
+  if args.format != 'text':
+    columns = ('part135_hours', 'years', 'best', args.output, 'runner_up', 'margin')
+    with open_writer(args, columns) as writer:
+      for hours, rankings, _ in timed_rows(rows):
+        for years, ranking in zip(y_range, rankings):
+          writer.write((hours, years) + tuple(ranking))
+    return
+
+  print('Planes:       %s' % ', '.join(names))
+  print('Acquisition:  %s' % acquisition)
+  print('Each cell is the best plane and its margin over the runner up.')
+  print('%5s ' % '' + ''.join('%18d ' % years for years in y_range))
+  for hours, rankings, _ in timed_rows(rows):
+    cells = ['%5d ' % hours]
+    for ranking in rankings:
+      margin = '' if ranking.margin is None else ' +%.2f' % ranking.margin
+      cells.append('%18s ' % (ranking.best + margin))
+    print(''.join(cells))
+
+
+def setup_argparser_optimal_exit_command(parser):
+  from skypie.grid import OUTPUTS
+  from skypie.parallel import cpu_count
+  exit_parser = parser.add_parser('optimal-exit',
+      help='Find the month in which selling minimizes the cost of ownership.')
+  exit_parser.set_defaults(func=optimal_exit_command)
+  exit_parser.add_argument('plane', choices=PLANES)
+  exit_parser.add_argument('part91_hours', type=float, help='Number of part 91 hours per month (personal use.)')
+  exit_parser.add_argument('h_range', help='Range of part 135 hours per month.')
+  exit_parser.add_argument('max_years', type=int, help='Latest exit to consider, in years of ownership.')
+  exit_parser.add_argument('--output', choices=OUTPUTS, default='hourly')
+  exit_parser.add_argument('--jobs', type=int, default=cpu_count(),
+      help='Number of processes to spread the hours across; defaults to the number of cpus.')
+  setup_argparser_format_option(exit_parser)
+
+
+def optimal_exit_command(args):
+  from skypie.optimal_exit import optimal_exit
+  plane = update_plane(PLANES[args.plane], args)
+  acquisition = parse_acquisition(args)
+  if args.max_years <= 0:
+    die('max_years must be positive.')
+
+  rows = optimal_exit(
+      plane,
+      acquisition,
+      args.part91_hours,
+      parse_range(args.h_range),
+      args.max_years,
+      output=args.output,
+      usage=parse_usage_model(args),
+      constants=parse_constants(args),
+      jobs=args.jobs)
+
+  if args.format != 'text':
+    with open_writer(args, ('part135_hours', 'month', args.output)) as writer:
+      for hours, exit in timed_rows(rows):
+        writer.write((hours, exit.month, exit.value))
+    return
+
+  print('Plane:        %s' % plane)
+  print('Acquisition:  %s' % acquisition)
+  print('%5s %8s %12s' % ('', 'month', args.output))
+  for hours, exit in timed_rows(rows):
+    print('%5d %8d %12.2f   (%d years %d months)' % (
+        hours, exit.month, exit.value, exit.month // 12, exit.month % 12))
+
+
+def setup_argparser_sensitivity_command(parser):
+  from skypie.grid import OUTPUTS
+  from skypie.parallel import cpu_count
+  sensitivity_parser = parser.add_parser('sensitivity',
+      help='Rank the inputs of a scenario by how much they drive its cost.')
+  sensitivity_parser.set_defaults(func=sensitivity_command)
+  sensitivity_parser.add_argument('plane', choices=PLANES)
+  sensitivity_parser.add_argument('part91_hours', type=float, help='Number of part 91 hours per month (personal use.)')
+  sensitivity_parser.add_argument('part135_hours', type=float, help='Number of part 135 hours per month (commercial use.)')
+  sensitivity_parser.add_argument('years', type=int, help='Years of ownership.')
+  sensitivity_parser.add_argument('--delta', type=float, default=DEFAULT_DELTA,
+      help='Relative perturbation of each input, e.g. 0.1 for +/-10%%.')
+  sensitivity_parser.add_argument('--output', choices=OUTPUTS, default='outlay')
+  sensitivity_parser.add_argument('--jobs', type=int, default=cpu_count(),
+      help='Number of processes to spread the perturbations across; defaults to the number of cpus.')
+  setup_argparser_format_option(sensitivity_parser)
+
+
+def sensitivity_command(args):
+  from skypie.sensitivity import Sensitivity, sensitivity
+  plane = update_plane(PLANES[args.plane], args)
+  acquisition = parse_acquisition(args)
+
+  base_value, results = sensitivity(
+      plane,
+      acquisition,
+      args.part91_hours,
+      args.part135_hours,
+      args.years,
+      delta=args.delta,
+      output=args.output,
+      usage=parse_usage_model(args),
+      constants=parse_constants(args),
+      sell=args.sell,
+      jobs=args.jobs)
+
+  if args.format != 'text':
+    with open_writer(args, Sensitivity._fields) as writer:
+      for result in results:
+        writer.write(tuple(result))
+    return
+
+  print('Plane:        %s' % plane)
+  print('Acquisition:  %s' % acquisition)
+  print('Base %s:  %.2f' % (args.output, base_value))
+  print('')
+
+  width = 30
+  swing = max([abs(result.value_high - result.value_low) for result in results] + [0])
+  print('%-26s %12s %12s %10s  %s' % ('input', 'low', 'high', 'elasticity', 'swing'))
+  for result in results:
+    bar = ''
+    if swing > 0:
+      low = int(round(width * (result.value_low - base_value) / swing))
+      high = int(round(width * (result.value_high - base_value) / swing))
+      left, right = min(low, high, 0), max(low, high, 0)
+      bar = ' ' * (width + left) + '#' * -left + '|' + '#' * right
+    elasticity = '-' if result.elasticity is None else '%.3f' % result.elasticity
+    print('%-26s %12.2f %12.2f %10s  %s' % (
+        result.parameter, result.value_low, result.value_high, elasticity, bar))
+
+
+def setup_argparser_timeseries_command(parser):
+  timeseries_parser = parser.add_parser('timeseries',
+      help='Export monthly cash flows, asset values, loan balance and engine/prop hours.')
+  timeseries_parser.set_defaults(func=timeseries_command)
+  timeseries_parser.add_argument('plane', choices=PLANES)
+  timeseries_parser.add_argument('part91_hours', type=float, help='Number of part 91 hours per month (personal use.)')
+  timeseries_parser.add_argument('part135_hours', type=float, help='Number of part 135 hours per month (commercial use.)')
+  timeseries_parser.add_argument('years', type=int, help='Years of ownership.')
+  setup_argparser_format_option(timeseries_parser)
+
+
+def timeseries_command(args):
+  from skypie.timeseries import timeseries
+  if args.years <= 0:
+    die('years must be positive.')
+
+  series = timeseries(
+      update_plane(PLANES[args.plane], args),
+      parse_acquisition(args),
+      args.part91_hours,
+      args.part135_hours,
+      args.years,
+      usage=parse_usage_model(args),
+      constants=parse_constants(args))
+
+  if args.format != 'text':
+    with open_writer(args, series.columns) as writer:
+      for row in series.rows():
+        writer.write(row)
+    return
+
+  widths = [max(12, len(column)) for column in series.columns]
+  print(' '.join('%*s' % (width, column) for width, column in zip(widths, series.columns)))
+  for row in series.rows():
+    print(' '.join(['%*d' % (widths[0], row[0])] + [
+        '%*.2f' % (width, value) for width, value in zip(widths[1:], row[1:])]))
+
+
+def setup_argparser_optimize_financing_command(parser):
+  from skypie.grid import OUTPUTS
+  financing_parser = parser.add_parser('optimize-financing',
+      help='Search down payments, terms and lender rate quotes for the least costly financing.')
+  financing_parser.set_defaults(func=optimize_financing_command)
+  financing_parser.add_argument('plane', choices=PLANES)
+  financing_parser.add_argument('part91_hours', type=float, help='Number of part 91 hours per month (personal use.)')
+  financing_parser.add_argument('part135_hours', type=float, help='Number of part 135 hours per month (commercial use.)')
+  financing_parser.add_argument('years', type=int, help='Years of ownership.')
+  financing_parser.add_argument('--down', default='0,50,5',
+      help='Down payment percentage, or range, e.g. 0,50,5.')
+  financing_parser.add_argument('--terms', default='60,360,60',
+      help='Financing term in months, or range, e.g. 60,360,60.')
+  financing_parser.add_argument('--quote', metavar='lender=rate', action='append', default=[],
+      help='A lender rate quote, e.g. bank=6.25 for 6.25%%.  May be repeated; defaults to '
+           '--financing-rate.')
+  financing_parser.add_argument('--no-cash', dest='cash', action='store_false', default=True,
+      help='Do not consider buying all cash.')
+  financing_parser.add_argument('--top', type=int, default=10,
+      help='Number of financing variants to print; --format other than text writes all.')
+  financing_parser.add_argument('--output', choices=OUTPUTS, default='outlay')
+  setup_argparser_format_option(financing_parser)
+
+
+def optimize_financing_command(args):
+  from skypie.financing import optimize_financing, Quote
+  quotes = []
+  for quote in args.quote or ['quote=%s' % args.financing_rate]:
+    try:
+      lender, quoted_rate = quote.split('=', 1)
+      quotes.append(Quote(lender, float(quoted_rate) / 100.0))
+    except ValueError:
+      die('Invalid quote: %s' % quote)
+    if quotes[-1].rate <= 0:
+      die('Quoted rates must be positive: %s' % quote)
+
+  down_payments = [down / 100.0 for down in parse_range(args.down)]
+  terms = list(parse_range(args.terms))
+  if any(not 0 <= down <= 1 for down in down_payments) or any(term <= 0 for term in terms):
+    die('Down payments must be between 0 and 100% and terms positive.')
+
+  plane = update_plane(PLANES[args.plane], args)
+  with stats.phase('simulate'):
+    results = optimize_financing(
+        plane,
+        args.part91_hours,
+        args.part135_hours,
+        args.years,
+        quotes,
+        down_payments,
+        terms,
+        output=args.output,
+        usage=parse_usage_model(args),
+        constants=parse_constants(args),
+        sell=args.sell,
+        cash=args.cash)
+
+  def row(financing):
+    acquisition = financing.acquisition
+    down, term, quoted_rate = (
+        (acquisition.down_payment * 100, acquisition.term, acquisition.rate * 100)
+        if isinstance(acquisition, Mortgage) else (100.0, 0, 0.0))
+    return (financing.lender or 'cash', down, term, quoted_rate, financing.monthly_payment,
+            financing.interest, financing.remaining, financing.value)
+
+  if args.format != 'text':
+    columns = ('lender', 'down', 'term', 'rate', 'monthly_payment', 'interest', 'remaining',
+               args.output)
+    with open_writer(args, columns) as writer:
+      for financing in results:
+        writer.write(row(financing))
+    return
+
+  print('Plane:        %s' % plane)
+  print('Usage:        %s part 91, %s part 135 hours/month for %d years' % (
+      args.part91_hours, args.part135_hours, args.years))
+  print('Liquidation model: %s' % ('sell' if args.sell else 'keep'))
+  print('Scored %d financing variants.' % len(results))
+  print('%4s %-12s %6s %5s %6s %10s %12s %12s %14s' % (
+      '', 'lender', 'down%', 'term', 'rate%', 'payment', 'interest', 'owed', args.output))
+  for rank, financing in enumerate(results[:args.top], 1):
+    print('%4d %-12s %6.1f %5d %6.2f %10.2f %12.2f %12.2f %14.2f' % ((rank,) + row(financing)))
+
+
+def setup_argparser_fleet_command(parser):
+  fleet_parser = parser.add_parser('fleet',
+      help='Simulate a fleet of airframes, one JSON airframe per line, and report by tail.')
+  fleet_parser.set_defaults(func=fleet_command)
+  fleet_parser.add_argument('airframes', help='The airframes file, or - for stdin.')
+  fleet_parser.add_argument('years', type=int, help='Years of the fleet horizon.')
+  fleet_parser.add_argument('--shared', metavar='name=yearly', action='append', default=[],
+      help='A yearly cost shared by the fleet, e.g. hangar=24000.  May be repeated.')
+  setup_argparser_format_option(fleet_parser)
+
+
+def fleet_command(args):
+  from skypie.fleet import read_airframes, SharedCost, simulate_fleet
+  shared_costs = []
+  for shared in args.shared:
+    try:
+      name, yearly = shared.split('=', 1)
+      shared_costs.append(SharedCost(name, float(yearly)))
+    except ValueError:
+      die('Invalid shared cost: %s' % shared)
+
+  try:
+    fp = sys.stdin if args.airframes == '-' else open(args.airframes)
+  except IOError as e:
+    die('Could not open airframes: %s' % e)
+
+  try:
+    with fp:
+      ledger = simulate_fleet(
+          list(read_airframes(fp)),
+          args.years,
+          shared_costs=shared_costs,
+          constants=parse_constants(args),
+          sell=args.sell)
+  except ValueError as e:
+    die(str(e))
+
+  # a sale is booked at the end of the horizon, i.e. in the year after its last
+  years = range(args.years + (1 if args.sell else 0))
+  columns = ('tail', 'year') + tuple(klazz.__name__.lower() for klazz in CATEGORIES) + ('profit',)
+
+  def rows():
+    for tail in ledger.tails + [None]:
+      for year in list(years) + [None]:
+        kw = {} if year is None else dict(year=year)
+        yield ((tail, year) +
+               tuple(ledger.sum(tail=tail, item_klazz=klazz, **kw) for klazz in CATEGORIES) +
+               (ledger.profit(tail=tail, **kw),))
+
+  if args.format != 'text':
+    with open_writer(args, columns) as writer:
+      for row in rows():
+        writer.write(row)
+    return
+
+  print('%-10s %5s' % columns[:2] + ''.join(' %12s' % column for column in columns[2:]))
+  for row in rows():
+    tail, year = row[:2]
+    print('%-10s %5s' % ('fleet' if tail is None else tail, 'all' if year is None else year) +
+          ''.join(' %12.2f' % value for value in row[2:]))
+
+
+def setup_argparser_repl_command(parser):
+  from skypie.grid import OUTPUTS
+  repl_parser = parser.add_parser('repl',
+      help='Edit the inputs of a table one at a time, re-rendering it after each edit.')
+  repl_parser.set_defaults(func=repl_command)
+  repl_parser.add_argument('plane', choices=PLANES)
+  repl_parser.add_argument('part91_hours', type=float, help='Number of part 91 hours per month (personal use.)')
+  repl_parser.add_argument('h_range', help='Range of part 135 hours per month.')
+  repl_parser.add_argument('y_range', help='Years of ownership, or range.')
+  repl_parser.add_argument('--output', choices=OUTPUTS, default='hourly')
+
+
+def parse_repl_value(name, value):
+  from skypie.grid import OUTPUTS
+  from skypie.batch import Parser
+  if name in ('hours', 'years'):
+    try:
+      value = json.loads(value)
+    except ValueError:
+      pass
+    return Parser.values(value)
+  if name == 'output':
+    if value not in OUTPUTS:
+      raise ValueError('Unknown output %s' % value)
+    return value
+  return json.loads(value)
+
+
+def repl_command(args):
+  from skypie import incremental
+  session = incremental.session(
+      update_plane(PLANES[args.plane], args),
+      parse_acquisition(args),
+      args.part91_hours,
+      parse_range(args.h_range),
+      parse_range(args.y_range),
+      output=args.output,
+      usage=parse_usage_model(args),
+      constants=parse_constants(args),
+      sell=args.sell)
+
+  def render():
+    start = time.time()
+    rows = session.rows()
+    elapsed = time.time() - start
+    scenario = session.scenario
+    tabulator.header(scenario.plane, scenario.acquisition, scenario.y_range)
+    for hours, rates in rows:
+      sys.stdout.write(tabulator.format_row(hours, rates))
+    sys.stdout.flush()
+    print('%.1fms, recomputed: %s' % (
+        elapsed * 1000, ', '.join(sorted(set(session.recomputed))) or 'nothing'), file=sys.stderr)
+
+  render()
+  interactive = sys.stdin.isatty()
+  while True:
+    if interactive:
+      sys.stdout.write('skypie> ')
+      sys.stdout.flush()
+    line = sys.stdin.readline()
+    if not line:
+      break
+    line = line.strip()
+    if not line or line.startswith('#'):
+      continue
+    if line in ('quit', 'exit'):
+      break
+    if line == 'show':
+      render()
+      continue
+    if line == 'fields':
+      for name, value in session.fields():
+        print('%-28s %s' % (name, value))
+      continue
+    name, equals, value = line.partition('=')
+    if not equals:
+      print('Expected name=value, fields, show or quit.', file=sys.stderr)
+      continue
+    try:
+      session.set(name.strip(), parse_repl_value(name.strip(), value.strip()))
+    except KeyError as e:
+      print(e.args[0], file=sys.stderr)
+      continue
+    except ValueError as e:
+      print('Invalid value for %s: %s' % (name.strip(), e), file=sys.stderr)
+      continue
+    render()
+
+
+def setup_argparser_serve_command(parser):
+  from skypie.parallel import cpu_count
+  serve_parser = parser.add_parser('serve',
+      help='Serve the table, sample, breakeven and compare models over HTTP/JSON.')
+  serve_parser.set_defaults(func=serve_command)
+  serve_parser.add_argument('--host', default='127.0.0.1', help='The address to listen on.')
+  serve_parser.add_argument('--port', type=int, default=8080, help='The port to listen on.')
+  serve_parser.add_argument('--jobs', type=int, default=cpu_count(),
+      help='Number of worker processes computing requests; defaults to the number of cpus.')
+  serve_parser.add_argument('--results', type=int, default=1024,
+      help='Number of recent responses kept in memory.')
+
+
+def serve_command(args):
+  # The server is built on asyncio, so it is imported only when serving.
+  try:
+    from skypie.server import serve
+  except SyntaxError:
+    die('skypie serve requires python 3.')
+
+  def ready(sockets):
+    for sock in sockets:
+      print('Serving on http://%s:%d' % sock.getsockname()[:2], file=sys.stderr)
+
+  serve(host=args.host, port=args.port, jobs=args.jobs, results=args.results, ready=ready)
+
+
+def setup_argparser_batch_command(parser):
+  from skypie.parallel import cpu_count
+  batch_parser = parser.add_parser('batch',
+      help='Evaluate a file of JSON scenarios, one per line, streaming JSON lines results.')
+  batch_parser.set_defaults(func=batch_command)
+  batch_parser.add_argument('scenarios', help='The scenarios file, or - for stdin.')
+  batch_parser.add_argument('--jobs', type=int, default=cpu_count(),
+      help='Number of processes to spread the scenarios across; defaults to the number of cpus.')
+
+
+def batch_command(args):
+  from skypie import batch
+  try:
+    fp = sys.stdin if args.scenarios == '-' else open(args.scenarios)
+  except IOError as e:
+    die('Could not open scenarios: %s' % e)
+
+  errors = 0
+  with fp:
+    for record in batch.run(fp, jobs=args.jobs):
+      errors += 'error' in record
+      sys.stdout.write(json.dumps(record))
+      sys.stdout.write('\n')
+
+  if errors:
+    return 1
+
+
+def setup_argparser_profile_option(parser):
+  group = parser.add_argument_group('profiling options')
+  group.add_argument('--profile', metavar='FILE', default=None,
+      help='Profile the command with cProfile and write pstats output to FILE.')
+  group.add_argument('--stats', action='store_true', default=False,
+      help='Print a summary of work counters and phase timings to stderr on exit.')
+  group.add_argument('--timing', action='store_true', default=False,
+      help='Print the time spent importing, parsing arguments and running the command '
+           'to stderr on exit.')
+
+
+def run_command(args):
+  if args.profile:
+    import cProfile
+    profiler = cProfile.Profile()
+    try:
+      return profiler.runcall(args.func, args)
+    finally:
+      profiler.dump_stats(args.profile)
+  return args.func(args)
+
+
 def die(error):
   print(error, file=sys.stderr)
   sys.exit(1)
@@ -326,7 +1171,35 @@ def parse_range(range_string):
     die('Invalid number or range string: %s' % range_string)
 
 
+def timing_report(started, imported, parsed, finished):
+  lines = [
+    ('imports', imported - started),
+    ('arguments', parsed - imported),
+    ('command', finished - parsed),
+    ('total', finished - started),
+  ]
+  return '\n'.join(
+      ['%-28s %.1fms' % ('startup %s:' % name, elapsed * 1000) for name, elapsed in lines] +
+      ['%-28s %d' % ('modules loaded:', len(sys.modules))])
+
+
 def main():
-  parser = setup_argparser()
-  args = parser.parse_args()
-  sys.exit(args.func(args))
+  imported = timeit.default_timer()
+  with stats.phase('setup'):
+    parser = setup_argparser(sys.argv[1:])
+    args = parser.parse_args()
+  parsed = timeit.default_timer()
+  try:
+    result = run_command(args)
+  except IOError as e:
+    if e.errno != errno.EPIPE:
+      raise
+    # The reader of our output went away, e.g. `skypie table ... | head`.
+    os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+    result = 1
+  finally:
+    if args.stats or args.profile:
+      print(stats.summary(), file=sys.stderr)
+    if args.timing:
+      print(timing_report(STARTED, imported, parsed, timeit.default_timer()), file=sys.stderr)
+  sys.exit(result)
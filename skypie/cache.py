@@ -0,0 +1,338 @@
+"""Scenario fingerprints and result caches.
+
+A fingerprint is a canonical, hashable rendering of the inputs of a model run:
+planes, acquisitions, usage models and constants are reduced to nested tuples
+of their class names and attributes, so equal scenarios built from distinct
+objects share a cache entry.
+"""
+
+from collections import OrderedDict
+import os
+import time
+
+from .balance import Balance
+from .constants import CONSTANTS
+from .model import simple, UsageModel
+
+
+DEFAULT_CACHE_SIZE = 4096
+DEFAULT_DISK_CACHE_ENTRIES = 1000000
+DEFAULT_COMMIT_INTERVAL = 1.0  # seconds
+DEFAULT_LOCK_TIMEOUT = 5.0  # seconds
+
+# Modules whose source determines the value of a cached result.
+MODEL_MODULES = (
+    'acquisition.py',
+    'balance.py',
+    'common.py',
+    'depreciation.py',
+    'events.py',
+    'grid.py',
+    'model.py',
+)
+
+try:
+  SCALARS = (bool, int, long, float, str, unicode)
+except NameError:  # python 3
+  SCALARS = (bool, int, float, str)
+
+
+def fingerprint(value):
+  """Return a canonical, hashable representation of ``value``."""
+  if value is None or isinstance(value, SCALARS):
+    return value
+  if isinstance(value, type):
+    return ('type', '%s.%s' % (value.__module__, value.__name__))
+  if isinstance(value, dict):
+    return ('dict', tuple(sorted((key, fingerprint(val)) for key, val in value.items())))
+  if isinstance(value, tuple) and hasattr(value, '_fields'):
+    return (value.__class__.__name__, tuple(fingerprint(val) for val in value))
+  if isinstance(value, (list, tuple)):
+    return tuple(fingerprint(val) for val in value)
+  if hasattr(value, '__dict__'):
+    return (value.__class__.__name__, fingerprint(vars(value)))
+  raise TypeError('Cannot fingerprint %r' % (value,))
+
+
+def scenario_fingerprint(
+    plane,
+    acquisition,
+    part91_hours_per_month,
+    part135_hours_per_month,
+    ownership_years,
+    usage=UsageModel(),
+    constants=CONSTANTS,
+    sell=False,
+    **kw):
+  """Fingerprint the arguments of a ``simple`` run; extra keywords are included."""
+  return fingerprint((
+      plane,
+      acquisition,
+      part91_hours_per_month,
+      part135_hours_per_month,
+      ownership_years,
+      usage,
+      constants,
+      bool(sell),
+      kw,
+  ))
+
+
+class LRUCache(object):
+  """A size bounded least-recently-used mapping with hit/miss counters."""
+
+  MISSING = object()
+
+  def __init__(self, maxsize=DEFAULT_CACHE_SIZE):
+    self.maxsize = maxsize
+    self.hits = self.misses = 0
+    self._entries = OrderedDict()
+
+  def __len__(self):
+    return len(self._entries)
+
+  def __contains__(self, key):
+    return key in self._entries
+
+  def get(self, key, default=None):
+    try:
+      value = self._entries.pop(key)
+    except KeyError:
+      self.misses += 1
+      return default
+    self._entries[key] = value
+    self.hits += 1
+    return value
+
+  def put(self, key, value):
+    self._entries.pop(key, None)
+    self._entries[key] = value
+    self._evict()
+
+  def resize(self, maxsize):
+    self.maxsize = maxsize
+    self._evict()
+
+  def clear(self):
+    self._entries.clear()
+    self.hits = self.misses = 0
+
+  def _evict(self):
+    while len(self._entries) > self.maxsize:
+      self._entries.popitem(last=False)
+
+  def stats(self):
+    return dict(size=len(self._entries), maxsize=self.maxsize, hits=self.hits, misses=self.misses)
+
+
+# Memoized balance sheets of cached_simple, and memoized table cells of iterate_grid,
+# for long-lived callers such as the server.
+SIMPLE_CACHE = LRUCache()
+GRID_CACHE = LRUCache(maxsize=DEFAULT_CACHE_SIZE * 16)
+
+
+def cached_simple(
+    plane,
+    acquisition,
+    part91_hours_per_month,
+    part135_hours_per_month,
+    ownership_years,
+    usage=UsageModel(),
+    constants=CONSTANTS,
+    sell=False,
+    ledger=Balance,
+    cache=SIMPLE_CACHE):
+  """``simple``, memoized in ``cache`` by scenario fingerprint.
+
+  The balance sheet is shared between callers with the same scenario and must not
+  be modified; fork() it first if it needs to be extended.
+  """
+  key = scenario_fingerprint(
+      plane,
+      acquisition,
+      part91_hours_per_month,
+      part135_hours_per_month,
+      ownership_years,
+      usage=usage,
+      constants=constants,
+      sell=sell,
+      ledger=ledger)
+  balance = cache.get(key, LRUCache.MISSING)
+  if balance is LRUCache.MISSING:
+    balance = simple(
+        plane,
+        acquisition,
+        part91_hours_per_month,
+        part135_hours_per_month,
+        ownership_years,
+        usage=usage,
+        constants=constants,
+        sell=sell,
+        ledger=ledger)
+    cache.put(key, balance)
+  return balance
+
+
+_MODEL_VERSION = None
+
+
+def model_version():
+  """A hash of the source of the modules that compute cached results."""
+  global _MODEL_VERSION
+  if _MODEL_VERSION is None:
+    import hashlib
+    import pkgutil
+    digest = hashlib.sha1()
+    for module in MODEL_MODULES:
+      digest.update(pkgutil.get_data('skypie', module))
+    _MODEL_VERSION = digest.hexdigest()
+  return _MODEL_VERSION
+
+
+class DiskCache(object):
+  """A size bounded, persistent cache of numeric results in a SQLite database.
+
+  Keys are fingerprints (see fingerprint); entries are stored under a digest of
+  the key and the model version, so results computed by a different version of
+  the model are never returned and are evicted first.  Entries beyond
+  ``max_entries`` are evicted least recently used first.
+
+  Several processes may share a cache.  Reads never write: new results and
+  access times are buffered and written in one short transaction at most every
+  ``commit_interval`` seconds, and by flush() or close().  The database is in
+  WAL mode, so readers are not blocked by a writer, and a database still locked
+  after ``timeout`` seconds is treated as a miss, or its writes retried later.
+  """
+
+  FILENAME = 'skypie.db'
+
+  def __init__(
+      self,
+      cache_dir,
+      max_entries=DEFAULT_DISK_CACHE_ENTRIES,
+      commit_interval=DEFAULT_COMMIT_INTERVAL,
+      timeout=DEFAULT_LOCK_TIMEOUT):
+    # Imported here rather than at startup, which most commands never need them for.
+    import hashlib
+    import sqlite3
+    self._sha1 = hashlib.sha1
+    self._error = sqlite3.OperationalError
+    if not os.path.isdir(cache_dir):
+      os.makedirs(cache_dir)
+    self.path = os.path.join(cache_dir, self.FILENAME)
+    self.max_entries = max_entries
+    self.commit_interval = commit_interval
+    self.version = model_version()
+    self.hits = self.misses = 0
+    self._puts = {}
+    self._accessed = {}
+    self._committed = time.time()
+    self._db = sqlite3.connect(self.path, timeout=timeout)
+    self._db.execute('PRAGMA journal_mode=WAL')
+    self._db.execute(
+        'CREATE TABLE IF NOT EXISTS results '
+        '(key TEXT PRIMARY KEY, version TEXT, value REAL, accessed INTEGER)')
+    self._db.execute('CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)')
+    self._db.commit()
+    self._clock, = self._db.execute('SELECT COALESCE(MAX(accessed), 0) FROM results').fetchone()
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exc_type, exc_value, traceback):
+    self.close()
+
+  def __len__(self):
+    count, = self._db.execute('SELECT COUNT(*) FROM results').fetchone()
+    return count
+
+  def _digest(self, key):
+    return self._sha1((self.version + repr(key)).encode('utf-8')).hexdigest()
+
+  def _tick(self):
+    self._clock += 1
+    return self._clock
+
+  def get(self, key, default=None):
+    digest = self._digest(key)
+    if digest in self._puts:
+      row = self._puts[digest]
+    else:
+      try:
+        row = self._db.execute('SELECT value FROM results WHERE key = ?', (digest,)).fetchone()
+      except self._error:
+        row = None
+    if row is None:
+      self.misses += 1
+      return default
+    self._accessed[digest] = self._tick()
+    self.hits += 1
+    self._maybe_commit()
+    return row[0]
+
+  def put(self, key, value):
+    digest = self._digest(key)
+    self._accessed.pop(digest, None)
+    self._puts[digest] = (value, self._tick())
+    self._maybe_commit()
+
+  def _maybe_commit(self):
+    if time.time() - self._committed >= self.commit_interval:
+      self.commit()
+
+  def commit(self, evict=False):
+    """Write the buffered results and access times; return False if the database was locked."""
+    self._committed = time.time()
+    try:
+      self._db.executemany(
+          'INSERT OR REPLACE INTO results (key, version, value, accessed) VALUES (?, ?, ?, ?)',
+          ((digest, self.version, value, accessed)
+           for digest, (value, accessed) in self._puts.items()))
+      self._db.executemany(
+          'UPDATE results SET accessed = ? WHERE key = ?',
+          ((accessed, digest) for digest, accessed in self._accessed.items()))
+      if evict:
+        self.evict()
+      self._db.commit()
+    except self._error:
+      self._db.rollback()
+      return False
+    self._puts.clear()
+    self._accessed.clear()
+    return True
+
+  def evict(self):
+    self._db.execute('DELETE FROM results WHERE version != ?', (self.version,))
+    excess = len(self) - self.max_entries
+    if excess > 0:
+      self._db.execute(
+          'DELETE FROM results WHERE key IN '
+          '(SELECT key FROM results ORDER BY accessed LIMIT ?)', (excess,))
+
+  def flush(self):
+    return self.commit(evict=True)
+
+  def clear(self):
+    self._puts.clear()
+    self._accessed.clear()
+    self._db.execute('DELETE FROM results')
+    self._db.commit()
+    self._db.execute('VACUUM')
+    self.hits = self.misses = 0
+
+  def close(self):
+    self.flush()
+    self._db.close()
+
+  def stats(self):
+    stale, = self._db.execute(
+        'SELECT COUNT(*) FROM results WHERE version != ?', (self.version,)).fetchone()
+    return dict(
+        path=self.path,
+        bytes=os.path.getsize(self.path),
+        size=len(self),
+        stale=stale,
+        maxsize=self.max_entries,
+        version=self.version,
+        hits=self.hits,
+        misses=self.misses)
@@ -1,7 +1,7 @@
-from colors import blue, green, red
-
-
 def breakeven(low_watermark, high_watermark):
+  # colors is imported only once colorized output is rendered.
+  from colors import blue, green, red
+
   def colorant(amount):
     if amount < low_watermark:
       return red
@@ -1,10 +1,49 @@
+from array import array
 from collections import namedtuple
+import itertools
 
 
 class Meterable(object):
+  # yields (principal, interest) tuples, one per month
   def iterate_values(self):
     pass
 
+  def cumulative(self, start, stop):
+    """Return the (principal, interest) sums over months [start, stop)."""
+    principal = interest = 0
+    for p, i in itertools.islice(self.iterate_values(), start, stop):
+      principal += p
+      interest += i
+    return principal, interest
+
+  def interest(self, start, stop):
+    """The interest paid over months [start, stop)."""
+    return self.cumulative(start, stop)[1]
+
+  def end(self):
+    """The first month after which every value is zero, or None if unknown."""
+    return None
+
+  def payment(self, month):
+    """Return the (principal, interest) of ``month``."""
+    return next(itertools.islice(self.iterate_values(), month, None))
+
+  def remaining(self, month):
+    """The principal still owed at the start of ``month``."""
+    remaining = 0
+    for principal, _ in itertools.islice(self.iterate_values(), month, None):
+      remaining += principal
+      if principal == 0:
+        return remaining
+
+  def schedule(self, months):
+    """Return (principal, interest) arrays of the first ``months`` months."""
+    principal, interest = array('d'), array('d')
+    for p, i in itertools.islice(self.iterate_values(), months):
+      principal.append(p)
+      interest.append(i)
+    return principal, interest
+
 
 class Acquisition(object):
   # produces a Meterable whose iterate_values yields (P, i) tuples
@@ -14,9 +53,27 @@ class Acquisition(object):
 
 class DepreciationModel(Meterable):
   # yields %ages that represent percent of original price
+  #
+  # at(month) is the value after ``month`` months (month >= 1), i.e. the month-th
+  # value yielded by iterate_values.  Subclasses with a closed form override at
+  # and curve; the defaults walk the generator.
+  @classmethod
+  def check_month(cls, month):
+    if month < 1:
+      raise IndexError('Depreciation is only defined after the first month.')
+
   def at(self, month):
-    _, depreciation = list(zip(range(month), self.iterate_values()))[-1]
-    return depreciation
+    self.check_month(month)
+    return next(itertools.islice(self.iterate_values(), month - 1, None))
+
+  def curve(self, months):
+    """Return [self.at(month) for month in months], walking iterate_values at most once."""
+    months = list(months)
+    if not months:
+      return []
+    self.check_month(min(months))
+    values = list(itertools.islice(self.iterate_values(), max(months)))
+    return [values[month - 1] for month in months]
 
 
 Performance = namedtuple('Performance', ('ktas', 'gph'))
@@ -0,0 +1,86 @@
+"""Rank several planes over the same hours x years grid.
+
+Every plane's grid is evaluated by the engines of ``skypie.grid``, but the
+batches of all planes are interleaved into a single task stream for the worker
+pool, so comparing N planes keeps every worker busy rather than running N
+sweeps one after the other.  Rows are yielded as soon as every plane has
+finished them.
+"""
+
+from collections import namedtuple
+
+from .constants import CONSTANTS
+from .grid import DEFAULT_BATCH_SIZE, ENGINES, rate
+from .model import UsageModel
+from .parallel import imap, partition
+
+
+Ranking = namedtuple('Ranking', ('best', 'value', 'runner_up', 'margin'))
+
+
+def rank(names, values):
+  """Return the Ranking of planes ``names`` by ``values``, higher being better.
+
+  With a single plane there is no runner up and the margin is None.
+  """
+  ordered = sorted(zip(values, names), key=lambda pair: -pair[0])
+  (value, best), rest = ordered[0], ordered[1:]
+  if not rest:
+    return Ranking(best, value, None, None)
+  runner_up_value, runner_up = rest[0]
+  return Ranking(best, value, runner_up, value - runner_up_value)
+
+
+def _compare_rows(state, task):
+  index, h_batch = task
+  return ENGINES[state['engine']](state['planes'][index], h_batch)
+
+
+def iterate_compare(
+    planes,
+    acquisition,
+    part91_hours,
+    h_range,
+    y_range,
+    output='hourly',
+    usage=UsageModel(),
+    constants=CONSTANTS,
+    sell=False,
+    batch_size=DEFAULT_BATCH_SIZE,
+    engine='grid',
+    jobs=1):
+  """Yield (hours, rankings, values) for each hours value in ``h_range``, in order.
+
+  ``rankings`` holds a Ranking per years value in ``y_range``, and ``values``
+  maps each plane name to its row of ``output`` rates.
+  """
+  planes = list(planes)
+  h_range, y_range = list(h_range), list(y_range)
+  names = [plane.name for plane in planes]
+
+  states = [
+      dict(
+          plane=plane,
+          acquisition=acquisition,
+          part91_hours=part91_hours,
+          y_range=y_range,
+          usage=usage,
+          constants=constants,
+          sell=sell)
+      for plane in planes]
+
+  batches = partition(h_range, jobs, batch_size)
+  tasks = [(index, h_batch) for h_batch in batches for index in range(len(planes))]
+  results = imap(_compare_rows, tasks, state=dict(planes=states, engine=engine), jobs=jobs)
+
+  for h_batch in batches:
+    rows_by_plane = [next(results) for _ in planes]
+    for offset, hours in enumerate(h_batch):
+      values = dict(
+          (name, [rate(value, output, part91_hours, years)
+                  for years, value in zip(y_range, rows[offset])])
+          for name, rows in zip(names, rows_by_plane))
+      rankings = [
+          rank(names, [values[name][column] for name in names])
+          for column in range(len(y_range))]
+      yield hours, rankings, values
@@ -8,3 +8,6 @@ CONSTANTS = dict(
   gas_jet_a = 4.50,
   gas_mogas = 3.75,
 )
+
+# Relative perturbation of each input by sensitivity analysis, e.g. 0.1 for +/-10%.
+DEFAULT_DELTA = 0.1
@@ -1,4 +1,6 @@
+from functools import reduce
 import math
+import operator
 
 from .common import DepreciationModel
 
@@ -11,6 +13,13 @@ class FixedDepreciation(DepreciationModel):
     while True:
       yield self.percent
 
+  def at(self, month):
+    self.check_month(month)
+    return self.percent
+
+  def curve(self, months):
+    return [self.at(month) for month in months]
+
   def __str__(self):
     return 'Fixed depreciation of %.2f%%' % (self.percent * 100)
 
@@ -24,13 +33,28 @@ class ExponentialDepreciation(DepreciationModel):
     self.amount = amount
     self.rate = rate
 
+  @property
+  def exponent(self):
+    return math.exp(math.log(1 + self.amount) / self.rate)
+
   def iterate_values(self):
     x = 1.0
-    exponent = math.exp(math.log(1 + self.amount) / self.rate)
+    exponent = self.exponent
     while True:
       x /= exponent
       yield x
 
+  def at(self, month):
+    self.check_month(month)
+    return self.exponent ** -month
+
+  def curve(self, months):
+    months = list(months)
+    if months:
+      self.check_month(min(months))
+    exponent = self.exponent
+    return [exponent ** -month for month in months]
+
   def __str__(self):
     return '%.2f%% per %d months' % (self.amount * 100, self.rate)
 
@@ -45,6 +69,16 @@ class LinearDepreciation(DepreciationModel):
     while True:
       yield 0
 
+  def at(self, month):
+    # the first month yields the full value
+    self.check_month(month)
+    if month > self.months:
+      return 0
+    return 1.0 * (self.months - month + 1) / self.months
+
+  def curve(self, months):
+    return [self.at(month) for month in months]
+
   def __str__(self):
     return 'Fixed %d month useful life.' % self.months
 
@@ -59,5 +93,14 @@ class DepreciationCombinator(DepreciationModel):
     while True:
       yield reduce(float.__mul__, [next(dm_iter) for dm_iter in dm_iters])
 
+  def at(self, month):
+    return reduce(operator.mul, [model.at(month) for model in self.dms], 1.0)
+
+  def curve(self, months):
+    months = list(months)
+    return [
+        reduce(operator.mul, values, 1.0)
+        for values in zip(*[model.curve(months) for model in self.dms])]
+
   def __str__(self):
     return 'Blended depreciation: %s' % (' + '.join(map(str, (dm for dm in self.dms))))
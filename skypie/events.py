@@ -0,0 +1,270 @@
+"""Event-driven simulation of the ``simple`` model.
+
+Most months of ownership are identical: the same fuel, revenue and salary flows.
+The months that differ are those with an event -- the start of a tax year, an
+engine or prop overhaul, an annual or 100 hour inspection, or the end of the
+loan.  This engine books the recurring flows of the whole gap before the next
+event in closed form, and only steps through the events themselves, so a
+simulation costs O(events) balance sheet entries rather than O(months).
+
+Overhauls and inspections fall in the months found by ``timeline``, also in
+closed form: inspections recur with a fixed period, and ``crossings`` jumps an
+engine or prop counter straight to its next overhaul with exact float
+arithmetic, so that hours landing exactly on a TBO multiple overhaul in the same
+month as in ``simple``.  Finding them costs O(events), too.  The resulting balance
+sheet books each gap's recurring flows as one entry per category at the start
+of the gap.  Gaps never span a year boundary, so per-year selections and
+``tax_adjusted_profit`` agree with ``simple``.
+"""
+
+import math
+
+from . import stats
+from .balance import (
+    Asset,
+    Balance,
+    CapEx,
+    Depreciation,
+    Hobby,
+    Income,
+    OpEx,
+)
+from .constants import CONSTANTS
+from .depreciation import LinearDepreciation
+from .model import liquidate, UsageModel
+
+
+NEVER = float('inf')
+
+# Timeline events
+ENGINE_OVERHAUL, PROP_OVERHAUL, INSPECTION = 1, 2, 4
+
+
+def _replay(hours, deltas, limit, months):
+  crossed = []
+  for month in range(months):
+    for delta in deltas:
+      hours += delta
+    if hours > limit:
+      hours -= limit
+      crossed.append(month)
+  return crossed
+
+
+def _uniform_months(hours, deltas, limit, remaining):
+  """Return (months, step) over which ``hours`` rises by the same ``step`` every month.
+
+  A float within [2**(e-1), 2**e) is a whole number of ulps 2**(e-53), so adding
+  a delta to it adds the delta rounded to a whole number of ulps, for as long as
+  the sum stays below 2**e.  The months, at most ``remaining``, are those that
+  keep the sum below 2**e and at most ``limit``.  Returns None where no month
+  qualifies, or where a delta lies halfway between two whole numbers of ulps and
+  so rounds by the parity of ``hours``.
+  """
+  if not hours > 0:
+    return None
+  _, exponent = math.frexp(hours)
+  if exponent < -900:
+    return None
+  ulp = math.ldexp(1.0, exponent - 53)
+  ulps = 0
+  for delta in deltas:
+    if delta < 0:
+      return None
+    whole, rest = divmod(delta, ulp)
+    if rest * 2 == ulp:
+      return None
+    ulps += int(whole) + (1 if rest * 2 > ulp else 0)
+  start = int(hours / ulp)
+  ceiling = min(2 ** 53 - 1, int(math.floor(limit / ulp)))
+  if ulps == 0:
+    return (remaining, 0.0) if start <= ceiling else None
+  months = min(remaining, (ceiling - start) // ulps)
+  return (months, ulps * ulp) if months > 0 else None
+
+
+def crossings(start, deltas, limit, months):
+  """Return the months, of the first ``months``, in which an hours counter passes ``limit``.
+
+  The counter starts at ``start``, has each of ``deltas`` added to it every
+  month and drops by ``limit`` in a month that it exceeds it, exactly as
+  ``simple`` tracks engine and prop hours against their TBO in floats.  Rather
+  than add month by month, the counter jumps in integer multiples of its ulp
+  across the months where every float sum rounds the same way, and only steps
+  through the months where it reaches a new power of two, a rounding tie or
+  ``limit``.  That is a handful of steps per event, independent of the months
+  between them, and ties fall exactly where ``simple`` puts them.
+  """
+  hours = start
+  crossed = []
+  month = 0
+  while month < months:
+    uniform = _uniform_months(hours, deltas, limit, months - month)
+    if uniform is not None:
+      count, step = uniform
+      hours += count * step
+      month += count
+      continue
+    for delta in deltas:
+      hours += delta
+    if hours > limit:
+      hours -= limit
+      crossed.append(month)
+    month += 1
+  return crossed
+
+
+def inspection_period(per_month_hours):
+  """The months from one annual or 100 hour inspection to the next.
+
+  Both counters restart at every inspection, so inspections recur with a fixed
+  period, found by summing hours as ``simple`` does.
+  """
+  hours = 0
+  for period in range(1, 12):
+    hours += per_month_hours
+    if hours >= 100:
+      return period
+  return 12
+
+
+def inspection_months(per_month_hours, months):
+  """Return the months, of the first ``months``, with an annual or 100 hour inspection."""
+  period = inspection_period(per_month_hours)
+  return range(period - 1, months, period)
+
+
+def timeline(plane, tach_deltas, per_month_hours, months):
+  """Return a mapping of the months of the first ``months`` with an event to their events.
+
+  ``tach_deltas`` are the tach hours added to the engine and prop each month,
+  in the order ``simple`` adds them, so that overhauls and inspections fall in
+  exactly the same months.
+  """
+  events = {}
+  for event, event_months in (
+      (ENGINE_OVERHAUL, crossings(plane.engine.smoh, tach_deltas, plane.engine.tbo, months)),
+      (PROP_OVERHAUL, crossings(plane.prop.spoh, tach_deltas, plane.prop.tbo, months)),
+      (INSPECTION, inspection_months(per_month_hours, months))):
+    for month in event_months:
+      events[month] = events.get(month, 0) | event
+  return events
+
+
+def event_driven(
+    plane,
+    acquisition,
+    part91_hours_per_month,
+    part135_hours_per_month,
+    ownership_years,
+    usage=UsageModel(),
+    constants=CONSTANTS,
+    sell=False,
+    ledger=Balance):
+  """Equivalent to ``simple``, but jumps between cash flow events instead of stepping months."""
+
+  assert ownership_years > 0
+  ownership_months = ownership_years * 12
+
+  meterable = acquisition.get(plane.price)
+  loan_end = meterable.end()
+
+  yearly_costs = (
+      plane.insurance +
+      plane.price * constants['property_tax'] +
+      plane.yearly_costs
+  )
+
+  hourly_costs = plane.performance.gph * constants[plane.engine.fuel]
+
+  balance = ledger()
+  depreciations = {}
+
+  def depreciate(year, amount):
+    depreciations.setdefault(year, []).append(amount)
+
+  balance += Asset(plane.price, plane.depreciation, value=plane.value)
+  depreciation_value = plane.price - plane.price * plane.depreciation.at(ownership_months)
+  for year in range(ownership_years):
+    depreciate(year, 1.0 * depreciation_value / ownership_years)
+
+  for upgrade in plane.upgrades:
+    balance += CapEx(upgrade.price)
+    balance += Asset(upgrade.price, upgrade.depreciation)
+    depreciation_value = upgrade.price - upgrade.price * upgrade.depreciation.at(ownership_months)
+    for year in range(ownership_years):
+      depreciate(year, 1.0 * depreciation_value / ownership_years)
+
+  balance += OpEx(plane.price * constants['use_tax'])
+
+  per_month_hours = 1. * (part91_hours_per_month + part135_hours_per_month)
+  per_year_hours = per_month_hours * 12
+  per_month_hobby = hourly_costs * part91_hours_per_month
+  per_month_opex = hourly_costs * part135_hours_per_month
+  per_month_income = usage.revenue * part135_hours_per_month
+  per_month_salary = usage.salary * part135_hours_per_month
+
+  events = timeline(
+      plane,
+      [1. * part91_hours_per_month / usage.hobbs_ratio,
+       1. * part135_hours_per_month / usage.hobbs_ratio],
+      per_month_hours,
+      ownership_months)
+  event_months = iter(sorted(events))
+  next_event = next(event_months, NEVER)
+
+  month = steps = 0
+  while month < ownership_months:
+    if month % 12 == 0:
+      balance.add(OpEx(yearly_costs), month=month)
+      for depreciation in depreciations.pop(month // 12, []):
+        balance.add(Depreciation(depreciation), month=month)
+
+    stop = min(
+        (month // 12 + 1) * 12,
+        next_event + 1,
+        loan_end if loan_end is not None and loan_end > month else NEVER)
+    gap = stop - month
+    last = stop - 1
+
+    # One entry per category, skipping those with nothing to book.
+    principal, interest = meterable.cumulative(month, stop)
+    for item in (
+        CapEx(principal),
+        OpEx(interest + (per_month_opex + per_month_salary) * gap),
+        Hobby(per_month_hobby * gap),
+        Income(per_month_income * gap)):
+      if item.value:
+        balance.add(item, month=month)
+
+    if last == next_event:
+      # Overhauls are capital expenditures depreciated over the useful life; see simple.
+      for event, component in ((ENGINE_OVERHAUL, plane.engine), (PROP_OVERHAUL, plane.prop)):
+        if events[last] & event:
+          balance.add(Asset(
+              component.overhaul,
+              LinearDepreciation(int(math.ceil(component.tbo / per_month_hours)))), month=last)
+          balance.add(CapEx(component.overhaul), month=last)
+          overhaul_years = int(math.ceil(component.tbo / per_year_hours))
+          for year in range(overhaul_years):
+            depreciate(last // 12 + year, 1.0 * component.overhaul / overhaul_years)
+
+      if events[last] & INSPECTION:
+        balance.add(OpEx(plane.annual), month=last)
+
+      next_event = next(event_months, NEVER)
+
+    month = stop
+    steps += 1
+
+  balance.month = ownership_months
+
+  if sell:
+    liquidate(balance, meterable)
+
+  stats.increment(stats.SCENARIOS)
+  stats.increment(stats.MONTHS, ownership_months)
+  stats.increment(stats.LEDGER_ITEMS, balance.entries)
+  stats.increment(stats.EVENTS, steps)
+
+  return balance
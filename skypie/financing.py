@@ -0,0 +1,113 @@
+"""Search of financing structures for the one that minimizes the cost of ownership.
+
+Financing only changes the principal and interest paid over a horizon and the
+principal still owed at its end; fuel, maintenance, overhauls and depreciation
+are the same whatever the loan.  So the plane is simulated once, as if bought
+all cash, and each financing variant only adjusts the horizon's terms by its
+cumulative principal and interest and its remaining principal, all closed forms
+of MortgageMeterable.  Scoring a variant costs O(1) however long the horizon,
+so thousands of (lender rate, down payment, term) variants are scored for about
+the cost of one simulation.
+
+Without ``sell`` the principal still owed at the end of the horizon is charged
+as paid off then.  ``simple`` leaves it out, which would favor the longest terms
+and smallest down payments; charged, variants differ only by the interest they
+pay.
+"""
+
+from collections import namedtuple
+
+from . import stats
+from .acquisition import AllCash, Mortgage
+from .constants import CONSTANTS
+from .grid import AcquisitionSchedule, Column, Horizon, rate
+from .model import UsageModel
+
+
+Quote = namedtuple('Quote', ('lender', 'rate'))
+
+
+Financing = namedtuple('Financing', (
+    'lender',           # the lender of the quote, or None if bought all cash
+    'acquisition',
+    'monthly_payment',
+    'principal',        # principal paid over the horizon, including the down payment
+    'interest',         # interest paid over the horizon
+    'remaining',        # principal still owed at the end of the horizon
+    'value',            # the output rate of the tax adjusted profit
+))
+
+
+def variants(quotes, down_payments, terms, cash=True):
+  """Yield (lender, acquisition) for every quote, down payment and term, and all cash.
+
+  A down payment of 100% leaves nothing to finance, and is buying all cash.
+  """
+  if cash:
+    yield None, AllCash()
+  for quote in quotes:
+    for down_payment in down_payments:
+      if down_payment >= 1:
+        continue
+      for term in terms:
+        yield quote.lender, Mortgage(down_payment, term, quote.rate)
+
+
+def optimize_financing(
+    plane,
+    part91_hours,
+    part135_hours,
+    years,
+    quotes,
+    down_payments,
+    terms,
+    output='outlay',
+    usage=UsageModel(),
+    constants=CONSTANTS,
+    sell=False,
+    cash=True):
+  """Return the Financing of every variant, best, i.e. the least costly, first.
+
+  The rates of ``quotes`` and the ``down_payments`` are fractions, e.g. 0.15
+  for 15%, and ``terms`` are in months.
+  """
+  assert years > 0
+  months = years * 12
+
+  # The terms of the horizon, less the all cash purchase price.
+  horizon = Horizon(plane, AcquisitionSchedule(AllCash(), plane.price, months), constants)
+  capex, opex, depreciation, sale_income = horizon.terms(months, sell)
+  capex -= plane.price
+
+  column = Column(plane, part91_hours, part135_hours, usage, constants)
+  for month in range(months):
+    column.step(plane, month)
+  overhaul_value = column.sale_value(months) if sell else None
+  stats.increment(stats.SCENARIOS)
+  stats.increment(stats.MONTHS, months)
+
+  results = []
+  for lender, acquisition in variants(quotes, down_payments, terms, cash=cash):
+    meterable = acquisition.get(plane.price)
+    principal, interest = meterable.cumulative(0, months)
+    remaining = meterable.remaining(months)
+    profit = Horizon.profit(
+        column,
+        months,
+        (capex + principal + (0 if sell else remaining),
+         opex + interest,
+         depreciation,
+         sale_income - remaining if sell else 0),
+        sell,
+        overhaul_value=overhaul_value)
+    results.append(Financing(
+        lender,
+        acquisition,
+        sum(meterable.payment(1)),
+        principal,
+        interest,
+        remaining,
+        rate(profit, output, part91_hours, years)))
+
+  results.sort(key=lambda financing: -financing.value)
+  return results
@@ -0,0 +1,244 @@
+"""Simulation of a fleet of airframes into one ledger tagged by tail number.
+
+Each airframe is its own plane, acquisition and usage, bought at some month of
+the fleet's horizon and owned, in whole years, to its end.  Costs shared by
+the fleet, e.g. a hangar or an insurance pool, are booked yearly against the
+SHARED tail.
+
+Airframes are simulated with the event-driven engine, so an airframe costs
+O(events) rather than O(months), and book straight into a FleetLedger: parallel
+machine-typed columns of month, tail, category and amount, with running monthly
+and yearly rollups for every tail and for the fleet as a whole.  A tail's
+rollups are ColumnarRollups, flat arrays rather than Python objects per month.
+"""
+
+from array import array
+from collections import namedtuple
+import json
+
+from .balance import Asset, CATEGORIES, ColumnarRollups, OpEx, Rollups, tax_adjusted_profit
+from .batch import DEFAULT_USAGE, Parser, ScenarioError
+from .common import Engine, Prop
+from .constants import CONSTANTS
+from .events import event_driven
+from .model import UsageModel
+
+
+SHARED = '(shared)'
+
+
+Airframe = namedtuple('Airframe', (
+    'tail',
+    'plane',
+    'acquisition',
+    'part91_hours',
+    'part135_hours',
+    'usage',
+    'purchase_month',
+    'smoh',
+    'spoh',
+))
+
+
+def airframe(
+    tail,
+    plane,
+    acquisition,
+    part91_hours,
+    part135_hours,
+    usage=UsageModel(),
+    purchase_month=0,
+    smoh=None,
+    spoh=None):
+  """Return an Airframe; ``smoh`` and ``spoh`` override those of the plane."""
+  return Airframe(
+      tail, plane, acquisition, part91_hours, part135_hours, usage, purchase_month, smoh, spoh)
+
+
+SharedCost = namedtuple('SharedCost', ('name', 'yearly'))
+
+
+def read_airframes(lines, parser=None):
+  """Yield an Airframe per non-blank line of JSON.
+
+  Planes, acquisitions and usage models are given as in batch scenarios, e.g.
+  ``{"tail": "N123", "plane": "DA40", "acquisition": "cash", "part91_hours": 5,
+  "part135_hours": 60, "purchase_month": 18, "smoh": 900}``.
+  """
+  parser = parser or Parser()
+  for number, line in enumerate(lines, 1):
+    if not line.strip():
+      continue
+    try:
+      record = json.loads(line)
+      usage = dict(DEFAULT_USAGE)
+      usage.update(record.get('usage', {}))
+      yield airframe(
+          record['tail'],
+          parser.plane(record['plane']),
+          parser.acquisition(record.get('acquisition', 'finance')),
+          record.get('part91_hours', 0),
+          record.get('part135_hours', 0),
+          usage=UsageModel(**usage),
+          purchase_month=record.get('purchase_month', 0),
+          smoh=record.get('smoh'),
+          spoh=record.get('spoh'))
+    except KeyError as e:
+      raise ScenarioError('line %d: missing %s' % (number, e))
+    except (TypeError, ValueError) as e:
+      raise ScenarioError('line %d: %s' % (number, e))
+
+
+class FleetLedger(object):
+  """A balance sheet whose entries are tagged by tail number.
+
+  ``select`` and ``sum`` take the arguments of Balance.select plus ``tail``;
+  without a tail they answer for the whole fleet.  ``tax_adjusted_profit``
+  therefore works on a single tail, e.g. ``tax_adjusted_profit(ledger,
+  tail='N123')``, as well as on the fleet.
+  """
+
+  CATEGORIES = CATEGORIES
+
+  def __init__(self):
+    self.entries = 0
+    self.tails = []
+    self.tail_indices = {}
+    self.part91_percentages = []
+    self.months = array('i')
+    self.tail_column = array('i')
+    self.categories = array('b')
+    self.amounts = array('d')
+    self.asset_items = []
+    self.rollups = Rollups()
+    self.tail_rollups = []
+
+  def register(self, tail, part91_percentage=0.0):
+    """Add ``tail`` to the fleet, with the part 91 share of its hours."""
+    if tail in self.tail_indices:
+      raise ValueError('Duplicate tail %s' % tail)
+    self.tail_indices[tail] = len(self.tails)
+    self.tails.append(tail)
+    self.part91_percentages.append(part91_percentage)
+    self.tail_rollups.append(ColumnarRollups())
+
+  def add(self, tail, val, month):
+    index = self.tail_indices[tail]
+    if isinstance(val, Asset):
+      self.asset_items.append((index, month, val))
+      self.rollups.add(month, val)
+      self.tail_rollups[index].add(month, val)
+      self.entries += 1
+      return
+    for category, item_klazz in enumerate(self.CATEGORIES):
+      if isinstance(val, item_klazz):
+        self.months.append(month)
+        self.tail_column.append(index)
+        self.categories.append(category)
+        self.amounts.append(val.value)
+        self.rollups.add_value(month, category, val.value)
+        self.tail_rollups[index].add_value(month, category, val.value)
+        self.entries += 1
+        return
+    raise TypeError('Unknown balance sheet item %s' % type(val))
+
+  def select(self, tail=None, month=None, year=None, item_klazz=None):
+    rollups = self.rollups if tail is None else self.tail_rollups[self.tail_indices[tail]]
+    return rollups.select(month=month, year=year, item_klazz=item_klazz)
+
+  def sum(self, **kw):
+    return sum(item.value for item in self.select(**kw))
+
+  def assets(self, tail=None):
+    """Yield (tail, month, asset) for every asset, or those of ``tail``."""
+    for index, month, asset in self.asset_items:
+      if tail is None or self.tails[index] == tail:
+        yield self.tails[index], month, asset
+
+  def profit(self, tail=None, tax_rate=0.25, **kw):
+    """The tax adjusted profit of ``tail``, or the sum over every tail of the fleet."""
+    tails = self.tails if tail is None else [tail]
+    return sum(
+        tax_adjusted_profit(
+            self,
+            part91_percentage=self.part91_percentages[self.tail_indices[each]],
+            tax_rate=tax_rate,
+            tail=each,
+            **kw)
+        for each in tails)
+
+
+class TailLedger(object):
+  """The ledger of a single airframe, booking into a FleetLedger from its purchase month.
+
+  Has the interface of Balance that event_driven and liquidate use.
+  """
+
+  def __init__(self, fleet, tail, offset):
+    self.fleet, self.tail, self.offset = fleet, tail, offset
+    self.month = 0
+    self.entries = 0
+    self.asset_items = []
+
+  def add(self, val, month=None):
+    month = self.month if month is None else month
+    self.fleet.add(self.tail, val, month + self.offset)
+    if isinstance(val, Asset):
+      self.asset_items.append((month, val))
+    self.entries += 1
+
+  def __iadd__(self, val):
+    self.add(val)
+    return self
+
+  def assets(self):
+    return iter(self.asset_items)
+
+
+def simulate_fleet(airframes, years, shared_costs=(), constants=CONSTANTS, sell=False):
+  """Simulate ``airframes`` over a horizon of ``years`` and return their FleetLedger.
+
+  Each airframe is owned for the whole years between its purchase month and the
+  end of the horizon, and sold then if ``sell``.
+  """
+  ledger = FleetLedger()
+  months = years * 12
+
+  ledger.register(SHARED)
+  for cost in shared_costs:
+    for year in range(years):
+      ledger.add(SHARED, OpEx(cost.yearly), year * 12)
+
+  for entry in airframes:
+    ownership_years = (months - entry.purchase_month) // 12
+    if entry.purchase_month < 0 or ownership_years <= 0:
+      raise ValueError('%s must be bought at least a year before the end of the horizon' % (
+          entry.tail,))
+
+    plane = entry.plane
+    if entry.smoh is not None:
+      plane = plane(engine=Engine(
+          overhaul=plane.engine.overhaul,
+          tbo=plane.engine.tbo,
+          fuel=plane.engine.fuel,
+          smoh=entry.smoh))
+    if entry.spoh is not None:
+      plane = plane(prop=Prop(
+          overhaul=plane.prop.overhaul,
+          tbo=plane.prop.tbo,
+          spoh=entry.spoh))
+
+    hours = entry.part91_hours + entry.part135_hours
+    ledger.register(entry.tail, 1. * entry.part91_hours / hours if hours else 1.0)
+    event_driven(
+        plane,
+        entry.acquisition,
+        entry.part91_hours,
+        entry.part135_hours,
+        ownership_years,
+        usage=entry.usage,
+        constants=constants,
+        sell=sell,
+        ledger=lambda entry=entry: TailLedger(ledger, entry.tail, entry.purchase_month))
+
+  return ledger
@@ -0,0 +1,723 @@
+"""Batched evaluation of the ``simple`` model over an hours x years grid.
+
+``simple`` builds a full balance sheet for every (hours, years) cell of a table,
+re-running the month loop from scratch each time.  The grid engine instead runs
+the month recurrence exactly once, out to the longest horizon, advancing every
+hours column of a batch together: each state variable is a vector over the
+batch, updated an operation at a time per month, over numpy when it is installed
+(``pip install skypie[numpy]``) and array('d') otherwise.  Only the category
+totals that ``tax_adjusted_profit`` consumes are tracked, and every horizon in
+``y_range`` is read off as the loop passes its final month.
+"""
+
+from array import array
+from collections import deque
+import functools
+import itertools
+import math
+import operator
+
+from . import stats
+from .balance import after_tax, tax_adjusted_profit, ColumnarBalance
+from .cache import fingerprint, LRUCache
+from .constants import CONSTANTS
+from .depreciation import LinearDepreciation
+from .events import event_driven, inspection_period
+from .model import simulate_horizons, UsageModel
+from .parallel import imap, partition
+
+
+DEFAULT_BATCH_SIZE = 512
+OUTPUTS = ('hourly', 'yearly', 'outlay')
+
+_NUMPY = None
+
+
+def _positive(value):
+  # Balance.aggregate drops categories whose total is not positive.
+  return value if value > 0 else 0
+
+
+def rate(value, output, part91_hours, years):
+  """Convert a tax adjusted profit into the units of ``output``, one of OUTPUTS."""
+  if output == 'outlay':
+    return value
+  elif output == 'hourly':
+    return value / (part91_hours * 12 * years) if (part91_hours * years) > 0 else 0
+  elif output == 'yearly':
+    return value / years if years > 0 else 0
+  else:
+    raise ValueError('Unknown outlay type %s' % output)
+
+
+class AcquisitionSchedule(object):
+  """The cumulative (principal, interest) of an acquisition, materialized once."""
+
+  def __init__(self, acquisition, price, months):
+    self.meterable = acquisition.get(price)
+    principal, interest = self.meterable.schedule(months)
+    self.cumulative_principal = self._cumulative(principal)
+    self.cumulative_interest = self._cumulative(interest)
+
+  @classmethod
+  def _cumulative(cls, values):
+    total, cumulative = 0, [0]
+    for value in values:
+      total += value
+      cumulative.append(total)
+    return cumulative
+
+  def remaining_principal(self, month):
+    """The principal still owed after ``month`` payments, as tallied by ``simple`` on sale."""
+    return self.meterable.remaining(month)
+
+
+class OverhaulValue(object):
+  """The sale value of a set of overhauls, maintained as the months pass.
+
+  Overhauls depreciate linearly, so the total value of those still within their
+  useful life is ``weight - rate * months``.  Each overhaul is added once and
+  retired once, rather than every overhaul being revalued every month, so
+  ``value`` must be asked of months that never decrease.
+  """
+
+  def __init__(self):
+    self.weight = self.rate = 0
+    self.active = {}  # useful life -> deque of (last month of value, weight, rate)
+
+  def add(self, overhaul_month, price, depreciation_model):
+    life = depreciation_model.months
+    weight = 1.0 * price * (life + 1 + overhaul_month) / life
+    rate = 1.0 * price / life
+    self.weight += weight
+    self.rate += rate
+    self.active.setdefault(life, deque()).append((overhaul_month + life, weight, rate))
+
+  def value(self, months):
+    for queue in self.active.values():
+      while queue and queue[0][0] < months:
+        _, weight, rate = queue.popleft()
+        self.weight -= weight
+        self.rate -= rate
+
+    if not any(self.active.values()):
+      self.weight = self.rate = 0
+    return self.weight - self.rate * months
+
+  def copy(self):
+    overhaul_value = self.__class__()
+    overhaul_value.weight, overhaul_value.rate = self.weight, self.rate
+    overhaul_value.active = dict((life, deque(queue)) for life, queue in self.active.items())
+    return overhaul_value
+
+
+class Column(object):
+  """The running state of a single hours value."""
+
+  def __init__(self, plane, part91_hours, part135_hours, usage, constants):
+    hourly_costs = plane.performance.gph * constants[plane.engine.fuel]
+    self.per_month_hours = 1. * (part91_hours + part135_hours)
+    self.per_year_hours = self.per_month_hours * 12
+    self.month_hours = self.per_month_hours  # flown this month
+    self.part91_percentage = 1. * part91_hours / (part91_hours + part135_hours)
+    self.engine_delta = [1. * part91_hours / usage.hobbs_ratio, 1. * part135_hours / usage.hobbs_ratio]
+    self.monthly_opex = hourly_costs * part135_hours + usage.salary * part135_hours
+    self.monthly_income = usage.revenue * part135_hours
+    self.engine_hours = plane.engine.smoh
+    self.prop_hours = plane.prop.spoh
+    self.months_since_annual = 0
+    self.hours_since_inspection = 0
+    self.capex = self.opex = self.income = self.depreciation = 0
+    self.pending_depreciation = {}
+    self.overhauls = []
+    self.overhaul_value = OverhaulValue()
+
+  def overhaul(self, month, price, tbo):
+    self.capex += price
+    depreciation_model = LinearDepreciation(int(math.ceil(tbo / self.per_month_hours)))
+    self.overhauls.append((month, price, depreciation_model))
+    self.overhaul_value.add(month, price, depreciation_model)
+    ownership_years = int(math.ceil(tbo / self.per_year_hours))
+    for year in range(ownership_years):
+      self.pending_depreciation[month // 12 + year] = (
+          self.pending_depreciation.get(month // 12 + year, 0) + 1.0 * price / ownership_years)
+
+  def step(self, plane, month):
+    if month % 12 == 0:
+      self.depreciation += self.pending_depreciation.pop(month // 12, 0)
+
+    for delta in self.engine_delta:
+      self.engine_hours += delta
+      self.prop_hours += delta
+    self.opex += self.monthly_opex
+    self.income += self.monthly_income
+
+    if self.engine_hours > plane.engine.tbo:
+      self.engine_hours -= plane.engine.tbo
+      self.overhaul(month, plane.engine.overhaul, plane.engine.tbo)
+
+    if self.prop_hours > plane.prop.tbo:
+      self.prop_hours -= plane.prop.tbo
+      self.overhaul(month, plane.prop.overhaul, plane.prop.tbo)
+
+    self.months_since_annual += 1
+    self.hours_since_inspection += self.month_hours
+    if self.months_since_annual >= 12 or self.hours_since_inspection >= 100:
+      self.months_since_annual = 0
+      self.hours_since_inspection = 0
+      self.opex += plane.annual
+
+  def sale_value(self, month):
+    """The sale value of the overhauls after ``month`` months, which must not decrease between calls."""
+    return self.overhaul_value.value(month)
+
+
+class Horizon(object):
+  """The terms of a horizon's profit that are common to every column of a batch."""
+
+  def __init__(self, plane, schedule, constants):
+    self.plane, self.schedule = plane, schedule
+    self.yearly_costs = (
+        plane.insurance +
+        plane.price * constants['property_tax'] +
+        plane.yearly_costs
+    )
+    self.upfront_capex = sum(upgrade.price for upgrade in plane.upgrades)
+    self.upfront_opex = plane.price * constants['use_tax']
+
+  def terms(self, months, sell):
+    """Return (capex, opex, depreciation, sale income) of owning for ``months``.
+
+    Yearly costs are paid at the start of each year, so a partial final year
+    pays them in full.
+    """
+    plane, schedule = self.plane, self.schedule
+    years = -(-months // 12)
+    capex = self.upfront_capex + schedule.cumulative_principal[months]
+    opex = self.upfront_opex + schedule.cumulative_interest[months] + self.yearly_costs * years
+    depreciation = plane.price - plane.price * plane.depreciation.at(months)
+    for upgrade in plane.upgrades:
+      depreciation += upgrade.price - upgrade.price * upgrade.depreciation.at(months)
+
+    stats.increment(stats.DEPRECIATIONS, 1 + len(plane.upgrades))
+
+    sale_income = 0
+    if sell:
+      stats.increment(stats.DEPRECIATIONS, 1 + len(plane.upgrades))
+      for value, depreciation_model in [(plane.value, plane.depreciation)] + [
+          (upgrade.price, upgrade.depreciation) for upgrade in plane.upgrades]:
+        percentage_value = depreciation_model.at(months)
+        if percentage_value > 0:
+          sale_income += value * percentage_value
+      sale_income -= schedule.remaining_principal(months)
+
+    return capex, opex, depreciation, sale_income
+
+  @classmethod
+  def profit(cls, column, months, terms, sell, overhaul_value=None):
+    """The tax adjusted profit of ``column`` after ``months``, given the horizon's ``terms``.
+
+    On sale, the overhauls are valued with ``column.sale_value`` unless their
+    ``overhaul_value`` is given.
+    """
+    capex, opex, depreciation, sale_income = terms
+    total_capex = _positive(capex + column.capex)
+    total_opex = _positive(opex + column.opex)
+    revenue = column.income
+    if sell:
+      if overhaul_value is None:
+        overhaul_value = column.sale_value(months)
+      revenue += sale_income + overhaul_value
+    deductions = (total_opex + _positive(depreciation + column.depreciation)) * (
+        1 - column.part91_percentage)
+    return after_tax(_positive(revenue), total_capex + total_opex, deductions)
+
+
+def import_numpy():
+  """Return numpy, which is optional, or None if it is not installed."""
+  global _NUMPY
+  if _NUMPY is None:
+    try:
+      import numpy
+      _NUMPY = numpy
+    except ImportError:
+      _NUMPY = False
+  return _NUMPY or None
+
+
+class Columns(object):
+  """The running state of a batch of hours values, one vector per state variable.
+
+  Each month advances the whole batch at once, an operation per state variable,
+  with the same arithmetic as Column.step applies to each column; only the
+  columns that overhaul or are inspected in a month are touched individually.
+  Subclasses implement the vectors over array('d') or numpy.
+  """
+
+  def __init__(self, plane, part91_hours, h_batch, usage, constants, months, sell=False):
+    self.plane, self.size, self.months, self.sell = plane, len(h_batch), months, sell
+    self.years = -(-months // 12)
+    hourly_costs = plane.performance.gph * constants[plane.engine.fuel]
+    per_month_hours = [1. * (part91_hours + hours) for hours in h_batch]
+    self.commercial_share = self.vector([
+        1 - 1. * part91_hours / (part91_hours + hours) for hours in h_batch])
+    self.part91_delta = 1. * part91_hours / usage.hobbs_ratio
+    self.part135_delta = self.vector([1. * hours / usage.hobbs_ratio for hours in h_batch])
+    self.monthly_opex = self.vector([
+        hourly_costs * hours + usage.salary * hours for hours in h_batch])
+    self.monthly_income = self.vector([usage.revenue * hours for hours in h_batch])
+    self.capex, self.opex, self.income, self.depreciation = (self.zeros() for _ in range(4))
+
+    # The TBO, overhaul prices, useful life in months and years of tax
+    # depreciation of the engine and of the prop, and their hours.
+    self.components = [
+        (component.tbo, self.vector([component.overhaul] * self.size),
+         [int(math.ceil(component.tbo / hours)) for hours in per_month_hours],
+         [int(math.ceil(component.tbo / (hours * 12))) for hours in per_month_hours])
+        for component in (plane.engine, plane.prop)]
+    self.hours = [self.vector([plane.engine.smoh] * self.size),
+                  self.vector([plane.prop.spoh] * self.size)]
+
+    self.inspections = {}  # period -> columns
+    for index, hours in enumerate(per_month_hours):
+      self.inspections.setdefault(inspection_period(hours), []).append(index)
+
+  def step(self, month):
+    if month % 12 == 0:
+      self.depreciation = self.add(self.depreciation, self.year_depreciation(month // 12))
+
+    self.opex = self.add(self.opex, self.monthly_opex)
+    self.income = self.add(self.income, self.monthly_income)
+
+    for index, (tbo, prices, _, _) in enumerate(self.components):
+      hours = self.hours[index] = self.add(
+          self.add(self.hours[index], self.part91_delta), self.part135_delta)
+      crossed = self.greater(hours, tbo)
+      if len(crossed):
+        self.add_at(hours, crossed, -tbo)
+        self.add_each(self.capex, crossed, prices)
+        self.overhaul(month, index, crossed)
+
+    for columns in self.inspected(month):
+      self.add_at(self.opex, columns, self.plane.annual)
+
+  def inspected(self, month):
+    """The columns inspected in ``month``, as one or more sequences."""
+    return [columns for period, columns in self.inspections.items() if (month + 1) % period == 0]
+
+  def commercial_shares(self):
+    """The share of each column's hours flown under part 135."""
+    return self.commercial_share
+
+  def profits(self, months, terms, sell, tax_rate=0.25):
+    """The tax adjusted profit of each column after ``months``, as Horizon.profit."""
+    capex, opex, depreciation, sale_income = terms
+    total_capex = self.positive(self.add(self.capex, capex))
+    total_opex = self.positive(self.add(self.opex, opex))
+    revenue = self.income
+    if sell:
+      revenue = self.add(revenue, self.add(self.sale_value(months), sale_income))
+    deductions = self.multiply(
+        self.add(total_opex, self.positive(self.add(self.depreciation, depreciation))),
+        self.commercial_shares())
+    profit = self.subtract(self.positive(revenue), self.add(total_capex, total_opex))
+    return self.tolist(self.subtract(
+        profit, self.multiply(self.positive(self.subtract(profit, deductions)), tax_rate)))
+
+
+class ArrayColumns(Columns):
+  """Columns over array('d'); each vector operation is a single pass over the batch."""
+
+  def __init__(self, *args, **kw):
+    Columns.__init__(self, *args, **kw)
+    self.pending_depreciation = {}  # year -> array
+    self.overhaul_values = [OverhaulValue() for _ in range(self.size)]
+    self.depreciation_models = [
+        [LinearDepreciation(life) for life in component[2]] for component in self.components]
+
+  def vector(self, values):
+    return array('d', values)
+
+  def zeros(self):
+    return array('d', [0]) * self.size
+
+  @classmethod
+  def _map(cls, function, a, b):
+    return array('d', map(function, a, b if isinstance(b, array) else itertools.repeat(b)))
+
+  def add(self, a, b):
+    return self._map(operator.add, a, b)
+
+  def subtract(self, a, b):
+    return self._map(operator.sub, a, b)
+
+  def multiply(self, a, b):
+    return self._map(operator.mul, a, b)
+
+  def divide(self, a, b):
+    return self._map(operator.truediv, a, b)
+
+  def positive(self, a):
+    return array('d', [_positive(value) for value in a])
+
+  def greater(self, a, limit):
+    return list(itertools.compress(range(self.size), map(functools.partial(operator.lt, limit), a)))
+
+  def at_least(self, a, limit):
+    return list(itertools.compress(range(self.size), map(functools.partial(operator.le, limit), a)))
+
+  def union(self, columns, other):
+    return sorted(set(columns).union(other))
+
+  def add_at(self, a, columns, value):
+    for column in columns:
+      a[column] += value
+
+  def add_each(self, a, columns, values):
+    for column in columns:
+      a[column] += values[column]
+
+  def assign_at(self, a, columns, value):
+    for column in columns:
+      a[column] = value
+
+  def tolist(self, a):
+    return a.tolist()
+
+  def year_depreciation(self, year):
+    return self.pending_depreciation.pop(year, 0)
+
+  def overhaul(self, month, index, crossed):
+    _, prices, _, years = self.components[index]
+    models = self.depreciation_models[index]
+    for column in crossed:
+      price = prices[column]
+      if self.sell:
+        self.overhaul_values[column].add(month, price, models[column])
+      amount = 1.0 * price / years[column]
+      for year in range(month // 12, min(month // 12 + years[column], self.years)):
+        pending = self.pending_depreciation.get(year)
+        if pending is None:
+          pending = self.pending_depreciation[year] = self.zeros()
+        pending[column] += amount
+
+  def sale_value(self, months):
+    return array('d', [overhaul_value.value(months) for overhaul_value in self.overhaul_values])
+
+
+class NumpyColumns(Columns):
+  """Columns over numpy arrays, booking each month's overhauls a vector at a time.
+
+  The sale value follows OverhaulValue, each column's overhauls retiring one by
+  one in the same order, so that both backends agree to the last bit: overhauls
+  of the same useful life in the order they happened, and lives in the order of
+  their first overhaul.
+  """
+
+  def __init__(self, *args, **kw):
+    numpy = self.numpy = import_numpy()
+    Columns.__init__(self, *args, **kw)
+    self.components = [
+        (tbo, price, numpy.array(lives), numpy.array(years))
+        for tbo, price, lives, years in self.components]
+    self.inspections = dict(
+        (period, numpy.array(columns)) for period, columns in self.inspections.items())
+    self.pending_depreciation = numpy.zeros((self.years, self.size))
+    if self.sell:
+      self.shared_life = self.components[0][2] == self.components[1][2]
+      self.first_component = numpy.full(self.size, -1)
+      self.weight, self.rate = self.zeros(), self.zeros()
+      self.active = numpy.zeros(self.size, dtype=int)
+      # The weight, rate and count of the overhauls retiring after their last
+      # month of value, as months x columns matrices: the engine and the prop
+      # overhauls retired in a first pass over the months, then the overhauls
+      # of a column's second useful life in a second pass.
+      self.retiring_weight = numpy.zeros((3, self.months, self.size))
+      self.retiring_rate = numpy.zeros((3, self.months, self.size))
+      self.retiring = numpy.zeros((3, self.months, self.size), dtype=bool)
+      self.retired = 0
+
+  def vector(self, values):
+    return self.numpy.array(values, dtype=float)
+
+  def zeros(self):
+    return self.numpy.zeros(self.size)
+
+  def add(self, a, b):
+    return a + b
+
+  def subtract(self, a, b):
+    return a - b
+
+  def multiply(self, a, b):
+    return a * b
+
+  def divide(self, a, b):
+    return a / b
+
+  def positive(self, a):
+    return self.numpy.maximum(a, 0)
+
+  def greater(self, a, limit):
+    return self.numpy.flatnonzero(a > limit)
+
+  def at_least(self, a, limit):
+    return self.numpy.flatnonzero(a >= limit)
+
+  def union(self, columns, other):
+    return self.numpy.union1d(columns, other)
+
+  def add_at(self, a, columns, value):
+    a[columns] += value
+
+  def add_each(self, a, columns, values):
+    a[columns] += values[columns]
+
+  def assign_at(self, a, columns, value):
+    a[columns] = value
+
+  def tolist(self, a):
+    return a.tolist()
+
+  def year_depreciation(self, year):
+    return self.pending_depreciation[year]
+
+  def overhaul(self, month, index, crossed):
+    numpy = self.numpy
+    _, prices, lives, years = self.components[index]
+    price = prices[crossed]
+
+    # Each column's depreciation for each of its years up to the last horizon.
+    first_year = month // 12
+    counts = numpy.minimum(years[crossed], self.years - first_year)
+    ends = numpy.cumsum(counts)
+    offsets = numpy.arange(ends[-1]) - numpy.repeat(ends - counts, counts)
+    self.pending_depreciation[first_year + offsets, numpy.repeat(crossed, counts)] += (
+        numpy.repeat(1.0 * price / years[crossed], counts))
+
+    if not self.sell:
+      return
+    life = lives[crossed]
+    weight = 1.0 * price * (life + 1 + month) / life
+    rate = 1.0 * price / life
+    self.weight[crossed] += weight
+    self.rate[crossed] += rate
+    self.active[crossed] += 1
+
+    first = self.first_component[crossed]
+    first[first < 0] = index
+    self.first_component[crossed] = first
+    # A column with one useful life retires engine and prop overhauls together
+    # in the first pass; otherwise those of its second life wait for the second.
+    stream = numpy.where(~self.shared_life[crossed] & (first != index), 2, index)
+    last = month + life
+    retiring = last < self.months
+    at = stream[retiring], last[retiring], crossed[retiring]
+    self.retiring_weight[at] = weight[retiring]
+    self.retiring_rate[at] = rate[retiring]
+    self.retiring[at] = True
+
+  def sale_value(self, months):
+    for streams in ((0, 1), (2,)):
+      for month in range(self.retired, months):
+        for stream in streams:
+          self.weight -= self.retiring_weight[stream, month]
+          self.rate -= self.retiring_rate[stream, month]
+          self.active -= self.retiring[stream, month]
+    self.retired = max(self.retired, months)
+    idle = self.active == 0
+    self.weight[idle] = self.rate[idle] = 0
+    return self.weight - self.rate * months
+
+
+# Batches narrower than this run faster over array('d') than over numpy.
+NUMPY_MIN_COLUMNS = 16
+BACKENDS = {'array': ArrayColumns, 'numpy': NumpyColumns}
+
+
+def columns_type(size, backend=None, backends=BACKENDS):
+  """The class of ``backends`` for a batch of ``size`` columns over ``backend``.
+
+  By default batches of at least NUMPY_MIN_COLUMNS use numpy when it is installed.
+  """
+  if backend is None:
+    backend = 'numpy' if size >= NUMPY_MIN_COLUMNS and import_numpy() else 'array'
+  return backends[backend]
+
+
+def evaluate_batch(
+    plane,
+    acquisition,
+    part91_hours,
+    h_batch,
+    y_range,
+    usage=UsageModel(),
+    constants=CONSTANTS,
+    sell=False,
+    schedule=None,
+    backend=None):
+  """Evaluate ``tax_adjusted_profit(simple(...))`` for every cell of ``h_batch`` x ``y_range``.
+
+  Returns one row per hours value, each row holding a value per ownership horizon.
+  The batch advances as Columns over ``backend``; see columns_type.
+  """
+  horizons = sorted(set(y_range))
+  if not horizons:
+    return [[] for _ in h_batch]
+  assert horizons[0] > 0
+  ownership_months = horizons[-1] * 12
+
+  schedule = schedule or AcquisitionSchedule(acquisition, plane.price, ownership_months)
+  horizon = Horizon(plane, schedule, constants)
+
+  columns = columns_type(len(h_batch), backend)(
+      plane, part91_hours, h_batch, usage, constants, ownership_months, sell=sell)
+  results = {}
+  horizon_index = 0
+
+  for month in range(ownership_months):
+    columns.step(month)
+
+    if month + 1 != horizons[horizon_index] * 12:
+      continue
+
+    years = horizons[horizon_index]
+    horizon_index += 1
+    months = years * 12
+    results[years] = columns.profits(months, horizon.terms(months, sell), sell)
+
+  stats.increment(stats.SCENARIOS, len(h_batch) * len(horizons))
+  stats.increment(stats.MONTHS, len(h_batch) * ownership_months)
+
+  return [[results[years][index] for years in y_range] for index in range(len(h_batch))]
+
+
+def _grid_rows(state, h_batch):
+  schedule = state.get('schedule')
+  if schedule is None:
+    schedule = state['schedule'] = AcquisitionSchedule(
+        state['acquisition'], state['plane'].price, max(state['y_range']) * 12)
+  return evaluate_batch(
+      state['plane'],
+      state['acquisition'],
+      state['part91_hours'],
+      h_batch,
+      state['y_range'],
+      usage=state['usage'],
+      constants=state['constants'],
+      sell=state['sell'],
+      schedule=schedule)
+
+
+def _simple_rows(state, h_batch):
+  rows = []
+  for hours in h_batch:
+    balance_sheets = simulate_horizons(
+        state['plane'],
+        state['acquisition'],
+        state['part91_hours'],
+        hours,
+        state['y_range'],
+        usage=state['usage'],
+        constants=state['constants'],
+        sell=state['sell'],
+        ledger=ColumnarBalance)
+    part91_percentage = 1. * state['part91_hours'] / (state['part91_hours'] + hours)
+    rows.append([
+        tax_adjusted_profit(balance_sheet, part91_percentage=part91_percentage)
+        for balance_sheet in balance_sheets])
+  return rows
+
+
+def _events_rows(state, h_batch):
+  rows = []
+  for hours in h_batch:
+    part91_percentage = 1. * state['part91_hours'] / (state['part91_hours'] + hours)
+    rows.append([
+        tax_adjusted_profit(
+            event_driven(
+                state['plane'],
+                state['acquisition'],
+                state['part91_hours'],
+                hours,
+                years,
+                usage=state['usage'],
+                constants=state['constants'],
+                sell=state['sell'],
+                ledger=ColumnarBalance),
+            part91_percentage=part91_percentage)
+        for years in state['y_range']])
+  return rows
+
+
+ENGINES = {
+  'grid': _grid_rows,
+  'simple': _simple_rows,
+  'events': _events_rows,
+}
+
+
+def iterate_grid(
+    plane,
+    acquisition,
+    part91_hours,
+    h_range,
+    y_range,
+    usage=UsageModel(),
+    constants=CONSTANTS,
+    sell=False,
+    batch_size=DEFAULT_BATCH_SIZE,
+    engine='grid',
+    jobs=1,
+    cache=None):
+  """Yield (hours, row) for each hours value in ``h_range``, in order.
+
+  Hours are evaluated ``batch_size`` columns at a time, spread over ``jobs``
+  processes.  ``engine='simple'`` simulates full balance sheets instead, one pass
+  per hours value, and ``engine='events'`` runs one event-driven simulation per
+  cell.  If ``cache`` is an LRUCache, cells are memoized in it by scenario
+  fingerprint and only hours values with a missing cell are evaluated.
+  """
+  h_range, y_range = list(h_range), list(y_range)
+  if not y_range:
+    for hours in h_range:
+      yield hours, []
+    return
+
+  state = dict(
+      plane=plane,
+      acquisition=acquisition,
+      part91_hours=part91_hours,
+      y_range=y_range,
+      usage=usage,
+      constants=constants,
+      sell=sell)
+
+  cached_rows = {}
+  if cache is not None:
+    scenario = fingerprint((plane, acquisition, part91_hours, usage, constants, bool(sell), engine))
+    for hours in h_range:
+      row = [cache.get((scenario, hours, years), LRUCache.MISSING) for years in y_range]
+      if LRUCache.MISSING not in row:
+        cached_rows[hours] = row
+
+  missing = [hours for hours in h_range if hours not in cached_rows]
+  batches = partition(missing, jobs, batch_size)
+  computed = itertools.chain.from_iterable(
+      zip(h_batch, rows)
+      for h_batch, rows in zip(batches, imap(ENGINES[engine], batches, state=state, jobs=jobs)))
+
+  for hours in h_range:
+    if hours in cached_rows:
+      yield hours, cached_rows[hours]
+      continue
+    _, row = next(computed)
+    if cache is not None:
+      for years, value in zip(y_range, row):
+        cache.put((scenario, hours, years), value)
+    yield hours, row
+
+
+def grid(plane, acquisition, part91_hours, h_range, y_range, **kw):
+  """Return the matrix of tax adjusted profits, one row per hours value in ``h_range``."""
+  return [row for _, row in iterate_grid(plane, acquisition, part91_hours, h_range, y_range, **kw)]
@@ -0,0 +1,259 @@
+"""Incremental recompute of a table as its inputs change one at a time.
+
+The grid engine's evaluation of a table splits into derived quantities, each
+of which reads only a few inputs:
+
+  schedule   the amortization schedule of the acquisition
+  terms      per horizon, the financing, yearly costs, depreciation and sale
+             value of the plane and its upgrades
+  timelines  per hours value, the months of engine and prop overhauls and of
+             inspections
+  columns    per hours value, the running costs, income and overhaul
+             depreciation at each horizon, replayed from its timeline
+  profits    per hours value, the tax adjusted profit of each horizon
+
+A Session records the inputs each quantity reads, named as in ``skypie
+sensitivity`` (e.g. ``plane.insurance``, ``acquisition.rate`` or
+``constants.gas_100ll``), and the quantities it is derived from.  Setting an
+input invalidates only the quantities downstream of it, and the next table
+recomputes just those: changing the insurance, say, recomputes the terms and
+profits, but neither the amortization schedule nor the overhaul timing or cash
+flows of any column.  Results are identical to the grid engine's.
+"""
+
+from collections import OrderedDict
+import copy
+
+from .batch import Scenario
+from .constants import CONSTANTS
+from .events import ENGINE_OVERHAUL, INSPECTION, PROP_OVERHAUL, timeline
+from .grid import AcquisitionSchedule, Column, Horizon, rate
+from .model import UsageModel
+from .sensitivity import parameters
+
+
+DEPENDENCIES = OrderedDict([
+  # quantity: (inputs, quantities it is derived from), in topological order
+  ('schedule', (('acquisition', 'plane.price', 'years'), ())),
+  ('terms', (
+      ('plane.price', 'plane.value', 'plane.insurance', 'plane.yearly_costs',
+       'plane.depreciation', 'plane.upgrades', 'constants.property_tax', 'constants.use_tax',
+       'sell', 'years'),
+      ('schedule',))),
+  ('timelines', (
+      ('part91_hours', 'usage.hobbs_ratio', 'engine.smoh', 'engine.tbo', 'prop.spoh', 'prop.tbo',
+       'years'),
+      ())),
+  ('columns', (
+      ('part91_hours', 'usage.salary', 'usage.revenue', 'performance.gph', 'engine.fuel',
+       'constants.{fuel}', 'engine.overhaul', 'engine.tbo', 'prop.overhaul', 'prop.tbo',
+       'plane.annual'),
+      ('timelines',))),
+  ('profits', (('sell',), ('terms', 'columns'))),
+])
+
+# Inputs that are fields of the Scenario itself.
+SCENARIO_FIELDS = {
+  'part91_hours': 'part91_hours',
+  'hours': 'h_range',
+  'years': 'y_range',
+  'sell': 'sell',
+  'output': 'output',
+  'plane': 'plane',
+  'acquisition': 'acquisition',
+  'usage': 'usage',
+  'constants': 'constants',
+}
+
+PLANE_PARTS = ('plane', 'performance', 'engine', 'prop')
+
+# Quantities kept per hours value rather than for the table as a whole.
+PER_HOURS = ('timelines', 'columns', 'profits')
+
+
+def affects(name, input):
+  """Whether setting the input ``name`` changes ``input``, e.g. ``acquisition`` changes ``acquisition.rate``."""
+  if name == 'plane':
+    return input.split('.')[0] in PLANE_PARTS
+  return input == name or input.startswith(name + '.') or name.startswith(input + '.')
+
+
+class Session(object):
+  """A table of a Scenario whose derived quantities are kept between edits of its inputs."""
+
+  def __init__(self, scenario):
+    self.scenario = scenario
+    self.values = {}
+    self.recomputed = []
+    self.invalidate_all()
+
+  def invalidate_all(self):
+    for quantity in DEPENDENCIES:
+      self.invalidate(quantity)
+
+  def invalidate(self, quantity):
+    self.values[quantity] = {} if quantity in PER_HOURS else None
+
+  def inputs(self, quantity):
+    fuel = self.scenario.plane.engine.fuel
+    return [input.format(fuel=fuel) for input in DEPENDENCIES[quantity][0]]
+
+  def fields(self):
+    """Return (name, value) of every input that ``set`` accepts by name."""
+    scenario = self.scenario
+    fields = [
+        ('part91_hours', scenario.part91_hours),
+        ('hours', scenario.h_range),
+        ('years', scenario.y_range),
+        ('sell', scenario.sell),
+        ('output', scenario.output),
+    ]
+    fields.extend((name, value) for name, value, _ in parameters(scenario))
+    return fields
+
+  def set(self, name, value):
+    """Set the input ``name`` to ``value``; return the quantities invalidated by it."""
+    if name in SCENARIO_FIELDS:
+      scenario = self.scenario._replace(**{SCENARIO_FIELDS[name]: value})
+    else:
+      replacements = dict((field, replace) for field, _, replace in parameters(self.scenario))
+      if name not in replacements:
+        raise KeyError('Unknown input %s' % name)
+      scenario = replacements[name](value)
+
+    # Inputs are matched against the dependencies both before and after the change, so
+    # that e.g. a change of fuel invalidates what read either fuel's price.
+    invalid = self.invalidated(name)
+    self.scenario = scenario
+    invalid.update(self.invalidated(name))
+    for quantity in DEPENDENCIES:
+      if invalid.intersection(DEPENDENCIES[quantity][1]):
+        invalid.add(quantity)
+
+    for quantity in invalid:
+      self.invalidate(quantity)
+    return [quantity for quantity in DEPENDENCIES if quantity in invalid]
+
+  def invalidated(self, name):
+    return set(
+        quantity for quantity in DEPENDENCIES
+        if any(affects(name, input) for input in self.inputs(quantity)))
+
+  @property
+  def horizons(self):
+    return sorted(set(self.scenario.y_range))
+
+  @property
+  def months(self):
+    return max(self.scenario.y_range) * 12
+
+  def quantity(self, name, key=None):
+    """Return the quantity ``name``, for hours value ``key`` if per column, computing it if invalid."""
+    values = self.values[name]
+    if key is None:
+      if values is None:
+        values = self.values[name] = getattr(self, '_' + name)()
+        self.recomputed.append(name)
+      return values
+    if key not in values:
+      values[key] = getattr(self, '_' + name)(key)
+      self.recomputed.append(name)
+    return values[key]
+
+  def _schedule(self):
+    scenario = self.scenario
+    return AcquisitionSchedule(scenario.acquisition, scenario.plane.price, self.months)
+
+  def _terms(self):
+    scenario = self.scenario
+    horizon = Horizon(scenario.plane, self.quantity('schedule'), scenario.constants)
+    return dict((years, horizon.terms(years * 12, scenario.sell)) for years in self.horizons)
+
+  def _column(self, hours):
+    scenario = self.scenario
+    return Column(scenario.plane, scenario.part91_hours, hours, scenario.usage, scenario.constants)
+
+  def _timelines(self, hours):
+    """The events of each month, accumulating hours exactly as Column.step does."""
+    column = self._column(hours)
+    return timeline(self.scenario.plane, column.engine_delta, column.per_month_hours, self.months)
+
+  def _columns(self, hours):
+    """The Column of ``hours`` at the end of each horizon, replayed from its timeline."""
+    plane = self.scenario.plane
+    events = self.quantity('timelines', hours)
+    column = self._column(hours)
+    checkpoints = dict((years * 12, years) for years in self.horizons)
+    snapshots = {}
+
+    for month in range(self.months):
+      if month % 12 == 0:
+        column.depreciation += column.pending_depreciation.pop(month // 12, 0)
+      column.opex += column.monthly_opex
+      column.income += column.monthly_income
+      event = events.get(month, 0)
+      if event & ENGINE_OVERHAUL:
+        column.overhaul(month, plane.engine.overhaul, plane.engine.tbo)
+      if event & PROP_OVERHAUL:
+        column.overhaul(month, plane.prop.overhaul, plane.prop.tbo)
+      if event & INSPECTION:
+        column.opex += plane.annual
+
+      if month + 1 in checkpoints:
+        # Retire spent overhauls at each horizon, as the grid engine does, so that
+        # sale values are identical to its.
+        column.sale_value(month + 1)
+        snapshot = snapshots[checkpoints[month + 1]] = copy.copy(column)
+        snapshot.overhauls = list(column.overhauls)
+        snapshot.overhaul_value = column.overhaul_value.copy()
+
+    return snapshots
+
+  def _profits(self, hours):
+    scenario = self.scenario
+    terms = self.quantity('terms')
+    columns = self.quantity('columns', hours)
+    return [
+        Horizon.profit(columns[years], years * 12, terms[years], scenario.sell)
+        for years in scenario.y_range]
+
+  def rows(self):
+    """Return (hours, row of ``output`` rates) for each hours value, recomputing what is invalid."""
+    scenario = self.scenario
+    self.recomputed = []
+
+    # Drop the columns of hours values no longer in the table.
+    h_range = set(scenario.h_range)
+    for quantity in PER_HOURS:
+      values = self.values[quantity]
+      for hours in [hours for hours in values if hours not in h_range]:
+        del values[hours]
+
+    return [
+        (hours, [rate(value, scenario.output, scenario.part91_hours, years)
+                 for years, value in zip(scenario.y_range, self.quantity('profits', hours))])
+        for hours in scenario.h_range]
+
+
+def session(
+    plane,
+    acquisition,
+    part91_hours,
+    h_range,
+    y_range,
+    output='hourly',
+    usage=UsageModel(),
+    constants=CONSTANTS,
+    sell=False):
+  """Return a Session of the table of ``plane`` over ``h_range`` x ``y_range``."""
+  return Session(Scenario(
+      id=None,
+      plane=plane,
+      acquisition=acquisition,
+      part91_hours=part91_hours,
+      h_range=list(h_range),
+      y_range=list(y_range),
+      usage=usage,
+      constants=constants,
+      sell=sell,
+      output=output))
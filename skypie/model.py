@@ -3,6 +3,7 @@ from __future__ import print_function
 from collections import defaultdict
 import math
 
+from . import stats
 from .balance import (
     Asset,
     Balance,
@@ -37,12 +38,58 @@ def simple(
     ownership_years,
     usage=UsageModel(),  # default usage model = 100% part91/personal usage
     constants=CONSTANTS,
-    sell=False):
+    sell=False,
+    ledger=Balance):
 
   assert ownership_years > 0
-  ownership_months = ownership_years * 12
 
-  acquisition_iterator = acquisition.get(plane.price).iterate_values()
+  balance, = simulate_horizons(
+      plane,
+      acquisition,
+      part91_hours_per_month,
+      part135_hours_per_month,
+      [ownership_years],
+      usage=usage,
+      constants=constants,
+      sell=sell,
+      ledger=ledger)
+
+  return balance
+
+
+def simulate_horizons(
+    plane,
+    acquisition,
+    part91_hours_per_month,
+    part135_hours_per_month,
+    horizons,
+    usage=UsageModel(),
+    constants=CONSTANTS,
+    sell=False,
+    ledger=Balance,
+    observer=None):
+  """Simulate several ownership horizons with a single pass of the month loop.
+
+  The first 12*k months of cash flow are the same for every horizon, so the loop
+  runs once out to the longest horizon and forks the balance sheet as it passes
+  each shorter one.  Only the straight-line depreciation of the plane and its
+  upgrades and the optional sale depend on the horizon; these are booked onto
+  each fork.
+
+  Returns a list of balance sheets of type ``ledger``, one per entry of
+  ``horizons``, each equivalent to ``simple`` with that many ownership years.
+  If given, ``observer.observe(month, balance, engine_hours, prop_hours,
+  hours_since_inspection)`` is called at the end of every month, before the
+  balance sheet ticks.
+  """
+
+  horizons = list(horizons)
+  assert horizons and min(horizons) > 0
+  checkpoints = dict((years * 12, years) for years in horizons)
+  ownership_months = max(checkpoints)
+
+  meterable = acquisition.get(plane.price)
+  principals, interests = meterable.schedule(ownership_months)
 
   yearly_costs = (
       plane.insurance +
@@ -56,7 +103,8 @@ def simple(
   )
 
   # initialize a balance sheet
-  balance = Balance()
+  balance = ledger()
+  balances = {}
 
   depreciations = defaultdict(list)
 
@@ -67,16 +115,13 @@ def simple(
 
   balance += plane_asset
 
-  depreciation_value = plane.price - plane.price * plane.depreciation.at(ownership_months)
-  for year in range(ownership_years):
-    depreciations[year].append(1.0 * depreciation_value / ownership_years)
+  # (price, depreciation model) pairs depreciated straight-line over the horizon
+  straight_line = [(plane.price, plane.depreciation)]
 
   for upgrade in plane.upgrades:
     balance += CapEx(upgrade.price)
     balance += Asset(upgrade.price, upgrade.depreciation)
-    depreciation_value = upgrade.price - upgrade.price * upgrade.depreciation.at(ownership_months)
-    for year in range(ownership_years):
-      depreciations[year].append(1.0 * depreciation_value / ownership_years)
+    straight_line.append((upgrade.price, upgrade.depreciation))
 
   balance += OpEx(plane.price * constants['use_tax'])
 
@@ -91,13 +136,12 @@ def simple(
   per_month_commercial = 1. * part135_hours_per_month
 
   for month in range(ownership_months):
-    principal, interest = next(acquisition_iterator)
-    balance += CapEx(principal)
-    balance += OpEx(interest)
+    balance += CapEx(principals[month])
+    balance += OpEx(interests[month])
 
     if month % 12 == 0:
       balance += OpEx(yearly_costs)
-      for depreciation in depreciations[month / 12]:
+      for depreciation in depreciations[month // 12]:
         balance += Depreciation(depreciation)
 
     engine_hours += 1. * per_month_hobby / usage.hobbs_ratio
@@ -119,9 +163,9 @@ def simple(
           plane.engine.overhaul,
           LinearDepreciation(int(math.ceil(plane.engine.tbo / per_month_hours))))
       balance += CapEx(plane.engine.overhaul)
-      ownership_years = int(math.ceil(plane.engine.tbo / per_year_hours))
-      for year in range(ownership_years):
-        depreciations[month / 12 + year].append(1.0 * plane.engine.overhaul / ownership_years)
+      overhaul_years = int(math.ceil(plane.engine.tbo / per_year_hours))
+      for year in range(overhaul_years):
+        depreciations[month // 12 + year].append(1.0 * plane.engine.overhaul / overhaul_years)
 
     # Same for prop
     if prop_hours > plane.prop.tbo:
@@ -130,9 +174,9 @@ def simple(
           plane.prop.overhaul,
           LinearDepreciation(int(math.ceil(plane.prop.tbo / per_month_hours))))
       balance += CapEx(plane.prop.overhaul)
-      ownership_years = int(math.ceil(plane.prop.tbo / per_year_hours))
-      for year in range(ownership_years):
-        depreciations[month / 12 + year].append(1.0 * plane.prop.overhaul / ownership_years)
+      overhaul_years = int(math.ceil(plane.prop.tbo / per_year_hours))
+      for year in range(overhaul_years):
+        depreciations[month // 12 + year].append(1.0 * plane.prop.overhaul / overhaul_years)
 
     months_since_annual += 1
     hours_since_inspection += per_month_hours
@@ -141,28 +185,45 @@ def simple(
       hours_since_inspection = 0
       balance += OpEx(plane.annual)
 
-    balance.tick()
-
-  if sell:
-    current_month = balance.month
-    sale_income = 0
-
-    # tally remaining principal
-    remaining_principal = 0
-    while True:
-      principal, interest = next(acquisition_iterator)
-      remaining_principal += principal
-      if principal == 0:
-        break
+    if observer is not None:
+      observer.observe(month, balance, engine_hours, prop_hours, hours_since_inspection)
 
-    for month, items in balance.items.items():
-      for item in items:
-        if isinstance(item, Asset):
-          percentage_value = item.depreciation_model.at(current_month - month)
-          if percentage_value > 0:
-            sale_income += item.value * percentage_value
-
-    # could be negative
-    balance += Income(sale_income - remaining_principal)
+    balance.tick()
 
-  return balance
+    if balance.month in checkpoints:
+      years = checkpoints[balance.month]
+      horizon = balance if balance.month == ownership_months else balance.fork()
+      entries = horizon.entries
+      for price, depreciation_model in straight_line:
+        depreciation_value = price - price * depreciation_model.at(balance.month)
+        for year in range(years):
+          horizon.add(Depreciation(1.0 * depreciation_value / years), month=year * 12)
+      stats.increment(stats.DEPRECIATIONS, len(straight_line))
+      if sell:
+        liquidate(horizon, meterable)
+      if horizon is not balance:
+        stats.increment(stats.LEDGER_ITEMS, horizon.entries - entries)
+      balances[years] = horizon
+
+  stats.increment(stats.SCENARIOS, len(horizons))
+  stats.increment(stats.MONTHS, ownership_months)
+  stats.increment(stats.LEDGER_ITEMS, balance.entries)
+
+  return [balances[years] for years in horizons]
+
+
+def liquidate(balance, meterable):
+  """Book the sale of every asset on the balance sheet at its current month."""
+  current_month = balance.month
+  sale_income = 0
+
+  remaining_principal = meterable.remaining(current_month)
+
+  for month, asset in balance.assets():
+    percentage_value = asset.depreciation_model.at(current_month - month)
+    stats.increment(stats.DEPRECIATIONS)
+    if percentage_value > 0:
+      sale_income += asset.value * percentage_value
+
+  # could be negative
+  balance += Income(sale_income - remaining_principal)
@@ -0,0 +1,317 @@
+"""Monte Carlo simulation of ownership outcomes.
+
+``simple`` is deterministic: fixed usage, fuel price, insurance and overhaul
+costs.  Here each path draws its own values for these from a seeded stream, so a
+path is reproducible regardless of how paths are batched across processes, and
+the outcome distribution is summarized by streaming quantile estimators whose
+memory does not grow with the number of paths.
+"""
+
+from collections import namedtuple
+import random
+
+from . import stats
+from .constants import CONSTANTS
+from .grid import AcquisitionSchedule, ArrayColumns, columns_type, Horizon, NumpyColumns, rate
+from .model import UsageModel
+from .parallel import imap
+
+
+DEFAULT_BATCH_SIZE = 256
+DEFAULT_QUANTILES = (0.05, 0.5, 0.95)
+
+
+Path = namedtuple('Path', ('fuel', 'insurance', 'overhaul'))
+
+
+class Distributions(object):
+  """How the stochastic inputs of a path are drawn.
+
+  Part 135 hours are drawn afresh every month, and insurance once per path, both
+  normal with a standard deviation relative to their nominal value, truncated at
+  zero.  Fuel price and the overhaul cost multiplier (applied to engine and prop
+  overhauls) are lognormal around their nominal value.
+  """
+
+  def __init__(self, hours_sd=0.2, fuel_sigma=0.15, insurance_sd=0.1, overhaul_sigma=0.2):
+    self.hours_sd = hours_sd
+    self.fuel_sigma = fuel_sigma
+    self.insurance_sd = insurance_sd
+    self.overhaul_sigma = overhaul_sigma
+
+  @classmethod
+  def truncated_normal(cls, rng, mean, sd, attempts=100):
+    if sd <= 0 or mean <= 0:
+      return max(mean, 0)
+    for _ in range(attempts):
+      value = rng.gauss(mean, mean * sd)
+      if value > 0:
+        return value
+    return mean
+
+  @classmethod
+  def lognormal(cls, rng, mean, sigma):
+    if sigma <= 0:
+      return mean
+    return mean * rng.lognormvariate(-sigma * sigma / 2.0, sigma)
+
+  def draw(self, rng, fuel, insurance):
+    return Path(
+        fuel=self.lognormal(rng, fuel, self.fuel_sigma),
+        insurance=self.truncated_normal(rng, insurance, self.insurance_sd),
+        overhaul=self.lognormal(rng, 1.0, self.overhaul_sigma))
+
+  def hours(self, rng, hours):
+    return self.truncated_normal(rng, hours, self.hours_sd)
+
+  def monthly_hours(self, rng, hours, months):
+    """Equivalent to drawing ``hours`` for each of ``months`` in turn, but draws them together."""
+    if self.hours_sd <= 0 or hours <= 0:
+      return [max(hours, 0)] * months
+    state = rng.getstate()
+    gauss, sd = rng.gauss, hours * self.hours_sd
+    flown = [gauss(hours, sd) for _ in range(months)]
+    if min(flown) > 0:
+      return flown
+    # A month fell at or below zero and redraws, shifting every later month.
+    rng.setstate(state)
+    return [self.hours(rng, hours) for _ in range(months)]
+
+
+def path_rng(seed, path):
+  """The random stream of a single path."""
+  return random.Random('%d:%d' % (seed, path))
+
+
+class P2Quantile(object):
+  """Streaming estimate of a quantile in O(1) memory.
+
+  The P-square algorithm of Jain and Chlamtac keeps five markers whose heights
+  are adjusted with piecewise-parabolic interpolation as observations arrive.
+  """
+
+  def __init__(self, p):
+    self.p = p
+    self.count = 0
+    self.heights = []
+    self.positions = [1, 2, 3, 4, 5]
+    self.desired = [1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5]
+    self.increments = [0, p / 2.0, p, (1 + p) / 2.0, 1]
+
+  def add(self, x):
+    self.count += 1
+    if self.count <= 5:
+      self.heights.append(x)
+      self.heights.sort()
+      return
+
+    q, n = self.heights, self.positions
+    if x < q[0]:
+      q[0], k = x, 0
+    elif x >= q[4]:
+      q[4], k = x, 3
+    else:
+      k = 0
+      while x >= q[k + 1]:
+        k += 1
+
+    for i in range(k + 1, 5):
+      n[i] += 1
+    for i in range(5):
+      self.desired[i] += self.increments[i]
+
+    for i in (1, 2, 3):
+      d = self.desired[i] - n[i]
+      if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+        d = 1 if d > 0 else -1
+        height = self._parabolic(i, d)
+        if not q[i - 1] < height < q[i + 1]:
+          height = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+        q[i] = height
+        n[i] += d
+
+  def _parabolic(self, i, d):
+    q, n = self.heights, self.positions
+    return q[i] + 1.0 * d / (n[i + 1] - n[i - 1]) * (
+        (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i]) +
+        (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+
+  def value(self):
+    if self.count == 0:
+      return None
+    if self.count <= 5:
+      return self.heights[min(len(self.heights) - 1, int(round(self.p * (len(self.heights) - 1))))]
+    return self.heights[2]
+
+
+class Summary(object):
+  """Streaming count, mean, extrema and quantiles of a stream of values."""
+
+  def __init__(self, quantiles=DEFAULT_QUANTILES):
+    self.quantiles = [P2Quantile(p) for p in quantiles]
+    self.count = 0
+    self.total = 0
+    self.minimum = self.maximum = None
+
+  def add(self, value):
+    self.count += 1
+    self.total += value
+    self.minimum = value if self.minimum is None else min(self.minimum, value)
+    self.maximum = value if self.maximum is None else max(self.maximum, value)
+    for quantile in self.quantiles:
+      quantile.add(value)
+
+  @property
+  def mean(self):
+    return self.total / self.count if self.count else None
+
+  def __str__(self):
+    return ' '.join(
+        ['n=%d' % self.count, 'mean=%.2f' % self.mean, 'min=%.2f' % self.minimum] +
+        ['p%g=%.2f' % (quantile.p * 100, quantile.value()) for quantile in self.quantiles] +
+        ['max=%.2f' % self.maximum])
+
+
+class PathColumns(object):
+  """The running state of a batch of paths, mixed into a Columns backend of the grid.
+
+  Each path's fuel price, insurance and overhaul costs are drawn once, and the
+  part 135 hours it flies every month are drawn up front from the path's stream,
+  so that each month then advances all of the paths at once.
+  """
+
+  def __init__(
+      self, plane, part91_hours, part135_hours, usage, constants, months, distributions, rngs,
+      sell=False):
+    draws = [distributions.draw(rng, constants[plane.engine.fuel], plane.insurance) for rng in rngs]
+    flown = [distributions.monthly_hours(rng, part135_hours, months) for rng in rngs]
+    super(PathColumns, self).__init__(
+        plane, part91_hours, [part135_hours] * len(rngs), usage, constants, months, sell=sell)
+    self.flown = [self.vector(hours) for hours in zip(*flown)]
+    self.components = [
+        (tbo, self.vector([component.overhaul * draw.overhaul for draw in draws]), lives, years)
+        for (tbo, _, lives, years), component in zip(self.components, (plane.engine, plane.prop))]
+    # The Horizon charges the nominal insurance, each path pays the difference.
+    self.insurance_delta = self.vector([draw.insurance - plane.insurance for draw in draws])
+    self.hourly_costs = self.vector([
+        plane.performance.gph * draw.fuel + usage.salary for draw in draws])
+    self.usage = usage
+    self.part91_hours = 1. * part91_hours
+    self.part91_total, self.part135_total = 0, self.zeros()
+    self.months_since_annual, self.hours_since_inspection = self.zeros(), self.zeros()
+
+  def step(self, month):
+    hours = self.flown[month]
+    if month % 12 == 0:
+      self.opex = self.add(self.opex, self.insurance_delta)
+    self.part135_delta = self.divide(hours, self.usage.hobbs_ratio)
+    self.monthly_opex = self.multiply(self.hourly_costs, hours)
+    self.monthly_income = self.multiply(hours, self.usage.revenue)
+    self.month_hours = self.add(hours, self.part91_hours)
+    self.part91_total += self.part91_hours
+    self.part135_total = self.add(self.part135_total, hours)
+    super(PathColumns, self).step(month)
+
+  def inspected(self, month):
+    # Hours vary from month to month, so inspections no longer recur with a period.
+    self.months_since_annual = self.add(self.months_since_annual, 1)
+    self.hours_since_inspection = self.add(self.hours_since_inspection, self.month_hours)
+    due = self.union(
+        self.at_least(self.months_since_annual, 12), self.at_least(self.hours_since_inspection, 100))
+    self.assign_at(self.months_since_annual, due, 0)
+    self.assign_at(self.hours_since_inspection, due, 0)
+    return [due]
+
+  def commercial_shares(self):
+    part91_total = self.part91_total
+    return self.vector([
+        1 - part91_total / (part91_total + total) if part91_total + total > 0 else share
+        for total, share in zip(self.tolist(self.part135_total), self.tolist(self.commercial_share))])
+
+
+class ArrayPathColumns(PathColumns, ArrayColumns):
+  pass
+
+
+class NumpyPathColumns(PathColumns, NumpyColumns):
+  pass
+
+
+BACKENDS = {'array': ArrayPathColumns, 'numpy': NumpyPathColumns}
+
+
+def _evaluate_paths(state, paths):
+  """Evaluate a batch of paths as the columns of a single month loop."""
+  plane = state['plane']
+  months = state['years'] * 12
+  schedule = state.get('schedule')
+  if schedule is None:
+    schedule = state['schedule'] = AcquisitionSchedule(state['acquisition'], plane.price, months)
+  horizon = Horizon(plane, schedule, state['constants'])
+
+  rngs = [path_rng(state['seed'], path) for path in range(*paths)]
+  columns = columns_type(len(rngs), state.get('backend'), BACKENDS)(
+      plane,
+      state['part91_hours'],
+      state['part135_hours'],
+      state['usage'],
+      state['constants'],
+      months,
+      state['distributions'],
+      rngs,
+      sell=state['sell'])
+  for month in range(months):
+    columns.step(month)
+
+  stats.increment(stats.SCENARIOS, len(rngs))
+  stats.increment(stats.MONTHS, len(rngs) * months)
+
+  terms = horizon.terms(months, state['sell'])
+  return [
+      rate(profit, state['output'], state['part91_hours'], state['years'])
+      for profit in columns.profits(months, terms, state['sell'])]
+
+
+def montecarlo(
+    plane,
+    acquisition,
+    part91_hours,
+    part135_hours,
+    years,
+    paths=1000,
+    seed=0,
+    distributions=Distributions(),
+    quantiles=DEFAULT_QUANTILES,
+    output='outlay',
+    usage=UsageModel(),
+    constants=CONSTANTS,
+    sell=False,
+    jobs=1,
+    batch_size=DEFAULT_BATCH_SIZE,
+    backend=None):
+  """Simulate ``paths`` stochastic outcomes and return their Summary.
+
+  Paths are evaluated ``batch_size`` at a time across ``jobs`` processes, each
+  batch advancing all of its paths through one month loop as PathColumns over
+  ``backend`` (see grid.columns_type), and folded into the summary as batches
+  complete.
+  """
+  state = dict(
+      plane=plane,
+      acquisition=acquisition,
+      part91_hours=part91_hours,
+      part135_hours=part135_hours,
+      years=years,
+      distributions=distributions,
+      seed=seed,
+      output=output,
+      usage=usage,
+      constants=constants,
+      sell=sell,
+      backend=backend)
+  batches = [(start, min(start + batch_size, paths)) for start in range(0, paths, batch_size)]
+  summary = Summary(quantiles)
+  for values in imap(_evaluate_paths, batches, state=state, jobs=jobs):
+    for value in values:
+      summary.add(value)
+  return summary
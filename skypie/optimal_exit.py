@@ -0,0 +1,101 @@
+"""Search for the month in which selling minimizes the cost of ownership.
+
+``--sell`` values a sale only at the end of each horizon in ``y_range``.  Here a
+single pass of the grid recurrence runs out to the longest horizon, and at the
+end of every month values selling right then: the sale value of the plane,
+upgrades and overhauls, less the remaining loan principal.  Every exit month is
+considered for about the cost of simulating one horizon.
+"""
+
+from collections import namedtuple
+
+from . import stats
+from .constants import CONSTANTS
+from .grid import AcquisitionSchedule, Column, DEFAULT_BATCH_SIZE, Horizon, rate
+from .model import UsageModel
+from .parallel import imap, partition
+
+
+Exit = namedtuple('Exit', ('month', 'value'))
+
+
+def best_exits(
+    plane,
+    acquisition,
+    part91_hours,
+    h_batch,
+    max_months,
+    output='hourly',
+    usage=UsageModel(),
+    constants=CONSTANTS,
+    schedule=None):
+  """Return the best Exit within ``max_months`` for each hours value in ``h_batch``.
+
+  The value of an exit after ``month`` months is the ``output`` rate of the
+  tax adjusted profit of owning for those months and then selling; the best exit
+  has the highest value, i.e. the lowest cost.
+  """
+  assert max_months > 0
+  schedule = schedule or AcquisitionSchedule(acquisition, plane.price, max_months)
+  horizon = Horizon(plane, schedule, constants)
+
+  columns = [Column(plane, part91_hours, hours, usage, constants) for hours in h_batch]
+  best = [None] * len(columns)
+
+  for month in range(max_months):
+    months = month + 1
+    terms = horizon.terms(months, True)
+    for index, column in enumerate(columns):
+      column.step(plane, month)
+      profit = horizon.profit(column, months, terms, True)
+      value = rate(profit, output, part91_hours, months / 12.)
+      if best[index] is None or value > best[index].value:
+        best[index] = Exit(months, value)
+
+  stats.increment(stats.SCENARIOS, len(columns))
+  stats.increment(stats.MONTHS, len(columns) * max_months)
+
+  return best
+
+
+def _exit_rows(state, h_batch):
+  schedule = state.get('schedule')
+  if schedule is None:
+    schedule = state['schedule'] = AcquisitionSchedule(
+        state['acquisition'], state['plane'].price, state['max_months'])
+  return best_exits(
+      state['plane'],
+      state['acquisition'],
+      state['part91_hours'],
+      h_batch,
+      state['max_months'],
+      output=state['output'],
+      usage=state['usage'],
+      constants=state['constants'],
+      schedule=schedule)
+
+
+def optimal_exit(
+    plane,
+    acquisition,
+    part91_hours,
+    h_range,
+    max_years,
+    output='hourly',
+    usage=UsageModel(),
+    constants=CONSTANTS,
+    batch_size=DEFAULT_BATCH_SIZE,
+    jobs=1):
+  """Yield (hours, Exit) for each hours value in ``h_range``, in order."""
+  state = dict(
+      plane=plane,
+      acquisition=acquisition,
+      part91_hours=part91_hours,
+      max_months=max_years * 12,
+      output=output,
+      usage=usage,
+      constants=constants)
+  batches = partition(h_range, jobs, batch_size)
+  for h_batch, exits in zip(batches, imap(_exit_rows, batches, state=state, jobs=jobs)):
+    for hours, exit in zip(h_batch, exits):
+      yield hours, exit
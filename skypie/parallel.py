@@ -0,0 +1,98 @@
+"""Process pool execution of independent model evaluations.
+
+Work is described as a module-level function of (state, task).  The state, e.g.
+the plane, acquisition and constants of a sweep, is pickled once per worker via
+the pool initializer rather than once per task, and results are yielded in task
+order so parallel output is identical to the serial path.
+"""
+
+from collections import deque
+import os
+
+from . import stats
+
+
+# The smallest batch that partition splits work into for a process pool.
+MIN_BATCH_SIZE = 16
+
+_WORKER_STATE = None
+
+
+def cpu_count():
+  try:
+    # os.cpu_count, on python 3, saves importing multiprocessing at startup.
+    return os.cpu_count() or 1
+  except AttributeError:
+    import multiprocessing
+    try:
+      return multiprocessing.cpu_count()
+    except NotImplementedError:
+      return 1
+
+
+def _initialize(state):
+  global _WORKER_STATE
+  _WORKER_STATE = state
+
+
+def _call(function_and_task):
+  function, task = function_and_task
+  since = stats.snapshot()
+  result = function(_WORKER_STATE, task)
+  return result, stats.delta(since)
+
+
+def _result(async_result):
+  result, counters = async_result.get()
+  stats.merge(counters)
+  return result
+
+
+def imap(function, tasks, state=None, jobs=1):
+  """Yield function(state, task) for each task, in order, across ``jobs`` processes.
+
+  ``jobs=None`` uses one process per cpu.  With a single job, or a single task,
+  everything runs in the calling process.
+  """
+  tasks = list(tasks)
+  jobs = min(cpu_count() if jobs is None else jobs, len(tasks))
+
+  if jobs <= 1:
+    for task in tasks:
+      yield function(state, task)
+    return
+
+  # The process pool is only imported once it is needed, to keep it out of startup.
+  # multiprocessing.Pool takes an initializer on every supported python, unlike
+  # ProcessPoolExecutor before python 3.7.
+  import multiprocessing
+
+  # Bound the number of tasks in flight so that results stream at the rate they
+  # are consumed rather than accumulating in memory.
+  pool = multiprocessing.Pool(jobs, _initialize, (state,))
+  try:
+    pending = deque()
+    for task in tasks:
+      pending.append(pool.apply_async(_call, ((function, task),)))
+      if len(pending) >= jobs * 2:
+        yield _result(pending.popleft())
+    while pending:
+      yield _result(pending.popleft())
+  finally:
+    pool.terminate()
+    pool.join()
+
+
+def partition(values, jobs, batch_size):
+  """Split ``values`` into batches of at most ``batch_size``.
+
+  Values that fit in a single batch stay in one, to be evaluated in the calling
+  process, as a pool costs more to start than it saves on small work.  Larger
+  work is split into at least one batch per job, of no fewer than
+  MIN_BATCH_SIZE values.
+  """
+  values = list(values)
+  if jobs != 1 and len(values) > batch_size:
+    jobs = cpu_count() if jobs is None else jobs
+    batch_size = max(1, min(batch_size, max(MIN_BATCH_SIZE, -(-len(values) // jobs))))
+  return [values[offset:offset + batch_size] for offset in range(0, len(values), batch_size)]
@@ -1,3 +1,10 @@
+import sys
+
+try:
+  from collections.abc import Mapping
+except ImportError:  # python 2
+  from collections import Mapping
+
 from .common import (
     Airplane,
     Engine,
@@ -17,30 +24,56 @@ from .upgrades import G500_GTN750
 G1000_SUBSCRIPTION = 1122
 
 
-Diamond_DA40 = Airplane(
-    name='DA40',
-    price=239000,
-    performance=Performance(ktas=135, gph=9),
-    insurance=5580,
-    annual=1600,
-    upgrades=[],
-    engine=Engine(overhaul=24000, tbo=2000, fuel='gas_100ll'),
-    prop=Prop(overhaul=3000, tbo=2000),
-    depreciation=ExponentialDepreciation(0.10, 12),
-    yearly_costs=G1000_SUBSCRIPTION,
-)
+class PlaneRegistry(Mapping):
+  """Planes by name, each built the first time it is looked up rather than at import."""
+
+  def __init__(self, factories):
+    self.factories = dict(factories)
+    self.planes = {}
+
+  def __getitem__(self, name):
+    plane = self.planes.get(name)
+    if plane is None:
+      plane = self.planes[name] = self.factories[name]()
+    return plane
+
+  def __contains__(self, name):
+    return name in self.factories
+
+  def __iter__(self):
+    return iter(self.factories)
+
+  def __len__(self):
+    return len(self.factories)
+
+
+def diamond_da40():
+  return Airplane(
+      name='DA40',
+      price=239000,
+      performance=Performance(ktas=135, gph=9),
+      insurance=5580,
+      annual=1600,
+      upgrades=[],
+      engine=Engine(overhaul=24000, tbo=2000, fuel='gas_100ll'),
+      prop=Prop(overhaul=3000, tbo=2000),
+      depreciation=ExponentialDepreciation(0.10, 12),
+      yearly_costs=G1000_SUBSCRIPTION,
+  )
 
-Cessna_T210 = Airplane(
-    name='T210',
-    price=79000,
-    performance=Performance(ktas=170, gph=18),
-    insurance=8000,
-    annual=9000,
-    upgrades=[G500_GTN750],
-    engine=Engine(overhaul=30000, tbo=1400, fuel='gas_100ll'),
-    prop=Prop(overhaul=4000, tbo=2000),
-    depreciation=ExponentialDepreciation(0.03, 12),
-)
+
+def cessna_t210():
+  return Airplane(
+      name='T210',
+      price=79000,
+      performance=Performance(ktas=170, gph=18),
+      insurance=8000,
+      annual=9000,
+      upgrades=[G500_GTN750],
+      engine=Engine(overhaul=30000, tbo=1400, fuel='gas_100ll'),
+      prop=Prop(overhaul=4000, tbo=2000),
+      depreciation=ExponentialDepreciation(0.03, 12),
+  )
 
 
 """
@@ -113,33 +146,56 @@ PLANES = dict({
 })
 """
 
-Cessna_177RG = Airplane(
-    name='177RG',
-    price=74900,
-    performance=Performance(ktas=170, gph=10),
-    insurance=1500,
-    annual=1500,
-    upgrades=[G500_GTN750],
-    engine=Engine(overhaul=20000, tbo=2000, fuel='gas_100ll'),
-    prop=Prop(overhaul=3000, tbo=2000),
-    depreciation=ExponentialDepreciation(0.03, 12),
-)
-
-Pipistrel_Virus = Airplane(
-    name='Virus',
-    price=125000,
-    performance=Performance(ktas=145, gph=4),
-    insurance=3000,
-    annual=1500,
-    upgrades=[],
-    engine=Engine(overhaul=12000, tbo=2000, fuel='gas_mogas'),
-    prop=Prop(overhaul=3000, tbo=2000),
-    depreciation=ExponentialDepreciation(0.10, 12),
-)
-
-PLANES = dict({
-    'DA40': Diamond_DA40,
-    'T210': Cessna_T210,
-    '177RG': Cessna_177RG,
-    'Virus': Pipistrel_Virus,
-})
+def cessna_177rg():
+  return Airplane(
+      name='177RG',
+      price=74900,
+      performance=Performance(ktas=170, gph=10),
+      insurance=1500,
+      annual=1500,
+      upgrades=[G500_GTN750],
+      engine=Engine(overhaul=20000, tbo=2000, fuel='gas_100ll'),
+      prop=Prop(overhaul=3000, tbo=2000),
+      depreciation=ExponentialDepreciation(0.03, 12),
+  )
+
+
+def pipistrel_virus():
+  return Airplane(
+      name='Virus',
+      price=125000,
+      performance=Performance(ktas=145, gph=4),
+      insurance=3000,
+      annual=1500,
+      upgrades=[],
+      engine=Engine(overhaul=12000, tbo=2000, fuel='gas_mogas'),
+      prop=Prop(overhaul=3000, tbo=2000),
+      depreciation=ExponentialDepreciation(0.10, 12),
+  )
+
+
+PLANES = PlaneRegistry([
+    ('DA40', diamond_da40),
+    ('T210', cessna_t210),
+    ('177RG', cessna_177rg),
+    ('Virus', pipistrel_virus),
+])
+
+# Module level names of the planes in PLANES.
+ALIASES = {
+  'Diamond_DA40': 'DA40',
+  'Cessna_T210': 'T210',
+  'Cessna_177RG': '177RG',
+  'Pipistrel_Virus': 'Virus',
+}
+
+
+def __getattr__(name):
+  if name in ALIASES:
+    return PLANES[ALIASES[name]]
+  raise AttributeError('module %r has no attribute %r' % (__name__, name))
+
+
+if sys.version_info < (3, 7):
+  # Module __getattr__ is python 3.7+, so build the aliased planes at import.
+  globals().update((alias, PLANES[name]) for alias, name in ALIASES.items())
@@ -0,0 +1,140 @@
+"""Sensitivity of the cost of ownership to every numeric input.
+
+Each numeric field of the plane, its performance, engine and prop, the
+acquisition, the usage model and the constants is perturbed down and up by a
+relative ``delta``, holding everything else fixed.  All perturbations are
+evaluated together as one batch of scenarios (see ``batch.evaluate``), and
+ranked by the elasticity of the output, i.e. the percent change in the output
+per percent change in the input, estimated by central differences.
+
+Inputs whose value is zero cannot be perturbed relatively and are skipped.
+Integer inputs, e.g. the financing term, are perturbed by at least one.
+"""
+
+from collections import namedtuple
+
+from .batch import evaluate, Scenario
+from .common import Engine, Prop
+from .constants import CONSTANTS, DEFAULT_DELTA
+from .grid import DEFAULT_BATCH_SIZE, rate
+from .model import UsageModel
+
+
+Sensitivity = namedtuple('Sensitivity', (
+    'parameter',
+    'base',
+    'low',
+    'high',
+    'value_low',
+    'value_high',
+    'elasticity',
+))
+
+
+def _numeric(value):
+  return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def parameters(scenario):
+  """Yield (name, value, replace) for every numeric input of ``scenario``.
+
+  ``replace(value)`` returns a copy of the scenario with the input set to value.
+  """
+  plane, acquisition = scenario.plane, scenario.acquisition
+
+  for field, value in sorted(vars(plane).items()):
+    if _numeric(value):
+      yield 'plane.%s' % field, value, (
+          lambda value, field=field: scenario._replace(plane=plane(**{field: value})))
+
+  for field, value in zip(plane.performance._fields, plane.performance):
+    if _numeric(value):
+      yield 'performance.%s' % field, value, (
+          lambda value, field=field: scenario._replace(
+              plane=plane(performance=plane.performance._replace(**{field: value}))))
+
+  for name, component, klazz in (('engine', plane.engine, Engine), ('prop', plane.prop, Prop)):
+    for field, value in sorted(vars(component).items()):
+      if _numeric(value):
+        yield '%s.%s' % (name, field), value, (
+            lambda value, name=name, field=field, component=component, klazz=klazz: scenario._replace(
+                plane=plane(**{name: klazz(**dict(vars(component), **{field: value}))})))
+
+  for field, value in sorted(vars(acquisition).items()):
+    if _numeric(value):
+      yield 'acquisition.%s' % field, value, (
+          lambda value, field=field: scenario._replace(
+              acquisition=acquisition.__class__(**dict(vars(acquisition), **{field: value}))))
+
+  for field, value in sorted(vars(scenario.usage).items()):
+    if _numeric(value):
+      yield 'usage.%s' % field, value, (
+          lambda value, field=field: scenario._replace(
+              usage=UsageModel(**dict(vars(scenario.usage), **{field: value}))))
+
+  for field, value in sorted(scenario.constants.items()):
+    if _numeric(value):
+      yield 'constants.%s' % field, value, (
+          lambda value, field=field: scenario._replace(
+              constants=dict(scenario.constants, **{field: value})))
+
+
+def perturb(value, delta):
+  """Return the (low, high) values of ``value`` perturbed by a relative ``delta``."""
+  low, high = value * (1 - delta), value * (1 + delta)
+  if isinstance(value, int):
+    low, high = int(round(low)), int(round(high))
+    low, high = min(low, value - 1), max(high, value + 1)
+  return low, high
+
+
+def sensitivity(
+    plane,
+    acquisition,
+    part91_hours,
+    part135_hours,
+    years,
+    delta=DEFAULT_DELTA,
+    output='outlay',
+    usage=UsageModel(),
+    constants=CONSTANTS,
+    sell=False,
+    jobs=1,
+    batch_size=DEFAULT_BATCH_SIZE):
+  """Return (base output, Sensitivity of every input), most sensitive first."""
+  base = Scenario(
+      id=None,
+      plane=plane,
+      acquisition=acquisition,
+      part91_hours=part91_hours,
+      h_range=[part135_hours],
+      y_range=[years],
+      usage=usage,
+      constants=constants,
+      sell=sell,
+      output=output)
+
+  perturbations = []
+  scenarios = [base]
+  for name, value, replace in parameters(base):
+    if value == 0:
+      continue
+    low, high = perturb(value, delta)
+    perturbations.append((name, value, low, high))
+    scenarios.extend([replace(low), replace(high)])
+
+  values = [
+      rate(rows[0][0], output, part91_hours, years)
+      for _, rows in evaluate(scenarios, jobs=jobs, batch_size=batch_size)]
+  base_value, values = values[0], values[1:]
+
+  results = []
+  for index, (name, value, low, high) in enumerate(perturbations):
+    value_low, value_high = values[2 * index], values[2 * index + 1]
+    elasticity = None
+    if base_value != 0:
+      elasticity = ((value_high - value_low) / base_value) / (1.0 * (high - low) / value)
+    results.append(Sensitivity(name, value, low, high, value_low, value_high, elasticity))
+
+  results.sort(key=lambda result: -abs(result.elasticity or 0))
+  return base_value, results
@@ -0,0 +1,358 @@
+"""A long-running HTTP/JSON service for the table, sample, breakeven and compare models.
+
+Requests are POSTed as JSON objects in the form of batch scenarios (see
+``skypie.batch``), e.g.::
+
+  POST /table     {"plane": "DA40", "part91_hours": 10, "hours": "10,100,10", "years": [1, 5]}
+  POST /sample    {"plane": "DA40", "part91_hours": 10, "hours": 40, "years": 5}
+  POST /breakeven {"plane": "DA40", "part91_hours": 10, "target": -285, "years": "1,10,1"}
+  POST /compare   {"planes": ["DA40", "T210"], "part91_hours": 10, "hours": 40, "years": 5}
+  GET  /planes
+  GET  /stats
+
+The models run in a pool of worker processes, so the event loop keeps serving
+while a sweep is computed.  Each worker keeps its parsed planes and the grid
+and balance sheet caches warm between requests, and the server keeps the
+encoded responses of recent requests.  Concurrent identical requests are
+coalesced: the first starts the computation and the rest await its result.
+
+This module requires python 3.
+"""
+
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+import json
+import multiprocessing
+import signal
+
+from .balance import CATEGORIES, tax_adjusted_profit
+from .batch import Parser, ScenarioError
+from .cache import cached_simple, GRID_CACHE, LRUCache
+from .compare import iterate_compare
+from .grid import iterate_grid, rate
+from .parallel import cpu_count
+from .planes import PLANES
+from .solver import breakeven_hours, breakeven_years, NoBreakeven
+
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8080
+DEFAULT_RESULTS = 1024
+MAX_BODY = 1 << 20
+
+
+class RequestError(ValueError):
+  def __init__(self, status, message):
+    super(RequestError, self).__init__(message)
+    self.status = status
+
+
+# Worker process state, warm between requests.
+_PARSER = Parser()
+
+
+def _single(name, values):
+  if len(values) != 1:
+    raise ScenarioError('%s must be a single value' % name)
+  return values[0]
+
+
+def table(record):
+  scenario = _PARSER.parse(record)
+  rows = iterate_grid(
+      scenario.plane,
+      scenario.acquisition,
+      scenario.part91_hours,
+      scenario.h_range,
+      scenario.y_range,
+      usage=scenario.usage,
+      constants=scenario.constants,
+      sell=scenario.sell,
+      cache=GRID_CACHE)
+  return dict(
+      output=scenario.output,
+      hours=list(scenario.h_range),
+      years=list(scenario.y_range),
+      values=[[rate(value, scenario.output, scenario.part91_hours, years)
+               for years, value in zip(scenario.y_range, row)]
+              for _, row in rows])
+
+
+def sample(record):
+  scenario = _PARSER.parse(record)
+  part135_hours = _single('hours', scenario.h_range)
+  years = _single('years', scenario.y_range)
+  balance = cached_simple(
+      scenario.plane,
+      scenario.acquisition,
+      scenario.part91_hours,
+      part135_hours,
+      years,
+      usage=scenario.usage,
+      constants=scenario.constants,
+      sell=scenario.sell)
+  hours = scenario.part91_hours + part135_hours
+  part91_percentage = 1. * scenario.part91_hours / hours if hours else 1.0
+
+  def summary(**kw):
+    totals = dict(
+        (klazz.__name__.lower(), balance.sum(item_klazz=klazz, **kw)) for klazz in CATEGORIES)
+    totals['profit'] = tax_adjusted_profit(balance, part91_percentage=part91_percentage, **kw)
+    return totals
+
+  return dict(
+      years=[dict(year=year, **summary(year=year)) for year in range(years + 1)],
+      aggregate=summary())
+
+
+def breakeven(record):
+  try:
+    target = float(record['target'])
+  except KeyError:
+    raise ScenarioError('Missing target')
+  except (TypeError, ValueError):
+    raise ScenarioError('Invalid target %r' % (record['target'],))
+  solve_for = record.get('solve_for', 'hours')
+
+  if solve_for == 'hours':
+    scenario = _PARSER.parse(dict(record, hours=0))
+    results = []
+    for years in scenario.y_range:
+      try:
+        hours, evaluations = breakeven_hours(
+            scenario.plane,
+            scenario.acquisition,
+            scenario.part91_hours,
+            years,
+            target,
+            output=scenario.output,
+            usage=scenario.usage,
+            constants=scenario.constants,
+            sell=scenario.sell)
+      except NoBreakeven:
+        hours, evaluations = None, None
+      results.append(dict(years=years, hours=hours, evaluations=evaluations))
+    return dict(solve_for=solve_for, target=target, output=scenario.output, results=results)
+
+  if solve_for == 'years':
+    max_years = record.get('max_years', 30)
+    scenario = _PARSER.parse(dict(record, years=max_years))
+    results = [
+        dict(hours=hours, years=years)
+        for hours, years in breakeven_years(
+            scenario.plane,
+            scenario.acquisition,
+            scenario.part91_hours,
+            scenario.h_range,
+            target,
+            max_years,
+            output=scenario.output,
+            usage=scenario.usage,
+            constants=scenario.constants,
+            sell=scenario.sell)]
+    return dict(solve_for=solve_for, target=target, output=scenario.output, results=results)
+
+  raise ScenarioError('Unknown solve_for %r' % (solve_for,))
+
+
+def compare(record):
+  specs = record.get('planes', sorted(PLANES))
+  if not isinstance(specs, list) or not specs:
+    raise ScenarioError('planes must be a non-empty list')
+  scenario = _PARSER.parse(dict(record, plane=specs[0]))
+  planes = [_PARSER.plane(spec) for spec in specs]
+  rows = iterate_compare(
+      planes,
+      scenario.acquisition,
+      scenario.part91_hours,
+      scenario.h_range,
+      scenario.y_range,
+      output=scenario.output,
+      usage=scenario.usage,
+      constants=scenario.constants,
+      sell=scenario.sell)
+  return dict(
+      output=scenario.output,
+      hours=list(scenario.h_range),
+      years=list(scenario.y_range),
+      rankings=[[ranking._asdict() for ranking in rankings] for _, rankings, _ in rows],
+      values=[values for _, _, values in rows])
+
+
+ENDPOINTS = {
+  '/table': table,
+  '/sample': sample,
+  '/breakeven': breakeven,
+  '/compare': compare,
+}
+
+
+def compute(path, record):
+  """Evaluate ``record`` at the endpoint ``path`` and return the encoded JSON response."""
+  return json.dumps(ENDPOINTS[path](record)).encode('utf-8')
+
+
+class Server(object):
+  """Serves the ENDPOINTS from a pool of ``jobs`` worker processes."""
+
+  REASONS = {
+    200: 'OK',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    413: 'Payload Too Large',
+    500: 'Internal Server Error',
+  }
+
+  def __init__(self, jobs=None, results=DEFAULT_RESULTS):
+    self.jobs = jobs or cpu_count()
+    self.executor = None
+    self.results = LRUCache(maxsize=results)
+    self.pending = {}
+    self.requests = self.computed = self.coalesced = 0
+
+  def start(self):
+    if self.executor is None:
+      # Workers are started on demand, once connections are open.  Forked from
+      # this process they would inherit those sockets and hold them open after
+      # the server closes them, so fork them from a clean server process instead.
+      context = None
+      if 'forkserver' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('forkserver')
+      self.executor = ProcessPoolExecutor(max_workers=self.jobs, mp_context=context)
+
+  def close(self):
+    if self.executor is not None:
+      self.executor.shutdown()
+      self.executor = None
+
+  def stats(self):
+    return dict(
+        jobs=self.jobs,
+        requests=self.requests,
+        computed=self.computed,
+        coalesced=self.coalesced,
+        pending=len(self.pending),
+        results=self.results.stats())
+
+  async def result(self, path, record):
+    """The encoded response to ``record`` at ``path``, shared by concurrent identical requests."""
+    key = (path, json.dumps(record, sort_keys=True))
+    response = self.results.get(key, LRUCache.MISSING)
+    if response is not LRUCache.MISSING:
+      return response
+    future = self.pending.get(key)
+    if future is None:
+      future = self.pending[key] = asyncio.ensure_future(self._compute(key, path, record))
+    else:
+      self.coalesced += 1
+    # A client that goes away must not cancel a computation that others await.
+    return await asyncio.shield(future)
+
+  async def _compute(self, key, path, record):
+    self.start()
+    try:
+      response = await asyncio.get_event_loop().run_in_executor(
+          self.executor, compute, path, record)
+    finally:
+      del self.pending[key]
+    self.computed += 1
+    self.results.put(key, response)
+    return response
+
+  async def dispatch(self, method, path, body):
+    """Return the (status, encoded JSON) response to a request."""
+    if path == '/planes':
+      return 200, json.dumps(sorted(PLANES)).encode('utf-8')
+    if path == '/stats':
+      return 200, json.dumps(self.stats()).encode('utf-8')
+    if path not in ENDPOINTS:
+      raise RequestError(404, 'Unknown endpoint %s' % path)
+    if method != 'POST':
+      raise RequestError(405, '%s requires POST' % path)
+    try:
+      record = json.loads(body.decode('utf-8'))
+    except ValueError as e:
+      raise RequestError(400, 'Invalid JSON: %s' % e)
+    if not isinstance(record, dict):
+      raise RequestError(400, 'A request must be a JSON object')
+    try:
+      return 200, await self.result(path, record)
+    except ScenarioError as e:
+      raise RequestError(400, str(e))
+
+  async def handle(self, reader, writer):
+    """Serve the HTTP/1.1 requests of a connection until it is closed."""
+    try:
+      while True:
+        request_line = await reader.readline()
+        if not request_line.strip():
+          break
+        headers = {}
+        while True:
+          line = await reader.readline()
+          if not line.strip():
+            break
+          name, _, value = line.decode('latin-1').partition(':')
+          headers[name.strip().lower()] = value.strip()
+
+        keep_alive = headers.get('connection', '').lower() != 'close'
+        try:
+          method, target, version = request_line.decode('latin-1').split()
+          keep_alive = keep_alive and version == 'HTTP/1.1'
+          length = int(headers.get('content-length', 0))
+          if length > MAX_BODY:
+            keep_alive = False
+            raise RequestError(413, 'Request body exceeds %d bytes' % MAX_BODY)
+          body = await reader.readexactly(length)
+          self.requests += 1
+          status, response = await self.dispatch(method, target.partition('?')[0], body)
+        except RequestError as e:
+          status, response = e.status, json.dumps(dict(error=str(e))).encode('utf-8')
+        except ValueError:
+          keep_alive = False
+          status, response = 400, json.dumps(dict(error='Malformed request')).encode('utf-8')
+        except Exception as e:
+          status, response = 500, json.dumps(dict(error=repr(e))).encode('utf-8')
+
+        writer.write((
+            'HTTP/1.1 %d %s\r\n'
+            'Content-Type: application/json\r\n'
+            'Content-Length: %d\r\n'
+            'Connection: %s\r\n'
+            '\r\n' % (status, self.REASONS[status], len(response),
+                      'keep-alive' if keep_alive else 'close')).encode('latin-1'))
+        writer.write(response)
+        await writer.drain()
+        if not keep_alive:
+          break
+    except (asyncio.IncompleteReadError, ConnectionError):
+      pass
+    finally:
+      writer.close()
+
+  async def serve(self, host=DEFAULT_HOST, port=DEFAULT_PORT, ready=None):
+    """Serve until cancelled or terminated; ``ready(sockets)`` is called once listening."""
+    self.start()
+    server = await asyncio.start_server(self.handle, host, port)
+    loop = asyncio.get_event_loop()
+    try:
+      # Shut the workers down on SIGTERM too, rather than leave them holding the socket.
+      loop.add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+    except (NotImplementedError, RuntimeError):
+      pass
+    try:
+      if ready is not None:
+        ready(server.sockets)
+      async with server:
+        await server.serve_forever()
+    finally:
+      self.close()
+
+
+def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, jobs=None, results=DEFAULT_RESULTS, ready=None):
+  """Run a Server on ``host``:``port`` until interrupted."""
+  try:
+    asyncio.run(Server(jobs=jobs, results=results).serve(host, port, ready=ready))
+  except (KeyboardInterrupt, asyncio.CancelledError):
+    pass
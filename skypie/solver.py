@@ -0,0 +1,177 @@
+"""Root finding for breakeven points.
+
+Rather than tabulating a dense grid and looking for the color change, bracket
+the crossover and close in on it with Brent's method.  The model is piecewise
+smooth -- overhauls and inspections introduce steps -- so a "root" may also be
+the location of a step across the target; Brent's method falls back to
+bisection there and still converges.
+"""
+
+from .constants import CONSTANTS
+from .grid import evaluate_batch, iterate_grid, rate
+from .model import UsageModel
+
+
+DEFAULT_XTOL = 1e-3
+DEFAULT_MAX_HOURS = 100000
+
+
+class NoBreakeven(ValueError):
+  pass
+
+
+class Counter(object):
+  """Wrap a function of one variable and count its evaluations."""
+
+  def __init__(self, function):
+    self.function = function
+    self.evaluations = 0
+
+  def __call__(self, x):
+    self.evaluations += 1
+    return self.function(x)
+
+
+def bracket(function, low, high, limit, factor=2.0):
+  """Grow [low, high] geometrically until function changes sign across it.
+
+  Returns (low, f(low), high, f(high)) or raises NoBreakeven once high passes limit.
+  """
+  f_low, f_high = function(low), function(high)
+  while f_low * f_high > 0:
+    if high >= limit:
+      raise NoBreakeven('No sign change in [%s, %s]' % (low, limit))
+    low, f_low = high, f_high
+    high = min(high * factor, limit)
+    f_high = function(high)
+  return low, f_low, high, f_high
+
+
+def brent(function, a, b, f_a=None, f_b=None, xtol=DEFAULT_XTOL, maxiter=100):
+  """Find x in [a, b] with function(x) == 0 by Brent's method.
+
+  function(a) and function(b) must have opposite signs.
+  """
+  f_a = function(a) if f_a is None else f_a
+  f_b = function(b) if f_b is None else f_b
+  if f_a * f_b > 0:
+    raise NoBreakeven('Root is not bracketed by [%s, %s]' % (a, b))
+  if f_a == 0:
+    return a
+  if f_b == 0:
+    return b
+
+  if abs(f_a) < abs(f_b):
+    a, b, f_a, f_b = b, a, f_b, f_a
+  c, f_c, d = a, f_a, a
+  bisected = True
+
+  for _ in range(maxiter):
+    if f_b == 0 or abs(b - a) <= xtol:
+      break
+
+    if f_a != f_c and f_b != f_c:
+      # inverse quadratic interpolation
+      s = (a * f_b * f_c / ((f_a - f_b) * (f_a - f_c)) +
+           b * f_a * f_c / ((f_b - f_a) * (f_b - f_c)) +
+           c * f_a * f_b / ((f_c - f_a) * (f_c - f_b)))
+    else:
+      # secant
+      s = b - f_b * (b - a) / (f_b - f_a)
+
+    step = abs(b - c) if bisected else abs(c - d)
+    if (not min((3 * a + b) / 4.0, b) < s < max((3 * a + b) / 4.0, b) or
+        abs(s - b) >= step / 2.0 or
+        step < xtol):
+      s = (a + b) / 2.0
+      bisected = True
+    else:
+      bisected = False
+
+    f_s = function(s)
+    c, f_c, d = b, f_b, c
+    if f_a * f_s < 0:
+      b, f_b = s, f_s
+    else:
+      a, f_a = s, f_s
+    if abs(f_a) < abs(f_b):
+      a, b, f_a, f_b = b, a, f_b, f_a
+
+  return b
+
+
+def breakeven_hours(
+    plane,
+    acquisition,
+    part91_hours,
+    years,
+    target,
+    output='hourly',
+    usage=UsageModel(),
+    constants=CONSTANTS,
+    sell=False,
+    low=0,
+    high=100,
+    limit=DEFAULT_MAX_HOURS,
+    xtol=DEFAULT_XTOL):
+  """Find the part 135 hours per month at which ``output`` equals ``target``.
+
+  Returns (hours, evaluations).  Raises NoBreakeven if there is no crossover
+  below ``limit`` hours.
+  """
+  if part91_hours == 0:
+    low = max(low, xtol)
+
+  def excess(hours):
+    profit, = evaluate_batch(
+        plane,
+        acquisition,
+        part91_hours,
+        [hours],
+        [years],
+        usage=usage,
+        constants=constants,
+        sell=sell)[0]
+    return rate(profit, output, part91_hours, years) - target
+
+  function = Counter(excess)
+  low, f_low, high, f_high = bracket(function, low, max(high, low + xtol), limit)
+  return brent(function, low, high, f_a=f_low, f_b=f_high, xtol=xtol), function.evaluations
+
+
+def breakeven_years(
+    plane,
+    acquisition,
+    part91_hours,
+    h_range,
+    target,
+    max_years,
+    output='hourly',
+    usage=UsageModel(),
+    constants=CONSTANTS,
+    sell=False,
+    jobs=1):
+  """Yield (hours, years) with the first ownership horizon at which ``output`` reaches ``target``.
+
+  Every horizon of an hours value comes out of the same single pass of the grid
+  engine, so this costs one simulation of ``max_years`` per hours value.
+  years is 1 if ``output`` already meets or beats ``target`` after a year, and
+  None if it does not within ``max_years``.
+  """
+  y_range = list(range(1, max_years + 1))
+  for hours, row in iterate_grid(
+      plane,
+      acquisition,
+      part91_hours,
+      h_range,
+      y_range,
+      usage=usage,
+      constants=constants,
+      sell=sell,
+      jobs=jobs):
+    crossover = None
+    for years, value in zip(y_range, row):
+      if rate(value, output, part91_hours, years) >= target:
+        crossover = years
+        break
+    yield hours, crossover
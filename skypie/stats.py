@@ -0,0 +1,61 @@
+"""Lightweight, always-on counters and phase timers.
+
+Counters are incremented once per simulation or batch rather than per month or
+per ledger entry, so they cost nothing measurable on the hot paths.  Work done
+in pool workers is counted in the parent (see parallel.imap); phase timers
+only measure the calling process.
+"""
+
+from collections import defaultdict
+from contextlib import contextmanager
+import timeit
+
+
+COUNTERS = defaultdict(int)
+TIMERS = defaultdict(float)
+
+# Counter names
+SCENARIOS = 'scenarios evaluated'
+MONTHS = 'months simulated'
+LEDGER_ITEMS = 'ledger items created'
+DEPRECIATIONS = 'depreciation evaluations'
+EVENTS = 'events simulated'
+
+
+def increment(name, amount=1):
+  COUNTERS[name] += amount
+
+
+@contextmanager
+def phase(name):
+  """Accumulate the wall time spent in the block under ``name``."""
+  start = timeit.default_timer()
+  try:
+    yield
+  finally:
+    TIMERS[name] += timeit.default_timer() - start
+
+
+def snapshot():
+  return dict(COUNTERS)
+
+
+def delta(since):
+  """The counters accumulated since ``snapshot()`` returned ``since``."""
+  return dict((name, value - since.get(name, 0)) for name, value in COUNTERS.items())
+
+
+def merge(counters):
+  for name, value in counters.items():
+    COUNTERS[name] += value
+
+
+def reset():
+  COUNTERS.clear()
+  TIMERS.clear()
+
+
+def summary():
+  lines = ['%-28s %d' % (name + ':', value) for name, value in sorted(COUNTERS.items())]
+  lines.extend('%-28s %.3fs' % ('time in %s:' % name, value) for name, value in sorted(TIMERS.items()))
+  return '\n'.join(lines)
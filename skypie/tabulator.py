@@ -1,6 +1,6 @@
 from __future__ import print_function
 
-from colors import white
+import sys
 
 
 DEFAULT_Y_RANGE = [y + 1 for y in range(0, 10)]
@@ -14,14 +14,7 @@ class Tabulations:
   CAPEX  = 4
 
 
-def table(
-    plane,
-    acquisition,
-    model,
-    y_range=None,
-    h_range=None,
-    colorant=None):
-
+def header(plane, acquisition, y_range):
   print('Plane:        %s' % plane)
   print('Fixed yearly: %s/yr' % plane.yearly_costs)
   print('Acquisition:  %s' % acquisition)
@@ -31,24 +24,35 @@ def table(
     for upgrade in plane.upgrades:
       print('  %s: %s, %s' % (upgrade.name, upgrade.price, upgrade.depreciation))
 
-  y_range = y_range or DEFAULT_Y_RANGE
-  h_range = h_range or DEFAULT_H_RANGE
+  print('%5s ' % '' + ''.join('%10d ' % years for years in y_range))
 
-  print('%5s ' % '', end='')
-  for years in y_range:
-    print('%10d ' % years, end='')
-  print('')
 
-  for hours in h_range:
-    print('%5d ' % hours, end='')
+def format_row(hours, rates, colorant=None):
+  """Render one row of the table, a line per hours value."""
+  # colors is imported only once colorized output is rendered.
+  from colors import white
+  cells = ['%5d ' % hours]
+  for rate in rates:
+    srate = '%10s ' % ('%-.2f' % rate)
+    color = colorant(rate) if colorant is not None else white
+    cells.append(color(srate))
+  cells.append('\n')
+  return ''.join(cells)
 
-    for years in y_range:
-      rate = model(plane, acquisition, hours, years)
-      srate = '%-.2f' % rate
-      srate = '%10s ' % srate
 
-      color = colorant(rate) if colorant is not None else white
+def table(
+    plane,
+    acquisition,
+    model,
+    y_range=None,
+    h_range=None,
+    colorant=None):
 
-      print(color(srate), end='')
+  y_range = y_range or DEFAULT_Y_RANGE
+  h_range = h_range or DEFAULT_H_RANGE
 
-    print('')
+  header(plane, acquisition, y_range)
+
+  for hours in h_range:
+    rates = [model(plane, acquisition, hours, years) for years in y_range]
+    sys.stdout.write(format_row(hours, rates, colorant=colorant))
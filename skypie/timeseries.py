@@ -0,0 +1,116 @@
+"""Per-month time series of a ``simple`` simulation.
+
+A Recorder observes the month loop of ``simulate_horizons`` and appends a row
+per month to a columnar TimeSeries: the month's cash flows by category, the
+cumulative outlay, the book value of the plane, each upgrade and the overhauls,
+the loan balance, and engine, prop and inspection hours.  Each row is read off
+the running state of the simulation in O(assets), so a multi-decade series
+costs one simulation pass rather than O(months^2) ledger queries.
+"""
+
+from array import array
+from collections import OrderedDict
+
+from .balance import Balance, CATEGORIES, CapEx, Hobby, Income, OpEx
+from .constants import CONSTANTS
+from .grid import OverhaulValue
+from .model import simulate_horizons, UsageModel
+
+
+class TimeSeries(object):
+  """A columnar frame with one typed array per column and a row per month.
+
+  Columns are floats unless ``typecodes`` maps them to another array typecode,
+  e.g. 'i' for the month.
+  """
+
+  def __init__(self, columns, typecodes=None):
+    typecodes = typecodes or {}
+    self.data = OrderedDict((column, array(typecodes.get(column, 'd'))) for column in columns)
+
+  @property
+  def columns(self):
+    return list(self.data)
+
+  def append(self, row):
+    for values, value in zip(self.data.values(), row):
+      values.append(value)
+
+  def column(self, name):
+    return self.data[name]
+
+  def rows(self):
+    return zip(*self.data.values())
+
+  def __len__(self):
+    return len(self.data['month'])
+
+
+class Recorder(object):
+  """Observes simulate_horizons, recording a TimeSeries row at the end of every month."""
+
+  # Depreciation is not a cash flow, and is only booked for the plane and
+  # upgrades once the horizon is known.
+  CASH = (CapEx, OpEx, Income, Hobby)
+  CASH_OUT = tuple(CATEGORIES.index(klazz) for klazz in (CapEx, OpEx, Hobby))
+  INCOME = CATEGORIES.index(Income)
+
+  def __init__(self, plane, meterable):
+    self.plane, self.meterable = plane, meterable
+    self.fixed_assets = 1 + len(plane.upgrades)
+    self.assets_seen = 0
+    self.overhauls = OverhaulValue()
+    self.outlay = 0
+    self.zeros = [0] * len(CATEGORIES)
+    self.series = TimeSeries(
+        ['month'] +
+        [klazz.__name__.lower() for klazz in self.CASH] +
+        ['outlay', 'loan_balance', 'plane_value'] +
+        ['upgrade_value:%s' % upgrade.name for upgrade in plane.upgrades] +
+        ['overhaul_value', 'engine_hours', 'prop_hours', 'hours_since_inspection'],
+        typecodes={'month': 'i'})
+
+  def observe(self, month, balance, engine_hours, prop_hours, hours_since_inspection):
+    months = month + 1
+    rollups = balance.rollups
+
+    assets = rollups.assets
+    for asset in assets[max(self.assets_seen, self.fixed_assets):]:
+      self.overhauls.add(month, asset.value, asset.depreciation_model)
+    self.assets_seen = len(assets)
+
+    totals = rollups.by_month.get(month, self.zeros)
+    self.outlay += sum(totals[category] for category in self.CASH_OUT) - totals[self.INCOME]
+
+    self.series.append(
+        [month] +
+        [totals[CATEGORIES.index(klazz)] for klazz in self.CASH] +
+        [self.outlay,
+         self.meterable.remaining(months),
+         self.plane.value * self.plane.depreciation.at(months)] +
+        [upgrade.price * upgrade.depreciation.at(months) for upgrade in self.plane.upgrades] +
+        [self.overhauls.value(months), engine_hours, prop_hours, hours_since_inspection])
+
+
+def timeseries(
+    plane,
+    acquisition,
+    part91_hours_per_month,
+    part135_hours_per_month,
+    ownership_years,
+    usage=UsageModel(),
+    constants=CONSTANTS,
+    ledger=Balance):
+  """Simulate ``ownership_years`` of ``simple`` and return its TimeSeries."""
+  recorder = Recorder(plane, acquisition.get(plane.price))
+  simulate_horizons(
+      plane,
+      acquisition,
+      part91_hours_per_month,
+      part135_hours_per_month,
+      [ownership_years],
+      usage=usage,
+      constants=constants,
+      ledger=ledger,
+      observer=recorder)
+  return recorder.series
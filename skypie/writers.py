@@ -0,0 +1,118 @@
+"""Streaming writers for machine-readable output.
+
+A writer is given its column names up front and then one row at a time.  Rows
+go straight to a buffered stream as they arrive, so a sweep of any size can be
+piped into downstream tools in constant memory and without parsing ANSI tables.
+"""
+
+from collections import OrderedDict
+import csv
+import json
+
+
+FORMATS = ('text', 'csv', 'jsonl', 'arrow')
+DEFAULT_ARROW_BATCH_SIZE = 1024
+
+
+class Writer(object):
+  binary = False
+
+  def __init__(self, stream, columns):
+    self.stream = stream
+    self.columns = tuple(columns)
+
+  def write(self, row):
+    raise NotImplementedError
+
+  def close(self):
+    self.stream.flush()
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exc_type, exc_value, traceback):
+    self.close()
+
+
+class CsvWriter(Writer):
+  def __init__(self, stream, columns):
+    super(CsvWriter, self).__init__(stream, columns)
+    self.writer = csv.writer(stream, lineterminator='\n')
+    self.writer.writerow(self.columns)
+
+  def write(self, row):
+    self.writer.writerow(row)
+
+
+class JsonLinesWriter(Writer):
+  def write(self, row):
+    self.stream.write(json.dumps(OrderedDict(zip(self.columns, row))))
+    self.stream.write('\n')
+
+
+def import_pyarrow():
+  """Import pyarrow, which is optional and slow to import, on first use."""
+  try:
+    import pyarrow
+    import pyarrow.ipc
+  except ImportError:
+    raise ImportError('The arrow format requires pyarrow.')
+  return pyarrow
+
+
+class ArrowWriter(Writer):
+  """Writes an Arrow IPC stream, one record batch per ``batch_size`` rows.
+
+  The schema is inferred from the first batch.
+  """
+
+  binary = True
+
+  def __init__(self, stream, columns, batch_size=DEFAULT_ARROW_BATCH_SIZE):
+    self.pyarrow = import_pyarrow()
+    super(ArrowWriter, self).__init__(stream, columns)
+    self.batch_size = batch_size
+    self.rows = []
+    self.schema = self.writer = None
+
+  def write(self, row):
+    self.rows.append(row)
+    if len(self.rows) >= self.batch_size:
+      self.flush()
+
+  def flush(self):
+    if not self.rows:
+      return
+    arrays = [list(column) for column in zip(*self.rows)]
+    if self.schema is None:
+      batch = self.pyarrow.record_batch(arrays, names=list(self.columns))
+      self.schema = batch.schema
+      self.writer = self.pyarrow.ipc.new_stream(self.stream, self.schema)
+    else:
+      batch = self.pyarrow.record_batch(arrays, schema=self.schema)
+    self.writer.write_batch(batch)
+    self.rows = []
+
+  def close(self):
+    self.flush()
+    if self.writer is not None:
+      self.writer.close()
+    super(ArrowWriter, self).close()
+
+
+WRITERS = {
+  'csv': CsvWriter,
+  'jsonl': JsonLinesWriter,
+  'arrow': ArrowWriter,
+}
+
+
+def writer(format, stream, columns):
+  """Return a Writer of ``format`` over ``stream``.
+
+  Binary formats write to the underlying buffer of a text stream.
+  """
+  klazz = WRITERS[format]
+  if klazz.binary:
+    stream = getattr(stream, 'buffer', stream)
+  return klazz(stream, columns)
@@ -0,0 +1,46 @@
+import itertools
+
+import pytest
+
+from skypie.acquisition import AllCash, Mortgage
+from skypie.common import Meterable
+
+
+ACQUISITIONS = [AllCash(), Mortgage(0.15, 120, 0.0625), Mortgage(0.2, 240, 0.08), Mortgage(0, 12, 0.03)]
+PRICE = 239000
+
+
+def iterative(meterable, months):
+  return list(itertools.islice(meterable.iterate_values(), months))
+
+
+@pytest.mark.parametrize('acquisition', ACQUISITIONS, ids=str)
+def test_payments_match_iterate_values(acquisition):
+  meterable = acquisition.get(PRICE)
+  values = iterative(meterable, 300)
+  for month, expected in enumerate(values):
+    assert meterable.payment(month) == pytest.approx(expected, abs=1e-6)
+    assert Meterable.payment(meterable, month) == pytest.approx(expected, abs=1e-6)
+
+
+@pytest.mark.parametrize('acquisition', ACQUISITIONS, ids=str)
+def test_cumulative_and_remaining_match_iterate_values(acquisition):
+  meterable = acquisition.get(PRICE)
+  values = iterative(meterable, 300)
+  for start, stop in [(0, 0), (0, 1), (0, 12), (1, 13), (5, 120), (100, 250), (0, 300), (250, 300)]:
+    expected = (sum(p for p, _ in values[start:stop]), sum(i for _, i in values[start:stop]))
+    assert meterable.cumulative(start, stop) == pytest.approx(expected, abs=1e-6)
+  # From month 1, as the iterative remaining stops at a zero down payment.
+  for month in [1, 2, 60, 119, 120, 121, 240, 299]:
+    assert meterable.remaining(month) == pytest.approx(Meterable.remaining(meterable, month), abs=1e-6)
+
+
+@pytest.mark.parametrize('acquisition', ACQUISITIONS, ids=str)
+def test_schedule_and_end_match_iterate_values(acquisition):
+  meterable = acquisition.get(PRICE)
+  values = iterative(meterable, 300)
+  principal, interest = meterable.schedule(300)
+  assert list(principal) == pytest.approx([p for p, _ in values], abs=1e-6)
+  assert list(interest) == pytest.approx([i for _, i in values], abs=1e-6)
+  assert all(value == (0, 0) for value in values[meterable.end():])
+  assert values[meterable.end() - 1] != (0, 0)
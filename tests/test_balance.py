@@ -0,0 +1,111 @@
+import pytest
+
+from skypie.acquisition import Mortgage
+from skypie.balance import (
+    Asset,
+    Balance,
+    CapEx,
+    CATEGORIES,
+    ColumnarBalance,
+    Depreciation,
+    Income,
+    OpEx,
+    tax_adjusted_profit,
+    TotalsColumn,
+)
+from skypie.depreciation import LinearDepreciation
+from skypie.model import simple, simulate_horizons
+from skypie.planes import PLANES
+
+
+def values(items):
+  return [(item.__class__.__name__, float(item.value)) for item in items]
+
+
+def selections(balance, months):
+  for month in range(months):
+    yield values(balance.select(month=month))
+  for year in range(months // 12 + 1):
+    yield values(balance.select(year=year))
+    yield balance.sum(year=year, item_klazz=(OpEx, Depreciation))
+  yield values(balance.select())
+
+
+def test_select_aggregates_by_month_and_year():
+  for ledger in (Balance, ColumnarBalance):
+    balance = ledger()
+    balance += Asset(1000, LinearDepreciation(12))
+    balance += CapEx(10)
+    balance.add(OpEx(5), month=13)
+    balance.add(OpEx(7), month=14)
+    balance.add(Income(3), month=14)
+    assert balance.sum(year=1, item_klazz=OpEx) == 12
+    assert balance.sum(month=14) == 10
+    assert balance.sum(month=13, year=0) == 0
+    assert balance.sum(month=500) == 0
+    assert values(balance.select(year=0)) == [('Asset', 1000), ('CapEx', 10)]
+    assert balance.entries == 5
+
+
+@pytest.mark.parametrize('sell', [False, True])
+def test_columnar_balance_matches_balance(sell):
+  plane, acquisition = PLANES['T210'], Mortgage(0.15, 120, 0.0625)
+  for horizons in ([1], [3, 10]):
+    sheets = [
+        simulate_horizons(plane, acquisition, 10, 30, horizons, sell=sell, ledger=ledger)
+        for ledger in (Balance, ColumnarBalance)]
+    for expected, actual, years in zip(sheets[0], sheets[1], horizons):
+      assert list(selections(actual, years * 12)) == list(selections(expected, years * 12))
+      assert tax_adjusted_profit(actual, part91_percentage=0.25) == tax_adjusted_profit(
+          expected, part91_percentage=0.25)
+      assert sorted(values(sum(actual.items.values(), []))) == sorted(
+          values(sum(expected.items.values(), [])))
+
+
+@pytest.mark.parametrize('sell', [False, True])
+@pytest.mark.parametrize('ledger', [Balance, ColumnarBalance])
+def test_horizons_match_separate_simple_calls(sell, ledger):
+  # A fork is taken at each checkpoint, out of order and with one horizon past
+  # the end of the loan; none may see the months or the sale of another.
+  plane, acquisition, horizons = PLANES['T210'], Mortgage(0.15, 120, 0.0625), [5, 1, 12, 3]
+  sheets = simulate_horizons(plane, acquisition, 10, 30, horizons, sell=sell, ledger=ledger)
+  assert len(sheets) == len(horizons)
+  for actual, years in zip(sheets, horizons):
+    expected = simple(plane, acquisition, 10, 30, years, sell=sell, ledger=ledger)
+    assert list(selections(actual, years * 12 + 24)) == list(selections(expected, years * 12 + 24))
+    assert actual.entries == expected.entries
+    assert tax_adjusted_profit(actual, part91_percentage=0.25) == tax_adjusted_profit(
+        expected, part91_percentage=0.25)
+
+
+def test_forks_are_independent():
+  balance = ColumnarBalance()
+  balance.add(OpEx(1), month=0)
+  fork = balance.fork()
+  fork.add(OpEx(2), month=0)
+  fork.add(OpEx(4), month=30)
+  assert balance.sum() == 1 and balance.sum(month=30) == 0
+  assert fork.sum() == 7 and fork.sum(year=2) == 4
+
+
+def test_totals_column():
+  column = TotalsColumn()
+  column.add(3, 1, 2.5)
+  assert list(column.get(3)) == [0, 2.5, 0, 0, 0]
+  assert list(column.get(0)) == [0] * len(CATEGORIES)
+  assert column.get(4) is None and column.get(-1, 'missing') == 'missing'
+
+
+def peak_bytes(ledger):
+  tracemalloc = pytest.importorskip('tracemalloc')
+  tracemalloc.start()
+  try:
+    simple(PLANES['DA40'], Mortgage(0.15, 120, 0.0625), 10, 20, 40, ledger=ledger)
+    return tracemalloc.get_traced_memory()[1]
+  finally:
+    tracemalloc.stop()
+
+
+def test_columnar_balance_is_smaller():
+  peak_bytes(ColumnarBalance)
+  assert peak_bytes(ColumnarBalance) * 4 < peak_bytes(Balance)
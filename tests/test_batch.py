@@ -0,0 +1,74 @@
+import json
+
+import pytest
+
+from skypie.acquisition import AllCash
+from skypie.batch import Parser, run, ScenarioError
+from skypie.grid import grid, rate
+from skypie.planes import PLANES
+
+
+def lines(*records):
+  return [json.dumps(record) for record in records]
+
+
+def test_run_matches_grid():
+  records = list(run(lines(
+      dict(id='a', plane='DA40', acquisition='cash', part91_hours=10, hours='0,40,10',
+           years=[1, 5]))))
+  expected = grid(PLANES['DA40'], AllCash(), 10, range(0, 41, 10), [1, 5], sell=False)
+  assert [record['value'] for record in records] == [
+      rate(value, 'hourly', 10, years) for row in expected for years, value in zip([1, 5], row)]
+  assert [(record['part135_hours'], record['years']) for record in records][:3] == [
+      (0, 1), (0, 5), (10, 1)]
+
+
+def test_error_records_do_not_affect_other_scenarios():
+  records = list(run(lines(
+      dict(plane='DA40', hours=[0, 10], years=1),
+      dict(plane='XX', hours=10, years=1),
+      dict(plane='DA40', hours=10, years=1, constants=dict(gas_100ll='x')),
+      dict(id='ok', plane='DA40', part91_hours=5, hours=10, years=1),
+  ) + ['not json']))
+  errors = [record for record in records if 'error' in record]
+  assert [record['scenario'] for record in errors] == [1, 2, 3, 5]
+  assert 'part91_hours is 0' in errors[0]['error']
+  assert [record['scenario'] for record in records if 'error' not in record] == ['ok']
+
+
+def test_run_reads_input_incrementally():
+  read = []
+
+  def scenarios():
+    for number in range(4):
+      read.append(number)
+      yield json.dumps(dict(plane='DA40', part91_hours=10, hours=10, years=1))
+
+  records = run(scenarios(), chunk_size=2)
+  next(records)
+  assert read == [0, 1]
+  assert len(list(records)) == 3
+  assert read == [0, 1, 2, 3]
+
+
+@pytest.mark.parametrize('record, message', [
+  (dict(plane='DA40', hours=10), 'Missing'),
+  (dict(plane='DA40', hours=10, years=0), 'Years must be positive'),
+  (dict(plane='DA40', hours=-10, years=1), 'negative'),
+  (dict(plane='DA40', hours='a,b', years=1), 'Invalid number or range'),
+  (dict(plane='DA40', hours=10, years=1, output='weekly'), 'Unknown output'),
+  (dict(plane='DA40', hours=10, years=1, acquisition='lease'), 'Unknown acquisition'),
+  (dict(plane=dict(base='DA40', depreciation='linear'), hours=10, years=1), 'takes 1 arguments'),
+])
+def test_parse_errors(record, message):
+  with pytest.raises(ScenarioError) as excinfo:
+    Parser().parse(record)
+  assert message in str(excinfo.value)
+
+
+def test_parse_shares_planes_and_depreciations():
+  parser = Parser()
+  first = parser.parse(dict(plane=dict(base='DA40', depreciation='linear:120'), hours=1, years=1))
+  second = parser.parse(dict(plane=dict(base='T210', depreciation='linear:120'), hours=1, years=1))
+  assert first.plane.depreciation is second.plane.depreciation
+  assert parser.parse(dict(plane='DA40', hours=1, years=1)).plane is PLANES['DA40']
@@ -0,0 +1,46 @@
+import json
+
+import pytest
+
+from skypie import bench
+
+
+def document(**ops_per_sec):
+  return dict(
+      version=bench.BASELINE_VERSION,
+      python='3',
+      results=dict(
+          (name, dict(ops_per_sec=value, peak_bytes=None)) for name, value in ops_per_sec.items()))
+
+
+def test_regressions():
+  baseline = document(fast=100.0, steady=100.0, slower=100.0, gone=100.0)
+  current = document(fast=150.0, steady=80.0, slower=79.0, new=1.0)
+  # Only workloads in both runs and slower by more than the tolerance regress.
+  assert list(bench.regressions(current, baseline, tolerance=0.2)) == [('slower', 100.0, 79.0)]
+  assert list(bench.regressions(current, baseline, tolerance=0.1)) == [
+      ('slower', 100.0, 79.0), ('steady', 100.0, 80.0)]
+  assert list(bench.regressions(baseline, baseline, tolerance=0)) == []
+
+
+def test_save_load_round_trip(tmp_path):
+  filename = str(tmp_path / 'baseline.json')
+  saved = document(**{'simple[10y,keep]': 1234.5, 'table[DA40,sell]': 6.25})
+  bench.save(saved, filename)
+  assert bench.load(filename) == saved
+
+  with open(filename, 'w') as fp:
+    json.dump(dict(saved, version=bench.BASELINE_VERSION + 1), fp)
+  with pytest.raises(ValueError):
+    bench.load(filename)
+
+
+def test_run_measures_matching_workloads():
+  reported = []
+  result = bench.run(
+      pattern='depreciation.at[DA40', min_time=0.01,
+      report=lambda name, result: reported.append(name))
+  assert result['version'] == bench.BASELINE_VERSION
+  assert reported == ['depreciation.at[DA40,6000mo]']
+  assert list(result['results']) == reported
+  assert result['results'][reported[0]]['ops_per_sec'] > 0
@@ -0,0 +1,79 @@
+import sqlite3
+
+from skypie.acquisition import AllCash
+from skypie.cache import cached_simple, DiskCache, fingerprint, LRUCache, MODEL_MODULES
+from skypie.model import UsageModel
+from skypie.planes import PLANES
+
+
+def test_fingerprint_equal_scenarios():
+  assert fingerprint((UsageModel(revenue=100), AllCash())) == fingerprint(
+      (UsageModel(revenue=100), AllCash()))
+  assert fingerprint(UsageModel(revenue=100)) != fingerprint(UsageModel(revenue=101))
+
+
+def test_lru_cache_evicts_least_recently_used():
+  cache = LRUCache(maxsize=2)
+  cache.put('a', 1)
+  cache.put('b', 2)
+  assert cache.get('a') == 1
+  cache.put('c', 3)
+  assert 'b' not in cache
+  assert cache.get('b', LRUCache.MISSING) is LRUCache.MISSING
+  assert cache.stats() == dict(size=2, maxsize=2, hits=1, misses=1)
+
+
+def test_cached_simple_shares_balance_sheets():
+  cache = LRUCache()
+  first = cached_simple(PLANES['DA40'], AllCash(), 10, 10, 5, cache=cache)
+  second = cached_simple(PLANES['DA40'], AllCash(), 10, 10, 5, cache=cache)
+  assert first is second
+
+
+def test_model_modules_exist():
+  import pkgutil
+  for module in ('common.py', 'events.py'):
+    assert module in MODEL_MODULES
+  for module in MODEL_MODULES:
+    assert pkgutil.get_data('skypie', module)
+
+
+def test_disk_cache_round_trip(tmpdir):
+  with DiskCache(str(tmpdir)) as cache:
+    cache.put(('a', 1), 2.5)
+    assert cache.get(('a', 1)) == 2.5
+    assert cache.get(('a', 2)) is None
+  with DiskCache(str(tmpdir)) as cache:
+    assert cache.get(('a', 1)) == 2.5
+    assert len(cache) == 1
+
+
+def test_disk_cache_evicts_least_recently_used(tmpdir):
+  with DiskCache(str(tmpdir), max_entries=2) as cache:
+    for key in range(3):
+      cache.put(key, key)
+    cache.get(0)
+  with DiskCache(str(tmpdir), max_entries=2) as cache:
+    assert cache.get(0) == 0
+    assert cache.get(1) is None
+
+
+def test_disk_cache_shared_while_locked(tmpdir):
+  first = DiskCache(str(tmpdir), commit_interval=0)
+  second = DiskCache(str(tmpdir), timeout=0.01)
+  first.put('committed', 1.0)
+
+  # Another process holding the write lock blocks neither reads nor buffered writes.
+  locker = sqlite3.connect(first.path)
+  locker.execute('BEGIN IMMEDIATE')
+  assert second.get('committed') == 1.0
+  second.put('pending', 2.0)
+  assert second.get('pending') == 2.0
+  assert second.commit() is False
+  locker.rollback()
+  locker.close()
+
+  assert second.commit() is True
+  assert first.get('pending') == 2.0
+  second.close()
+  first.close()
@@ -0,0 +1,50 @@
+import pytest
+
+from skypie.acquisition import Mortgage
+from skypie.balance import tax_adjusted_profit
+from skypie.compare import iterate_compare, rank
+from skypie.grid import rate
+from skypie.model import simple, UsageModel
+from skypie.planes import PLANES
+
+
+USAGE = UsageModel(hobbs_ratio=1.2, revenue=150, salary=20)
+
+
+def test_rank_orders_by_value():
+  ranking = rank(['a', 'b', 'c'], [1.0, 3.0, 2.5])
+  assert (ranking.best, ranking.value, ranking.runner_up, ranking.margin) == ('b', 3.0, 'c', 0.5)
+  assert rank(['a'], [-4.0]) == ('a', -4.0, None, None)
+  # Ties go to the plane listed first, by a margin of zero.
+  assert rank(['a', 'b'], [2.0, 2.0]) == ('a', 2.0, 'b', 0.0)
+
+
+@pytest.mark.parametrize('sell', [False, True])
+@pytest.mark.parametrize('jobs', [1, 2])
+def test_rankings_match_simple(sell, jobs):
+  planes = [PLANES['DA40'], PLANES['T210'], PLANES['177RG']]
+  names = [plane.name for plane in planes]
+  acquisition, h_range, y_range = Mortgage(0.15, 120, 0.0625), [0, 30, 90], [1, 5, 12]
+
+  results = list(iterate_compare(
+      planes, acquisition, 10, h_range, y_range, output='yearly', usage=USAGE, sell=sell,
+      batch_size=2, jobs=jobs))
+  assert [hours for hours, _, _ in results] == h_range
+
+  for hours, rankings, values in results:
+    for column, (years, ranking) in enumerate(zip(y_range, rankings)):
+      expected = dict(
+          (plane.name, rate(
+              tax_adjusted_profit(
+                  simple(plane, acquisition, 10, hours, years, usage=USAGE, sell=sell),
+                  part91_percentage=10. / (10 + hours)),
+              'yearly', 10, years))
+          for plane in planes)
+      for name in names:
+        assert values[name][column] == pytest.approx(expected[name], rel=1e-9)
+      ordered = sorted(names, key=lambda name: -expected[name])
+      assert ranking.best == ordered[0]
+      assert ranking.runner_up == ordered[1]
+      assert ranking.value == pytest.approx(expected[ordered[0]], rel=1e-9)
+      assert ranking.margin == pytest.approx(expected[ordered[0]] - expected[ordered[1]], rel=1e-6)
+      assert ranking.margin >= 0
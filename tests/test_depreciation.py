@@ -0,0 +1,50 @@
+import itertools
+
+import pytest
+
+from skypie.common import DepreciationModel
+from skypie.depreciation import (
+    DepreciationCombinator,
+    ExponentialDepreciation,
+    FixedDepreciation,
+    LinearDepreciation,
+)
+
+
+MODELS = [
+  FixedDepreciation(0.8),
+  ExponentialDepreciation(0.10, 12),
+  ExponentialDepreciation(0.03, 1),
+  LinearDepreciation(1),
+  LinearDepreciation(37),
+  DepreciationCombinator([ExponentialDepreciation(0.07, 12), LinearDepreciation(240)]),
+]
+
+
+class Iterated(DepreciationModel):
+  """The generic, generator walking at and curve of a model."""
+
+  def __init__(self, model):
+    self.model = model
+
+  def iterate_values(self):
+    return self.model.iterate_values()
+
+
+@pytest.mark.parametrize('model', MODELS, ids=str)
+def test_closed_forms_match_iterate_values(model):
+  months = list(range(1, 500))
+  expected = list(itertools.islice(model.iterate_values(), len(months)))
+  assert [model.at(month) for month in months] == pytest.approx(expected, rel=1e-12)
+  assert model.curve(months) == pytest.approx(expected, rel=1e-12)
+  assert model.curve([300, 3, 300]) == pytest.approx([expected[299], expected[2], expected[299]])
+  assert Iterated(model).curve([300, 3]) == pytest.approx([expected[299], expected[2]])
+
+
+@pytest.mark.parametrize('model', MODELS + [Iterated(LinearDepreciation(12))], ids=str)
+def test_month_zero_is_undefined(model):
+  with pytest.raises(IndexError):
+    model.at(0)
+  with pytest.raises(IndexError):
+    model.curve([3, 0])
+  assert model.curve([]) == []
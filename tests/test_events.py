@@ -0,0 +1,93 @@
+import random
+
+import pytest
+
+from skypie.acquisition import AllCash, Mortgage
+from skypie.balance import tax_adjusted_profit
+from skypie.events import (
+    _replay,
+    crossings,
+    ENGINE_OVERHAUL,
+    event_driven,
+    INSPECTION,
+    inspection_months,
+    timeline,
+)
+from skypie.model import simple, UsageModel
+from skypie.planes import PLANES
+
+
+def profits(plane, acquisition, part91_hours, part135_hours, years, usage, sell):
+  part91_percentage = 1. * part91_hours / (part91_hours + part135_hours)
+  return [
+      tax_adjusted_profit(
+          model(plane, acquisition, part91_hours, part135_hours, years, usage=usage, sell=sell),
+          part91_percentage=part91_percentage)
+      for model in (simple, event_driven)]
+
+
+@pytest.mark.parametrize('name', sorted(PLANES))
+@pytest.mark.parametrize('acquisition', [AllCash(), Mortgage(0.15, 240, 0.065)])
+@pytest.mark.parametrize('sell', [False, True])
+def test_event_driven_matches_simple(name, acquisition, sell):
+  # Hours of 20, 100 and 120 per month land exactly on TBO and inspection multiples.
+  for part91_hours, part135_hours in ((5, 115), (0, 20), (10, 90), (10, 0), (3, 47)):
+    for hobbs_ratio in (1.0, 1.2, 1.3):
+      for years in (1, 12, 15):
+        expected, actual = profits(
+            PLANES[name],
+            acquisition,
+            part91_hours,
+            part135_hours,
+            years,
+            UsageModel(hobbs_ratio=hobbs_ratio, revenue=150, salary=20),
+            sell)
+        assert actual == pytest.approx(expected, rel=1e-9)
+
+
+def test_event_driven_books_fewer_entries():
+  plane = PLANES['DA40']
+  months = simple(plane, AllCash(), 10, 10, 10)
+  events = event_driven(plane, AllCash(), 10, 10, 10)
+  assert events.entries < months.entries
+  assert events.month == months.month == 120
+
+
+def test_timeline_overhauls_past_tbo():
+  plane = PLANES['DA40']
+  # 10 tach hours a month from the engine's current time
+  events = timeline(plane, [10.], 10., 12 * 30)
+  overhauls = sorted(month for month, event in events.items() if event & ENGINE_OVERHAUL)
+  assert overhauls[0] == int((plane.engine.tbo - plane.engine.smoh) // 10)
+  assert all(b - a == plane.engine.tbo // 10 for a, b in zip(overhauls, overhauls[1:]))
+  inspections = sorted(month for month, event in events.items() if event & INSPECTION)
+  assert inspections == list(range(9, 12 * 30, 10))
+
+
+def test_crossings_match_month_by_month_sums():
+  rng = random.Random(0)
+  cases = [
+      (0, [10. / 1.2, 40. / 1.2], 2000),  # lands exactly on the TBO
+      (0, [5. / 1.3, 115. / 1.3], 1700),
+      (0, [0.1, 0.2], 0.3),
+      (150, [1. / 3, 2. / 3], 2000),
+      (2500, [10.], 2000),  # past TBO already
+      (0, [0., 0.], 2000),
+  ]
+  cases.extend(
+      (rng.uniform(0, 2000), [rng.uniform(0, 50), rng.uniform(0, 150)], rng.choice([1500, 1700, 2000]))
+      for _ in range(200))
+  for start, deltas, limit in cases:
+    assert crossings(start, deltas, limit, 600) == _replay(start, deltas, limit, 600)
+
+
+def test_crossings_jump_between_events():
+  # A month by month scan of a billion months would not return.
+  assert crossings(0, [1.], 1e6 + 0.5, 10 ** 8) == [1000000 * k + k // 2 for k in range(1, 100)]
+
+
+def test_inspection_months():
+  assert list(inspection_months(0, 30)) == [11, 23]
+  assert list(inspection_months(20, 30)) == list(range(4, 30, 5))
+  assert list(inspection_months(100. / 3, 10)) == [2, 5, 8]
+  assert list(inspection_months(150, 3)) == [0, 1, 2]
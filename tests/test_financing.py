@@ -0,0 +1,53 @@
+import pytest
+
+from skypie.acquisition import Mortgage
+from skypie.balance import CapEx, tax_adjusted_profit
+from skypie.financing import optimize_financing, Quote, variants
+from skypie.grid import rate
+from skypie.model import simple, UsageModel
+from skypie.planes import PLANES
+
+
+USAGE = UsageModel(hobbs_ratio=1.2, revenue=150, salary=20)
+QUOTES = [Quote('bank', 0.0625), Quote('credit union', 0.055)]
+DOWN_PAYMENTS = [0, 0.2, 0.5, 1.0]
+TERMS = [60, 120, 240]
+
+
+def test_variants():
+  found = list(variants(QUOTES, DOWN_PAYMENTS, TERMS))
+  assert found[0][0] is None
+  # Every quote, down payment below 100% and term, and all cash.
+  assert len(found) == 1 + len(QUOTES) * 3 * len(TERMS)
+
+
+@pytest.mark.parametrize('sell', [False, True])
+@pytest.mark.parametrize('part135_hours', [0, 40])
+def test_scores_match_simple(sell, part135_hours):
+  plane, years, output = PLANES['T210'], 7, 'yearly'
+  results = optimize_financing(
+      plane, 10, part135_hours, years, QUOTES, DOWN_PAYMENTS, TERMS, output=output, usage=USAGE,
+      sell=sell)
+  assert len(results) == len(list(variants(QUOTES, DOWN_PAYMENTS, TERMS)))
+  assert [financing.value for financing in results] == sorted(
+      (financing.value for financing in results), reverse=True)
+
+  for financing in results:
+    balance = simple(plane, financing.acquisition, 10, part135_hours, years, usage=USAGE, sell=sell)
+    if not sell:
+      # Kept, the principal still owed is charged as paid off at the horizon.
+      balance.add(CapEx(financing.remaining), month=years * 12)
+    expected = tax_adjusted_profit(balance, part91_percentage=10. / (10 + part135_hours))
+    assert financing.value == pytest.approx(rate(expected, output, 10, years), rel=1e-9)
+    assert financing.principal + financing.remaining == pytest.approx(plane.price)
+
+
+def test_keeping_does_not_favor_leverage():
+  # Flown for personal use only, interest is not deductible, so any loan costs
+  # more than cash, and longer loans to the end of the horizon cost more.
+  results = optimize_financing(
+      PLANES['DA40'], 10, 0, 5, [Quote('bank', 0.08)], [0, 0.5], [60, 120], usage=USAGE)
+  assert results[0].lender is None
+  worst = results[-1].acquisition
+  assert isinstance(worst, Mortgage)
+  assert (worst.down_payment, worst.term) == (0, 120)
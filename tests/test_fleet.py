@@ -0,0 +1,75 @@
+import pytest
+
+from skypie.acquisition import AllCash, Mortgage
+from skypie.balance import CATEGORIES, OpEx, tax_adjusted_profit
+from skypie.fleet import airframe, SHARED, SharedCost, simulate_fleet
+from skypie.model import simple, UsageModel
+from skypie.planes import PLANES
+
+
+USAGE = UsageModel(hobbs_ratio=1.2, revenue=150, salary=20)
+
+
+def fleet(sell=False, shared_costs=()):
+  return simulate_fleet([
+      airframe('N1', PLANES['DA40'], AllCash(), 10, 40, usage=USAGE),
+      airframe('N2', PLANES['T210'], Mortgage(0.15, 120, 0.0625), 5, 80, usage=USAGE,
+               purchase_month=18),
+      airframe('N3', PLANES['DA40'], AllCash(), 20, 0, usage=USAGE, purchase_month=7),
+  ], 5, shared_costs=shared_costs, sell=sell)
+
+
+def test_shared_costs_are_booked_yearly():
+  ledger = fleet(shared_costs=[SharedCost('hangar', 24000), SharedCost('pool', 6000)])
+  for year in range(5):
+    assert ledger.sum(tail=SHARED, year=year) == 30000
+    assert ledger.sum(tail=SHARED, month=year * 12, item_klazz=OpEx) == 30000
+    assert ledger.sum(tail=SHARED, month=year * 12 + 1) == 0
+  assert ledger.sum(tail=SHARED) == 150000
+  without = fleet()
+  assert ledger.sum(item_klazz=OpEx) == pytest.approx(without.sum(item_klazz=OpEx) + 150000)
+  assert ledger.profit() < without.profit()
+
+
+@pytest.mark.parametrize('sell', [False, True])
+def test_staggered_purchases_match_simple(sell):
+  ledger = fleet(sell=sell)
+  for tail, plane, acquisition, part91_hours, part135_hours, years in (
+      ('N1', PLANES['DA40'], AllCash(), 10, 40, 5),
+      ('N2', PLANES['T210'], Mortgage(0.15, 120, 0.0625), 5, 80, 3),
+      ('N3', PLANES['DA40'], AllCash(), 20, 0, 4)):
+    balance = simple(plane, acquisition, part91_hours, part135_hours, years, usage=USAGE, sell=sell)
+    expected = tax_adjusted_profit(
+        balance, part91_percentage=1. * part91_hours / (part91_hours + part135_hours))
+    assert ledger.profit(tail=tail) == pytest.approx(expected, rel=1e-9)
+    for klazz in CATEGORIES:
+      assert ledger.sum(tail=tail, item_klazz=klazz) == pytest.approx(
+          balance.sum(item_klazz=klazz), rel=1e-9)
+  assert ledger.profit() == pytest.approx(sum(ledger.profit(tail=tail) for tail in ledger.tails))
+
+
+def test_airframes_are_owned_for_whole_years():
+  ledger = fleet()
+  # N2 is bought at month 18 of 60, and owned the 3 whole years to month 54.
+  months = [month for month in range(60) if ledger.select(tail='N2', month=month)]
+  assert months[0] == 18
+  assert months[-1] < 18 + 36
+  assert ledger.sum(tail='N2', year=0) == 0
+  assert [month for _, month, _ in ledger.assets(tail='N2')][0] == 18
+
+  with pytest.raises(ValueError):
+    simulate_fleet([airframe('N4', PLANES['DA40'], AllCash(), 10, 40, purchase_month=49)], 5)
+
+
+def test_month_selects_match_the_ledger_columns():
+  ledger = fleet(sell=True, shared_costs=[SharedCost('hangar', 24000)])
+  for index, tail in enumerate(ledger.tails):
+    for month in range(61):
+      expected = [0] * len(CATEGORIES)
+      for entry_month, entry_tail, category, amount in zip(
+          ledger.months, ledger.tail_column, ledger.categories, ledger.amounts):
+        if entry_month == month and entry_tail == index:
+          expected[category] += amount
+      for klazz, total in zip(CATEGORIES, expected):
+        assert ledger.sum(tail=tail, month=month, item_klazz=klazz) == pytest.approx(
+            max(total, 0))
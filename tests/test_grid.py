@@ -0,0 +1,77 @@
+import pytest
+
+from skypie.acquisition import AllCash, Mortgage
+from skypie.balance import tax_adjusted_profit
+from skypie.depreciation import LinearDepreciation
+from skypie.grid import evaluate_batch, grid, OverhaulValue
+from skypie.model import simple, UsageModel
+from skypie.planes import PLANES
+
+
+H_RANGE = [0, 5, 20, 45, 100, 300]
+Y_RANGE = [1, 2, 7, 15]
+
+
+def simple_grid(plane, acquisition, part91_hours, usage, sell):
+  return [
+      [tax_adjusted_profit(
+           simple(plane, acquisition, part91_hours, hours, years, usage=usage, sell=sell),
+           part91_percentage=1. * part91_hours / (part91_hours + hours))
+       for years in Y_RANGE]
+      for hours in H_RANGE]
+
+
+@pytest.mark.parametrize('name', sorted(PLANES))
+@pytest.mark.parametrize('acquisition', [AllCash(), Mortgage(0.15, 120, 0.0625)])
+@pytest.mark.parametrize('sell', [False, True])
+@pytest.mark.parametrize('engine', ['grid', 'simple', 'events'])
+def test_engines_match_simple(name, acquisition, sell, engine):
+  plane, usage = PLANES[name], UsageModel(hobbs_ratio=1.2, revenue=150, salary=20)
+  expected = simple_grid(plane, acquisition, 10, usage, sell)
+  actual = grid(plane, acquisition, 10, H_RANGE, Y_RANGE, usage=usage, sell=sell, engine=engine)
+  for expected_row, actual_row in zip(expected, actual):
+    assert actual_row == pytest.approx(expected_row, rel=1e-9)
+
+
+@pytest.mark.parametrize('sell', [False, True])
+def test_backends_match_simple_and_each_other(sell):
+  pytest.importorskip('numpy')
+  plane, acquisition = PLANES['T210'], Mortgage(0.15, 120, 0.0625)
+  usage = UsageModel(hobbs_ratio=1.2, revenue=150, salary=20)
+  # Wide enough a range to overhaul every month, and for engine and prop to share a life.
+  h_range = H_RANGE + [float(hours) for hours in range(7, 2000, 61)]
+  expected = [
+      [tax_adjusted_profit(
+           simple(plane, acquisition, 10, hours, years, usage=usage, sell=sell),
+           part91_percentage=10. / (10 + hours))
+       for years in Y_RANGE]
+      for hours in h_range]
+  rows = dict(
+      (backend, evaluate_batch(
+          plane, acquisition, 10, h_range, Y_RANGE, usage=usage, sell=sell, backend=backend))
+      for backend in ('array', 'numpy'))
+  assert rows['array'] == rows['numpy']
+  for expected_row, actual_row in zip(expected, rows['numpy']):
+    assert actual_row == pytest.approx(expected_row, rel=1e-9)
+
+
+def test_grid_in_any_order_and_batch_size():
+  plane, acquisition = PLANES['T210'], Mortgage(0.15, 120, 0.0625)
+  expected = grid(plane, acquisition, 10, H_RANGE, Y_RANGE, sell=True)
+  actual = grid(plane, acquisition, 10, H_RANGE, Y_RANGE[::-1], sell=True, batch_size=2)
+  for expected_row, actual_row in zip(expected, actual):
+    assert actual_row[::-1] == pytest.approx(expected_row, rel=1e-12)
+
+
+def test_overhaul_value_matches_revaluing_every_overhaul():
+  overhauls = [(month, 1000 + month, LinearDepreciation(7 + month % 5)) for month in range(0, 60, 3)]
+  overhaul_value = OverhaulValue()
+  for months in range(1, 80):
+    for overhaul in overhauls:
+      if overhaul[0] == months - 1:
+        overhaul_value.add(*overhaul)
+    expected = sum(
+        price * depreciation_model.at(months - month)
+        for month, price, depreciation_model in overhauls if month < months)
+    assert overhaul_value.value(months) == pytest.approx(expected, abs=1e-6)
+    assert overhaul_value.copy().value(months) == pytest.approx(expected, abs=1e-6)
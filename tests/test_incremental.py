@@ -0,0 +1,69 @@
+import pytest
+
+from skypie.acquisition import Mortgage
+from skypie.grid import grid, rate
+from skypie.incremental import session
+from skypie.model import UsageModel
+from skypie.planes import PLANES
+
+
+H_RANGE = [0, 5, 20, 45, 100]
+Y_RANGE = [1, 2, 7, 15]
+
+EDITS = [
+  ('plane.insurance', 9000),
+  ('engine.tbo', 1500),
+  ('engine.smoh', 700),
+  ('usage.revenue', 200),
+  ('acquisition.rate', 0.08),
+  ('constants.gas_100ll', 6.25),
+  ('sell', True),
+  ('part91_hours', 4),
+  ('hours', [3, 45, 60]),
+  ('years', [3, 10]),
+]
+
+
+def expected_rows(scenario):
+  rows = grid(
+      scenario.plane, scenario.acquisition, scenario.part91_hours, scenario.h_range,
+      scenario.y_range, usage=scenario.usage, constants=scenario.constants, sell=scenario.sell)
+  return [
+      [rate(value, scenario.output, scenario.part91_hours, years)
+       for years, value in zip(scenario.y_range, row)]
+      for row in rows]
+
+
+def assert_matches_grid(table):
+  rows = table.rows()
+  assert [hours for hours, _ in rows] == table.scenario.h_range
+  for (_, row), expected in zip(rows, expected_rows(table.scenario)):
+    assert row == pytest.approx(expected, rel=1e-12)
+
+
+@pytest.mark.parametrize('name', ['DA40', 'T210'])
+def test_session_matches_grid_after_each_edit(name):
+  table = session(
+      PLANES[name], Mortgage(0.15, 120, 0.0625), 10, H_RANGE, Y_RANGE, output='outlay',
+      usage=UsageModel(hobbs_ratio=1.2, revenue=150, salary=20))
+  assert_matches_grid(table)
+  for field, value in EDITS:
+    table.set(field, value)
+    assert_matches_grid(table)
+
+
+def test_session_recomputes_only_what_an_edit_invalidates():
+  table = session(PLANES['DA40'], Mortgage(0.15, 120, 0.0625), 10, H_RANGE, Y_RANGE)
+  table.rows()
+  assert table.set('plane.insurance', 9000) == ['terms', 'profits']
+  table.rows()
+  assert set(table.recomputed) == set(['terms', 'profits'])
+  assert table.set('engine.overhaul', 30000) == ['columns', 'profits']
+  table.rows()
+  assert set(table.recomputed) == set(['columns', 'profits'])
+
+
+def test_session_rejects_unknown_inputs():
+  table = session(PLANES['DA40'], Mortgage(0.15, 120, 0.0625), 10, H_RANGE, Y_RANGE)
+  with pytest.raises(KeyError):
+    table.set('plane.wings', 2)
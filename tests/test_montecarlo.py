@@ -0,0 +1,95 @@
+import argparse
+import random
+
+import pytest
+
+from skypie.acquisition import Mortgage
+from skypie.bin.skypie import positive_int
+from skypie.grid import grid
+from skypie.model import UsageModel
+from skypie.constants import CONSTANTS
+from skypie.montecarlo import ArrayPathColumns, Distributions, montecarlo, P2Quantile, path_rng
+from skypie.planes import PLANES
+
+
+USAGE = UsageModel(hobbs_ratio=1.2, revenue=150, salary=20)
+
+
+@pytest.mark.parametrize('sell', [False, True])
+def test_paths_without_variance_match_grid(sell):
+  plane, acquisition = PLANES['DA40'], Mortgage(0.15, 120, 0.0625)
+  (expected,), = grid(plane, acquisition, 10, [40], [7], usage=USAGE, sell=sell)
+  summary = montecarlo(
+      plane, acquisition, 10, 40, 7, paths=5, usage=USAGE, sell=sell,
+      distributions=Distributions(0, 0, 0, 0))
+  assert summary.count == 5
+  assert summary.minimum == pytest.approx(expected, rel=1e-9)
+  assert summary.maximum == pytest.approx(expected, rel=1e-9)
+
+
+def test_paths_do_not_depend_on_batching():
+  plane, acquisition = PLANES['T210'], Mortgage(0.15, 120, 0.0625)
+  summaries = [
+      montecarlo(plane, acquisition, 10, 40, 5, paths=20, seed=3, usage=USAGE, sell=True,
+                 batch_size=batch_size, jobs=jobs)
+      for batch_size, jobs in [(20, 1), (3, 1), (7, 2)]]
+  for summary in summaries[1:]:
+    assert str(summary) == str(summaries[0])
+
+
+def test_hours_are_drawn_every_month():
+  plane, acquisition = PLANES['DA40'], Mortgage(0.15, 120, 0.0625)
+  hours_only = Distributions(hours_sd=0.01, fuel_sigma=0, insurance_sd=0, overhaul_sigma=0)
+  summary = montecarlo(plane, acquisition, 10, 37, 5, paths=50, usage=USAGE, distributions=hours_only)
+  (nominal,), = grid(plane, acquisition, 10, [37], [5], usage=USAGE)
+  assert summary.minimum < summary.maximum
+  assert summary.minimum == pytest.approx(nominal, rel=0.01)
+  assert summary.maximum == pytest.approx(nominal, rel=0.01)
+
+
+def test_path_columns_fly_new_hours_every_month():
+  plane = PLANES['DA40']
+  columns = ArrayPathColumns(
+      plane, 10, 40, USAGE, CONSTANTS, 12, Distributions(), [path_rng(0, 0), path_rng(0, 1)])
+  hours = set()
+  for month in range(12):
+    columns.step(month)
+    hours.update(columns.month_hours)
+  assert len(hours) == 24
+
+
+def test_backends_agree():
+  pytest.importorskip('numpy')
+  plane, acquisition = PLANES['T210'], Mortgage(0.15, 120, 0.0625)
+  summaries = [
+      montecarlo(plane, acquisition, 10, 150, 8, paths=40, seed=1, usage=USAGE, sell=True,
+                 backend=backend)
+      for backend in ('array', 'numpy')]
+  assert summaries[0].total == summaries[1].total
+  assert str(summaries[0]) == str(summaries[1])
+
+
+@pytest.mark.parametrize('hours_sd', [0.2, 1.5])
+def test_monthly_hours_match_drawing_month_by_month(hours_sd):
+  distributions = Distributions(hours_sd=hours_sd)
+  for path in range(20):
+    expected_rng, rng = path_rng(2, path), path_rng(2, path)
+    expected = [distributions.hours(expected_rng, 40) for _ in range(60)]
+    assert distributions.monthly_hours(rng, 40, 60) == expected
+    assert rng.random() == expected_rng.random()
+
+
+def test_paths_must_be_positive():
+  assert positive_int('3') == 3
+  for value in ('0', '-2'):
+    with pytest.raises(argparse.ArgumentTypeError):
+      positive_int(value)
+
+
+def test_p2_quantile_tracks_the_median():
+  rng = random.Random(0)
+  values = [rng.random() for _ in range(5000)]
+  quantile = P2Quantile(0.5)
+  for value in values:
+    quantile.add(value)
+  assert quantile.value() == pytest.approx(sorted(values)[2500], abs=0.02)
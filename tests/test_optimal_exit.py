@@ -0,0 +1,47 @@
+import pytest
+
+from skypie.acquisition import AllCash, Mortgage
+from skypie.balance import tax_adjusted_profit
+from skypie.grid import rate
+from skypie.model import simple, UsageModel
+from skypie.optimal_exit import best_exits, optimal_exit
+from skypie.planes import PLANES
+
+
+USAGE = UsageModel(hobbs_ratio=1.2, revenue=150, salary=20)
+H_BATCH = [0, 20, 60, 150]
+MAX_YEARS = 8
+
+
+@pytest.mark.parametrize('name', ['DA40', 'T210'])
+@pytest.mark.parametrize('acquisition', [AllCash(), Mortgage(0.15, 120, 0.0625)])
+def test_best_exits_match_brute_force_over_simple(name, acquisition):
+  plane = PLANES[name]
+  exits = best_exits(plane, acquisition, 10, H_BATCH, MAX_YEARS * 12, output='yearly', usage=USAGE)
+  at_year_ends = 0
+  for hours, exit in zip(H_BATCH, exits):
+    values = [
+        rate(tax_adjusted_profit(
+                 simple(plane, acquisition, 10, hours, years, usage=USAGE, sell=True),
+                 part91_percentage=10. / (10 + hours)),
+             'yearly', 10, years)
+        for years in range(1, MAX_YEARS + 1)]
+    best_years = max(range(MAX_YEARS), key=lambda index: values[index]) + 1
+    # Exits at every month include those at the end of every year.
+    assert exit.value >= values[best_years - 1] - 1e-6 * abs(values[best_years - 1])
+    assert 1 <= exit.month <= MAX_YEARS * 12
+    if exit.month % 12 == 0:
+      at_year_ends += 1
+      assert exit.month == best_years * 12
+      assert exit.value == pytest.approx(values[best_years - 1], rel=1e-9)
+  assert at_year_ends
+
+
+def test_optimal_exit_yields_best_exits_in_order():
+  plane, acquisition = PLANES['T210'], Mortgage(0.15, 120, 0.0625)
+  expected = best_exits(plane, acquisition, 10, H_BATCH, 60, output='hourly', usage=USAGE)
+  for jobs in (1, 2):
+    results = list(optimal_exit(
+        plane, acquisition, 10, H_BATCH, 5, usage=USAGE, batch_size=1, jobs=jobs))
+    assert [hours for hours, _ in results] == H_BATCH
+    assert [exit for _, exit in results] == expected
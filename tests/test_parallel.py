@@ -0,0 +1,36 @@
+from skypie import stats
+from skypie.parallel import imap, partition
+
+
+def test_imap_in_order_with_state():
+  tasks = list(range(20))
+  assert list(imap(pow, tasks, state=3, jobs=1)) == [3 ** task for task in tasks]
+  assert list(imap(pow, tasks, state=3, jobs=2)) == [3 ** task for task in tasks]
+
+
+def test_imap_merges_worker_counters():
+  from skypie.grid import _grid_rows
+  from skypie.acquisition import AllCash
+  from skypie.model import UsageModel
+  from skypie.constants import CONSTANTS
+  from skypie.planes import PLANES
+  state = dict(
+      plane=PLANES['DA40'],
+      acquisition=AllCash(),
+      part91_hours=10,
+      y_range=[1, 2],
+      usage=UsageModel(),
+      constants=CONSTANTS,
+      sell=False)
+  since = stats.snapshot()
+  rows = list(imap(_grid_rows, [[10, 20], [30]], state=state, jobs=2))
+  assert [len(row) for batch in rows for row in batch] == [2, 2, 2]
+  assert stats.delta(since)[stats.SCENARIOS] == 6
+
+
+def test_partition():
+  assert partition(range(5), 1, 2) == [[0, 1], [2, 3], [4]]
+  assert partition(range(5), 2, 64) == [list(range(5))]
+  assert [len(batch) for batch in partition(range(100), 4, 64)] == [25, 25, 25, 25]
+  assert [len(batch) for batch in partition(range(40), 8, 32)] == [16, 16, 8]
+  assert partition([], 4, 64) == []
@@ -0,0 +1,31 @@
+import pytest
+
+from skypie import planes
+from skypie.planes import PLANES, PlaneRegistry
+
+
+def test_registry_builds_planes_once_on_lookup():
+  calls = []
+
+  def factory():
+    calls.append(1)
+    return object()
+
+  registry = PlaneRegistry([('A', factory)])
+  assert 'A' in registry and 'B' not in registry
+  assert calls == []
+  assert registry['A'] is registry['A']
+  assert calls == [1]
+  assert list(registry) == ['A'] and len(registry) == 1
+  with pytest.raises(KeyError):
+    registry['B']
+
+
+def test_module_aliases():
+  from skypie.planes import Cessna_177RG, Cessna_T210, Diamond_DA40, Pipistrel_Virus
+  assert Diamond_DA40 is PLANES['DA40']
+  assert Cessna_T210 is PLANES['T210']
+  assert Cessna_177RG is PLANES['177RG']
+  assert Pipistrel_Virus is PLANES['Virus']
+  with pytest.raises(AttributeError):
+    planes.Cirrus_SR20
@@ -0,0 +1,57 @@
+import pytest
+
+from skypie.acquisition import Mortgage
+from skypie.balance import tax_adjusted_profit
+from skypie.model import simple, UsageModel
+from skypie.planes import PLANES
+from skypie.sensitivity import perturb, sensitivity
+
+
+USAGE = UsageModel(hobbs_ratio=1.2, revenue=150, salary=20)
+
+
+def test_perturb():
+  assert perturb(100.0, 0.1) == pytest.approx((90.0, 110.0))
+  # Integers move by at least one.
+  assert perturb(120, 0.001) == (119, 121)
+  assert perturb(120, 0.1) == (108, 132)
+
+
+def test_insurance_sign_and_magnitude():
+  # Personal use only: nothing is deductible, so a dollar more of yearly
+  # insurance costs exactly a dollar a year.
+  plane, acquisition, years = PLANES['DA40'], Mortgage(0.15, 120, 0.0625), 6
+  base, results = sensitivity(plane, acquisition, 10, 0, years, delta=0.1, usage=USAGE)
+  by_name = dict((result.parameter, result) for result in results)
+
+  insurance = by_name['plane.insurance']
+  assert insurance.base == plane.insurance
+  assert (insurance.low, insurance.high) == pytest.approx(
+      (plane.insurance * 0.9, plane.insurance * 1.1))
+  assert insurance.value_high < base < insurance.value_low
+  assert insurance.value_high - insurance.value_low == pytest.approx(
+      -(insurance.high - insurance.low) * years)
+  assert insurance.elasticity == pytest.approx(-years * plane.insurance / base)
+
+  for value, field_value in ((insurance.value_low, insurance.low),
+                             (insurance.value_high, insurance.high)):
+    expected = tax_adjusted_profit(
+        simple(plane(insurance=field_value), acquisition, 10, 0, years, usage=USAGE),
+        part91_percentage=1.0)
+    assert value == pytest.approx(expected, rel=1e-9)
+
+
+def test_results_are_ranked_by_elasticity():
+  base, results = sensitivity(
+      PLANES['T210'], Mortgage(0.15, 120, 0.0625), 10, 40, 5, usage=USAGE, sell=True)
+  assert base < 0
+  elasticities = [abs(result.elasticity) for result in results]
+  assert elasticities == sorted(elasticities, reverse=True)
+  assert all(result.base != 0 for result in results)
+  by_name = dict((result.parameter, result) for result in results)
+  # Thirstier engines and a higher price cost more, higher revenue pays.  The
+  # base is a cost, so costing more is a positive elasticity.
+  assert by_name['performance.gph'].value_high < by_name['performance.gph'].value_low
+  assert by_name['performance.gph'].elasticity > 0
+  assert by_name['usage.revenue'].value_high > by_name['usage.revenue'].value_low
+  assert by_name['plane.price'].value_high < by_name['plane.price'].value_low
@@ -0,0 +1,147 @@
+import asyncio
+import json
+import os
+import signal
+import subprocess
+import sys
+
+import pytest
+
+from skypie.planes import PLANES
+from skypie.server import compute, MAX_BODY, RequestError, Server
+
+
+TABLE = dict(plane='DA40', part91_hours=10, hours='10,50,20', years=[1, 5])
+
+
+def run(coroutine_function, **kw):
+  """Run ``coroutine_function(server)`` against a one worker Server and close it after."""
+  async def main():
+    server = Server(jobs=1, **kw)
+    try:
+      return await coroutine_function(server)
+    finally:
+      server.close()
+  return asyncio.run(main())
+
+
+def post(server, path, record):
+  return server.dispatch('POST', path, json.dumps(record).encode('utf-8'))
+
+
+def test_dispatch():
+  async def requests(server):
+    planes = await server.dispatch('GET', '/planes', b'')
+    table = await post(server, '/table', TABLE)
+    stats = await server.dispatch('GET', '/stats', b'')
+    return planes, table, stats
+
+  planes, table, stats = run(requests)
+  assert planes == (200, json.dumps(sorted(PLANES)).encode('utf-8'))
+  assert table == (200, compute('/table', TABLE))
+  status, body = stats
+  assert status == 200
+  stats = json.loads(body.decode('utf-8'))
+  assert (stats['computed'], stats['coalesced'], stats['pending']) == (1, 0, 0)
+
+
+def test_identical_concurrent_requests_are_coalesced():
+  async def requests(server):
+    responses = await asyncio.gather(post(server, '/table', TABLE), post(server, '/table', TABLE))
+    # Once computed, the response is served from the results.
+    responses.append(await post(server, '/table', dict(reversed(list(TABLE.items())))))
+    return responses, server.stats()
+
+  responses, stats = run(requests)
+  assert responses == [(200, compute('/table', TABLE))] * 3
+  assert (stats['computed'], stats['coalesced'], stats['pending']) == (1, 1, 0)
+
+
+@pytest.mark.parametrize('method, path, body, status', [
+  ('POST', '/nowhere', b'{}', 404),
+  ('GET', '/table', b'', 405),
+  ('POST', '/table', b'{"plane": ', 400),
+  ('POST', '/table', b'[1, 2]', 400),
+  ('POST', '/table', json.dumps(dict(TABLE, plane='Zeppelin')).encode('utf-8'), 400),
+])
+def test_dispatch_errors(method, path, body, status):
+  async def request(server):
+    with pytest.raises(RequestError) as error:
+      await server.dispatch(method, path, body)
+    return error.value.status, server.stats()
+
+  raised, stats = run(request)
+  assert raised == status
+  assert stats['pending'] == 0
+
+
+def exchange(server, request):
+  """Send the raw ``request`` bytes over a connection to ``server`` and return the response."""
+  async def main():
+    listening = await asyncio.start_server(server.handle, '127.0.0.1', 0)
+    port = listening.sockets[0].getsockname()[1]
+    try:
+      reader, writer = await asyncio.open_connection('127.0.0.1', port)
+      writer.write(request)
+      await writer.drain()
+      response = await reader.read()
+      writer.close()
+      return response
+    finally:
+      listening.close()
+      await listening.wait_closed()
+      server.close()
+  return asyncio.run(main())
+
+
+def parse(response):
+  head, _, body = response.partition(b'\r\n\r\n')
+  lines = head.decode('latin-1').split('\r\n')
+  headers = dict(
+      (name.lower(), value.strip())
+      for name, _, value in (line.partition(':') for line in lines[1:]))
+  assert int(headers['content-length']) == len(body)
+  return int(lines[0].split()[1]), headers, json.loads(body.decode('utf-8'))
+
+
+def test_handle_posts_over_http():
+  body = json.dumps(TABLE).encode('utf-8')
+  status, headers, response = parse(exchange(Server(jobs=1), (
+      b'POST /table HTTP/1.1\r\nContent-Length: %d\r\nConnection: close\r\n\r\n' % len(body)) + body))
+  assert status == 200
+  assert headers['connection'] == 'close'
+  assert response == json.loads(compute('/table', TABLE).decode('utf-8'))
+
+
+def test_handle_rejects_large_bodies():
+  status, headers, response = parse(exchange(Server(jobs=1), (
+      b'POST /table HTTP/1.1\r\nContent-Length: %d\r\n\r\n' % (MAX_BODY + 1))))
+  assert status == 413
+  # The body is not read, so the connection can not be reused.
+  assert headers['connection'] == 'close'
+  assert 'error' in response
+
+
+@pytest.mark.skipif(not hasattr(signal, 'SIGTERM') or os.name != 'posix', reason='posix only')
+def test_sigterm_shuts_down():
+  script = (
+      'import sys\n'
+      'from skypie.server import serve\n'
+      'def ready(sockets):\n'
+      '  print(sockets[0].getsockname()[1])\n'
+      '  sys.stdout.flush()\n'
+      'serve("127.0.0.1", 0, jobs=1, ready=ready)\n'
+      'print("stopped")\n')
+  root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+  process = subprocess.Popen(
+      [sys.executable, '-c', script], stdout=subprocess.PIPE, cwd=root,
+      env=dict(os.environ, PYTHONPATH=root), universal_newlines=True)
+  try:
+    assert int(process.stdout.readline())
+    process.send_signal(signal.SIGTERM)
+    output, _ = process.communicate(timeout=30)
+  finally:
+    if process.poll() is None:
+      process.kill()
+  assert process.returncode == 0
+  assert output.strip() == 'stopped'
@@ -0,0 +1,66 @@
+import pytest
+
+from skypie.acquisition import AllCash, Mortgage
+from skypie.grid import evaluate_batch, rate
+from skypie.model import UsageModel
+from skypie.planes import PLANES
+from skypie.solver import bracket, breakeven_hours, breakeven_years, brent, Counter, NoBreakeven
+
+
+def test_brent_finds_roots():
+  assert brent(lambda x: x * x - 2, 0, 2, xtol=1e-9) == pytest.approx(2 ** 0.5, abs=1e-8)
+  assert brent(lambda x: x - 1, 1, 3) == 1
+  assert brent(lambda x: x - 3, 1, 3) == 3
+
+
+def test_brent_converges_on_steps():
+  step = lambda x: -1 if x < 1.25 else 1
+  assert brent(step, 0, 10, xtol=1e-6) == pytest.approx(1.25, abs=1e-5)
+
+
+def test_brent_requires_a_bracket():
+  with pytest.raises(NoBreakeven):
+    brent(lambda x: x + 1, 0, 1)
+
+
+def test_bracket_grows_until_sign_change():
+  function = Counter(lambda x: x - 300)
+  low, f_low, high, f_high = bracket(function, 0, 1, 1000)
+  assert low < 300 <= high and f_low < 0 <= f_high
+  with pytest.raises(NoBreakeven):
+    bracket(function, 0, 1, 100)
+
+
+def test_breakeven_hours():
+  plane, usage = PLANES['DA40'], UsageModel(revenue=180, salary=20)
+  target = -250
+  hours, evaluations = breakeven_hours(plane, AllCash(), 10, 5, target, usage=usage)
+  assert evaluations < 60
+  for offset, sign in ((-0.01, -1), (0.01, 1)):
+    profit, = evaluate_batch(plane, AllCash(), 10, [hours + offset], [5], usage=usage)[0]
+    assert sign * (rate(profit, 'hourly', 10, 5) - target) > 0
+
+
+def test_breakeven_hours_without_crossover():
+  with pytest.raises(NoBreakeven):
+    breakeven_hours(PLANES['DA40'], AllCash(), 10, 5, 1e6, limit=1000)
+
+
+def test_breakeven_years():
+  plane, usage = PLANES['DA40'], UsageModel(hobbs_ratio=1.2, revenue=180)
+  acquisition = Mortgage(0.15, 120, 0.0625)
+  results = dict(breakeven_years(plane, acquisition, 10, [0, 20, 40], -300, 30, usage=usage))
+  # Beating the target after a year is a breakeven at one year.
+  assert results[40] == 1
+  for hours, years in results.items():
+    row, = evaluate_batch(plane, acquisition, 10, [hours], range(1, 31), usage=usage)
+    values = [rate(value, 'hourly', 10, horizon) for horizon, value in zip(range(1, 31), row)]
+    if years is None:
+      assert max(values) < -300
+    else:
+      assert values[years - 1] >= -300 and max(values[:years - 1] or [-300.5]) < -300
+
+
+def test_breakeven_years_none_past_max_years():
+  results = list(breakeven_years(PLANES['DA40'], AllCash(), 10, [20], 1e6, 5))
+  assert results == [(20, None)]
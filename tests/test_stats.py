@@ -0,0 +1,54 @@
+import io
+import pstats
+import sys
+
+import pytest
+
+from skypie import stats
+from skypie.bin import skypie as cli
+
+
+def test_delta_and_merge():
+  since = stats.snapshot()
+  stats.increment(stats.SCENARIOS, 3)
+  stats.increment(stats.MONTHS, 36)
+  counters = stats.delta(since)
+  assert counters[stats.SCENARIOS] == 3
+  assert counters[stats.MONTHS] == 36
+  assert all(value == 0 for name, value in counters.items()
+             if name not in (stats.SCENARIOS, stats.MONTHS))
+
+  # Merging counts the counters of a worker as if done here.
+  since = stats.snapshot()
+  stats.merge(counters)
+  assert stats.delta(since) == counters
+
+
+def test_phase_accumulates():
+  with stats.phase('testing'):
+    pass
+  first = stats.TIMERS['testing']
+  with stats.phase('testing'):
+    pass
+  assert stats.TIMERS['testing'] >= first >= 0
+
+
+def test_profile_output(monkeypatch, tmp_path):
+  filename = str(tmp_path / 'table.pstats')
+  stderr = io.StringIO()
+  monkeypatch.setattr(sys, 'argv', [
+      'skypie', '--profile', filename, 'table', 'DA40', '10', '10,30,10', '1,5,2', '--jobs', '1'])
+  monkeypatch.setattr(sys, 'stdout', io.StringIO())
+  monkeypatch.setattr(sys, 'stderr', stderr)
+  stats.reset()
+  with pytest.raises(SystemExit) as exit:
+    cli.main()
+  assert not exit.value.code
+
+  # The profile is written, and the work counters are summarized.
+  profile = pstats.Stats(filename)
+  assert any(function == 'table_command' for _, _, function in profile.stats)
+  summary = stderr.getvalue()
+  assert '%s: ' % stats.SCENARIOS in summary
+  assert '%s: ' % stats.MONTHS in summary
+  assert 'time in simulate:' in summary
@@ -0,0 +1,36 @@
+import pytest
+
+from skypie.acquisition import AllCash, Mortgage
+from skypie.balance import CapEx, CATEGORIES, Hobby, Income, OpEx
+from skypie.model import simple, UsageModel
+from skypie.planes import PLANES
+from skypie.timeseries import timeseries
+
+
+USAGE = UsageModel(hobbs_ratio=1.2, revenue=150, salary=20)
+
+
+@pytest.mark.parametrize('name', ['DA40', 'T210'])
+@pytest.mark.parametrize('acquisition', [AllCash(), Mortgage(0.15, 120, 0.0625)])
+def test_monthly_rows_sum_to_yearly_rollups(name, acquisition):
+  plane, years = PLANES[name], 6
+  series = timeseries(plane, acquisition, 10, 60, years, usage=USAGE)
+  balance = simple(plane, acquisition, 10, 60, years, usage=USAGE)
+  assert len(series) == years * 12
+
+  for klazz in (CapEx, OpEx, Income, Hobby):
+    column = series.column(klazz.__name__.lower())
+    for year in range(years):
+      expected = balance.rollups.by_year.get(year, [0] * len(CATEGORIES))[CATEGORIES.index(klazz)]
+      assert sum(column[year * 12:(year + 1) * 12]) == pytest.approx(expected, rel=1e-9)
+
+  outlay = sum(balance.sum(item_klazz=klazz) for klazz in (CapEx, OpEx, Hobby))
+  outlay -= balance.sum(item_klazz=Income)
+  assert series.column('outlay')[-1] == pytest.approx(outlay, rel=1e-9)
+
+
+def test_months_are_integers():
+  series = timeseries(PLANES['DA40'], AllCash(), 10, 40, 2)
+  assert list(series.column('month')) == list(range(24))
+  assert all(isinstance(row[0], int) for row in series.rows())
+  assert all(isinstance(row[1], float) for row in series.rows())
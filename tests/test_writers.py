@@ -0,0 +1,82 @@
+import csv
+import io
+import json
+import sys
+
+import pytest
+
+from skypie.bin import skypie as cli
+from skypie.grid import iterate_grid, rate
+from skypie.writers import ArrowWriter
+
+
+ARGV = ['--sell', 'table', 'T210', '10', '0,200,25', '1,9,4', '--jobs', '1', '--output', 'yearly']
+COLUMNS = ['part135_hours', 'years', 'yearly']
+
+
+def expected_rows():
+  args = cli.setup_argparser(ARGV).parse_args(ARGV)
+  y_range = cli.parse_range(args.y_range)
+  rows = iterate_grid(
+      cli.update_plane(cli.PLANES[args.plane], args),
+      cli.parse_acquisition(args),
+      args.part91_hours,
+      cli.parse_range(args.h_range),
+      y_range,
+      usage=cli.parse_usage_model(args),
+      constants=cli.parse_constants(args),
+      sell=args.sell)
+  return [
+      (hours, years, rate(value, 'yearly', args.part91_hours, years))
+      for hours, row in rows for years, value in zip(y_range, row)]
+
+
+def run_table(monkeypatch, format):
+  stdout = io.TextIOWrapper(io.BytesIO(), encoding='utf-8')
+  monkeypatch.setattr(sys, 'argv', ['skypie'] + ARGV + ['--format', format])
+  monkeypatch.setattr(sys, 'stdout', stdout)
+  with pytest.raises(SystemExit) as exit:
+    cli.main()
+  assert not exit.value.code
+  stdout.flush()
+  return stdout.buffer.getvalue()
+
+
+def test_csv_round_trip(monkeypatch):
+  reader = csv.reader(io.StringIO(run_table(monkeypatch, 'csv').decode('utf-8')))
+  assert next(reader) == COLUMNS
+  rows = [(int(hours), int(years), float(value)) for hours, years, value in reader]
+  assert rows == expected_rows()
+
+
+def test_jsonl_round_trip(monkeypatch):
+  lines = run_table(monkeypatch, 'jsonl').decode('utf-8').splitlines()
+  records = [json.loads(line) for line in lines]
+  assert all(list(record) == COLUMNS for record in records)
+  rows = [tuple(record[column] for column in COLUMNS) for record in records]
+  assert rows == expected_rows()
+  for hours, years, value in rows:
+    assert isinstance(hours, int) and isinstance(years, int) and isinstance(value, float)
+
+
+def test_arrow_round_trip(monkeypatch):
+  pyarrow = pytest.importorskip('pyarrow')
+  import pyarrow.ipc
+  table = pyarrow.ipc.open_stream(run_table(monkeypatch, 'arrow')).read_all()
+  assert table.schema.names == COLUMNS
+  assert [str(field.type) for field in table.schema] == ['int64', 'int64', 'double']
+  assert list(zip(*[table.column(column).to_pylist() for column in COLUMNS])) == expected_rows()
+
+
+def test_arrow_batches_share_the_first_schema():
+  pyarrow = pytest.importorskip('pyarrow')
+  import pyarrow.ipc
+  stream = io.BytesIO()
+  rows = [(hours, hours * 0.5) for hours in range(5)]
+  with ArrowWriter(stream, ['hours', 'half'], batch_size=2) as writer:
+    for row in rows:
+      writer.write(row)
+  reader = pyarrow.ipc.open_stream(stream.getvalue())
+  batches = list(reader)
+  assert [batch.num_rows for batch in batches] == [2, 2, 1]
+  assert [tuple(row.values()) for batch in batches for row in batch.to_pylist()] == rows